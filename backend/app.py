@@ -1,12 +1,19 @@
-from flask import Flask, send_from_directory
+from flask import Flask, send_from_directory, request, g, Response
 from flask_cors import CORS
 from config import Config
+from werkzeug.security import safe_join
+from werkzeug.middleware.proxy_fix import ProxyFix
+import mimetypes
 import os
 
 # Create Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# Client address from X-Forwarded-For, trusting only the entries our own proxies appended
+if Config.TRUSTED_PROXY_HOPS > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=Config.TRUSTED_PROXY_HOPS)
+
 # Enable CORS with environment-based origins
 cors_origins = os.getenv('CORS_ORIGINS', '*').split(',')
 CORS(app, resources={
@@ -20,6 +27,33 @@ CORS(app, resources={
     }
 })
 
+# Per-request SQL instrumentation (query count, DB time, connection acquire time)
+# and Prometheus request metrics
+from models import get_pool_stats
+from models.instrumentation import start_request, end_request, server_timing_header
+from utils.metrics import REQUEST_COUNT, REQUEST_LATENCY, render_metrics, sync_pool_metrics
+import time
+
+@app.before_request
+def start_query_stats():
+    g.request_started = time.perf_counter()
+    start_request()
+
+@app.after_request
+def add_server_timing(response):
+    stats = end_request()
+    if stats is not None and app.config.get('SERVER_TIMING_HEADER', True):
+        response.headers.add('Server-Timing', server_timing_header(stats))
+
+    started = g.pop('request_started', None)
+    if started is not None:
+        blueprint = request.blueprint or 'app'
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.labels(blueprint, endpoint, request.method).observe(time.perf_counter() - started)
+        REQUEST_COUNT.labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+    sync_pool_metrics(get_pool_stats())
+    return response
+
 # Register blueprints
 from routes.auth_routes import auth_bp
 from routes.candidate_routes import candidate_bp
@@ -29,42 +63,81 @@ app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(candidate_bp, url_prefix='/api/candidates')
 app.register_blueprint(voter_bp, url_prefix='/api/voters')
 
+# Keep next months' votes partitions created while the deployment runs (no restart or cron needed)
+from utils.partition_maintenance import partition_maintainer
+partition_maintainer.start()
+
+# Queue mode: open this worker's vote log now, so logs orphaned by dead workers are replayed without waiting for a vote
+if Config.VOTE_INGEST_MODE == 'queue':
+    from utils.vote_queue import vote_queue
+    vote_queue.start()
+
 # Serve uploaded files
 UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads', 'profiles')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+def _send_upload(path, mimetype=None, etag=True, immutable=False):
+    """Send a file from UPLOAD_FOLDER with caching headers.
+    Conditional requests (ETag / Last-Modified) and Range are handled by send_file;
+    a pre-compressed <file>.gz sidecar is used when present and the client accepts gzip.
+    """
+    if mimetype is None:
+        mimetype = mimetypes.guess_type(path)[0]
+    encoding = None
+    if 'gzip' in request.headers.get('Accept-Encoding', '') and os.path.isfile(safe_join(UPLOAD_FOLDER, path + '.gz') or ''):
+        path, encoding = path + '.gz', 'gzip'
+
+    max_age = IMMUTABLE_MAX_AGE if immutable else app.config.get('UPLOAD_CACHE_MAX_AGE', 3600)
+    response = send_from_directory(UPLOAD_FOLDER, path, mimetype=mimetype, etag=etag, max_age=max_age)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.accept_ranges = 'bytes'
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
 @app.route('/uploads/profiles/<path:filename>')
 def serve_upload(filename):
-    """Serve uploaded profile pictures"""
-    return send_from_directory(UPLOAD_FOLDER, filename)
+    """Serve uploaded profile pictures.
+    Content-addressed images (/uploads/profiles/<digest>) are served in the size
+    given by ?size=avatar|card|full, as WebP when the client accepts it, and are
+    cacheable forever (the URL changes whenever the picture does).
+    """
+    from utils.images import resolve_variant
+    variant = resolve_variant(UPLOAD_FOLDER, filename, request.args.get('size'), request.headers.get('Accept', ''))
+    if variant is None:
+        return _send_upload(filename)
+    path, fmt = variant
+    # Stable across servers: the digest already identifies the content
+    response = _send_upload(path, mimetype=f'image/{fmt}', etag=path.replace('/', '-'), immutable=True)
+    response.vary.add('Accept')
+    return response
 
 # Health check endpoint
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return {'status': 'ok', 'message': 'Backend is running'}, 200
+    return {'status': 'ok', 'message': 'Backend is running', 'db_pool': get_pool_stats()}, 200
+
+# Prometheus metrics endpoint
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose request, vote, DB pool, cache and upload metrics in Prometheus text format"""
+    token = app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return {'error': 'Unauthorized'}, 401
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
 
 # Stats endpoint for dashboard
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Get voting statistics"""
     try:
-        from models import execute_query
-        
-        # Get counts using direct SQL queries
-        total_voters_result = execute_query("SELECT COUNT(*) as count FROM users", fetch_one=True)
-        total_candidates_result = execute_query("SELECT COUNT(*) as count FROM candidates WHERE is_active = TRUE", fetch_one=True)
-        total_votes_result = execute_query("SELECT COUNT(*) as count FROM votes", fetch_one=True)
-        
-        # Extract counts (handle dict-like results)
-        total_voters = total_voters_result.get('count', 0) if total_voters_result else 0  # type: ignore
-        total_candidates = total_candidates_result.get('count', 0) if total_candidates_result else 0  # type: ignore
-        total_votes = total_votes_result.get('count', 0) if total_votes_result else 0  # type: ignore
-        
-        return {
-            'totalVoters': total_voters,
-            'totalCandidates': total_candidates,
-            'totalVotes': total_votes
-        }, 200
+        from models.stats_model import Stats
+        return Stats.get(), 200
     except Exception as e:
         print(f"Error getting stats: {e}")
         return {
@@ -0,0 +1,281 @@
+"""
+Load-test and benchmark the voting hot paths against a local Postgres.
+
+Seeds benchmark users/candidates/votes, serves the Flask app in-process
+and drives each scenario at the requested concurrency, reporting
+p50/p95/p99 latency, requests per second and queries per request.
+
+Usage (from backend/):
+    python -m benchmarks.run --users 2000 --candidates 10 --concurrency 16 --requests 2000
+    python -m benchmarks.run --scenarios vote,results --json bench.json
+    python -m benchmarks.run --scenarios vote,vote_batch --concurrency 32   # direct vs group commit
+    python -m benchmarks.run --url http://localhost:5000 --no-seed   # external server, no query counts
+"""
+import argparse
+import http.client
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+
+import jwt
+
+from config import Config
+from models import get_db_connection, get_query_count
+from benchmarks import seed as seeding
+
+
+class _Client(threading.local):
+    """One keep-alive HTTP connection per driver thread"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.conn = None
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                self.conn.request(method, path, body=payload, headers=headers)
+                response = self.conn.getresponse()
+                response.read()
+                return response.status
+            except (http.client.HTTPException, ConnectionError):
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+
+
+def _token(user_id):
+    return jwt.encode({
+        'user_id': user_id,
+        'role': 'user',
+        'status': 'active',
+        'exp': datetime.utcnow() + Config.JWT_ACCESS_TOKEN_EXPIRES
+    }, Config.JWT_SECRET_KEY, algorithm="HS256")
+
+
+def _scenarios(data):
+    """Scenario name -> factory(i) returning (method, path, body, headers, ok_statuses)"""
+    users = data['users']
+    candidates = data['candidates']
+    voters = users[len(candidates):] or users
+    tokens = {}
+
+    def auth(user_id):
+        if user_id not in tokens:
+            tokens[user_id] = {'Authorization': f"Bearer {_token(user_id)}"}
+        return tokens[user_id]
+
+    def login(i):
+        _, email = random.choice(users)
+        return 'POST', '/api/auth/login', {'email': email, 'password': seeding.BENCH_PASSWORD}, None, (200,)
+
+    def vote(i):
+        # Each request is a distinct voter so every vote is a real insert
+        user_id, _ = voters[i % len(voters)]
+        return 'POST', '/api/voters/vote', {'candidate_id': random.choice(candidates)}, auth(user_id), (201,)
+
+    def candidates_list(i):
+        return 'GET', '/api/candidates', None, None, (200,)
+
+    def results(i):
+        return 'GET', '/api/candidates/results', None, None, (200,)
+
+    def stats(i):
+        return 'GET', '/api/stats', None, None, (200,)
+
+    return {
+        'login': login,
+        'vote': vote,
+        'vote_batch': vote,  # same requests, served with VOTE_INGEST_MODE=batch
+        'candidates': candidates_list,
+        'results': results,
+        'stats': stats,
+    }
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(client, name, factory, total, concurrency, count_queries):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i):
+        nonlocal errors
+        method, path, body, headers, ok = factory(i)
+        start = time.perf_counter()
+        try:
+            status = client.request(method, path, body, headers)
+        except Exception:
+            status = None
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if status not in ok:
+                errors += 1
+
+    queries_before = get_query_count() if count_queries else None
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(total)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        'scenario': name,
+        'requests': total,
+        'errors': errors,
+        'rps': total / wall if wall else 0.0,
+        'p50_ms': _percentile(latencies, 50) * 1000,
+        'p95_ms': _percentile(latencies, 95) * 1000,
+        'p99_ms': _percentile(latencies, 99) * 1000,
+        'mean_ms': statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        'queries_per_request': None,
+    }
+    if count_queries:
+        result['queries_per_request'] = (get_query_count() - queries_before) / total
+    return result
+
+
+def _serve_in_process(port):
+    """Start the Flask app on a threaded werkzeug server with HTTP/1.1 keep-alive"""
+    from werkzeug.serving import make_server, WSGIRequestHandler
+    import app as app_module
+    import routes.voter_routes as voter_routes
+
+    # Benchmarks must be able to vote at any hour, and drive every request from one IP
+    voter_routes.is_voting_open = lambda: True
+    Config.RATE_LIMIT_ENABLED = False
+
+    class KeepAliveHandler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', port, app_module.app, threaded=True, request_handler=KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def print_report(results):
+    header = f"{'scenario':<12}{'reqs':>7}{'errs':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'q/req':>8}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        qpr = f"{r['queries_per_request']:.2f}" if r['queries_per_request'] is not None else 'n/a'
+        print(f"{r['scenario']:<12}{r['requests']:>7}{r['errors']:>6}{r['rps']:>10.1f}"
+              f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{qpr:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the voting API hot paths')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--candidates', type=int, default=10)
+    parser.add_argument('--history-days', type=int, default=7, help='days of past votes to seed')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=1000, help='requests per scenario')
+    parser.add_argument('--login-requests', type=int, default=100, help='requests for the (CPU-heavy) login scenario')
+    parser.add_argument('--scenarios', default='login,vote,vote_batch,candidates,results,stats')
+    parser.add_argument('--url', help='benchmark an already running server instead of an in-process one')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--no-seed', action='store_true', help='reuse previously seeded benchmark data')
+    parser.add_argument('--cleanup', action='store_true', help='delete benchmark data afterwards')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args(argv)
+
+    if args.no_seed:
+        connection = get_db_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT id, email FROM users WHERE email LIKE %s ORDER BY id", (f"%@{seeding.BENCH_DOMAIN}",))
+                users = cursor.fetchall()
+                cursor.execute("SELECT id FROM candidates WHERE user_id = ANY(%s) ORDER BY id", ([u[0] for u in users],))
+                candidates = [row[0] for row in cursor.fetchall()]
+        finally:
+            connection.close()
+        data = {'users': users, 'candidates': candidates}
+        if not candidates:
+            print("❌ No benchmark data found; run without --no-seed first")
+            return 1
+    else:
+        print(f"🌱 Seeding {args.users} users, {args.candidates} candidates, {args.history_days} days of votes...")
+        started = time.perf_counter()
+        data = seeding.seed(args.users, args.candidates, args.history_days)
+        print(f"✅ Seeded in {time.perf_counter() - started:.1f}s\n")
+
+    if args.url:
+        target = urlparse(args.url)
+        host, port = target.hostname, target.port or 80
+        count_queries = False
+        server = None
+    else:
+        host, port = '127.0.0.1', args.port
+        count_queries = True
+        server = _serve_in_process(port)
+
+    client = _Client(host, port)
+    factories = _scenarios(data)
+    results = []
+    try:
+        for name in [s.strip() for s in args.scenarios.split(',') if s.strip()]:
+            if name not in factories:
+                print(f"⚠️  Unknown scenario '{name}', skipping")
+                continue
+            total = args.login_requests if name == 'login' else args.requests
+            if name == 'vote_batch' and args.url:
+                print("⚠️  vote_batch switches the in-process server's ingest mode; skipping with --url")
+                continue
+            if name in ('vote', 'vote_batch'):
+                connection = get_db_connection()
+                try:
+                    seeding.clear_todays_votes(connection)
+                finally:
+                    connection.close()
+                total = min(total, max(1, len(data['users']) - len(data['candidates'])))
+            ingest_mode = Config.VOTE_INGEST_MODE
+            if not args.url:
+                Config.VOTE_INGEST_MODE = 'batch' if name == 'vote_batch' else 'direct'
+            try:
+                results.append(run_scenario(client, name, factories[name], total, args.concurrency, count_queries))
+            finally:
+                Config.VOTE_INGEST_MODE = ingest_mode
+    finally:
+        if server is not None:
+            server.shutdown()
+        if args.cleanup:
+            connection = get_db_connection()
+            try:
+                seeding.reset(connection)
+            finally:
+                connection.close()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
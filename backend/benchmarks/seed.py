@@ -0,0 +1,118 @@
+"""
+Bulk loaders for benchmark data.
+
+All benchmark users share the email domain BENCH_DOMAIN so they can be
+removed again without touching real accounts (candidates, votes and
+tallies cascade from users).
+"""
+import io
+import random
+from werkzeug.security import generate_password_hash
+from models import get_db_connection
+
+BENCH_DOMAIN = 'bench.local'
+BENCH_PASSWORD = 'bench-password'
+BATCH_SIZE = 10000
+
+
+def bench_email(index):
+    return f"bench_user_{index}@{BENCH_DOMAIN}"
+
+
+def _copy_rows(cursor, table, columns, rows):
+    """Stream rows into table with COPY in batches (bounded memory)"""
+    buffer = io.StringIO()
+    count = 0
+    for row in rows:
+        buffer.write('\t'.join('\\N' if value is None else str(value) for value in row))
+        buffer.write('\n')
+        count += 1
+        if count % BATCH_SIZE == 0:
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+            buffer = io.StringIO()
+    if buffer.tell():
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+    return count
+
+
+def reset(connection):
+    """Delete every benchmark user (and, by cascade, their candidacies, votes and tallies)"""
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM users WHERE email LIKE %s", (f"%@{BENCH_DOMAIN}",))
+    connection.commit()
+
+
+def clear_todays_votes(connection):
+    """Remove today's benchmark votes so the vote scenario can run again"""
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            WITH deleted AS (
+                DELETE FROM votes v USING users u
+                WHERE v.user_id = u.id AND u.email LIKE %s AND v.vote_date = CURRENT_DATE
+                RETURNING v.candidate_id
+            ), per_candidate AS (
+                SELECT candidate_id, COUNT(*) AS removed FROM deleted GROUP BY candidate_id
+            )
+            UPDATE vote_tallies t SET count = t.count - p.removed
+            FROM per_candidate p
+            WHERE t.candidate_id = p.candidate_id AND t.vote_date = CURRENT_DATE
+        """, (f"%@{BENCH_DOMAIN}",))
+    connection.commit()
+
+
+def seed(users=1000, candidates=10, history_days=7, seed_value=42):
+    """Load benchmark users, candidates and `history_days` days of past votes.
+    Returns {'users': [(id, email)], 'candidates': [candidate_id]}
+    """
+    rng = random.Random(seed_value)
+    password_hash = generate_password_hash(BENCH_PASSWORD)  # hashed once, shared by all bench users
+    connection = get_db_connection()
+    try:
+        reset(connection)
+        with connection.cursor() as cursor:
+            _copy_rows(cursor, 'users', ('name', 'email', 'password', 'role', 'status'), (
+                (f"Bench User {i}", bench_email(i), password_hash, 'user', 'active')
+                for i in range(users)
+            ))
+            cursor.execute("SELECT id, email FROM users WHERE email LIKE %s ORDER BY id", (f"%@{BENCH_DOMAIN}",))
+            user_rows = cursor.fetchall()
+
+            candidate_users = user_rows[:candidates]
+            _copy_rows(cursor, 'candidates', ('user_id', 'name', 'party', 'description', 'is_active', 'position'), (
+                (user_id, f"Bench Candidate {i}", 'Independent', 'Benchmark candidate', 't', 'Candidate')
+                for i, (user_id, _) in enumerate(candidate_users)
+            ))
+            cursor.execute(
+                "SELECT id FROM candidates WHERE user_id = ANY(%s) ORDER BY id",
+                ([user_id for user_id, _ in candidate_users],)
+            )
+            candidate_ids = [row[0] for row in cursor.fetchall()]
+
+            # Past days only: today stays free for the vote scenario
+            cursor.execute("SELECT to_regproc('create_vote_partitions') IS NOT NULL")
+            if cursor.fetchone()[0]:
+                cursor.execute("SELECT create_vote_partitions(CURRENT_DATE - %s, CURRENT_DATE)", (history_days,))
+            _copy_rows(cursor, 'votes', ('user_id', 'candidate_id', 'vote_date'), (
+                (user_id, rng.choice(candidate_ids), f"{day}")
+                for day in _past_dates(cursor, history_days)
+                for user_id, _ in user_rows
+            ))
+            cursor.execute("""
+                INSERT INTO vote_tallies (candidate_id, vote_date, count)
+                SELECT candidate_id, vote_date, COUNT(*) FROM votes
+                WHERE candidate_id = ANY(%s)
+                GROUP BY candidate_id, vote_date
+                ON CONFLICT (candidate_id, vote_date) DO UPDATE SET count = EXCLUDED.count
+            """, (candidate_ids,))
+            cursor.execute("ANALYZE users; ANALYZE candidates; ANALYZE votes; ANALYZE vote_tallies;")
+        connection.commit()
+        return {'users': user_rows, 'candidates': candidate_ids}
+    finally:
+        connection.close()
+
+
+def _past_dates(cursor, days):
+    cursor.execute("SELECT (CURRENT_DATE - g)::date FROM generate_series(1, %s) AS g", (days,))
+    return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,152 @@
+"""
+Compare planning time and round trips of the model queries, plain vs prepared.
+
+For every read-only statement in the registry (models.statements), runs
+--iterations executions as plain SQL and as a prepared statement and reports:
+
+- plan ms: server planning time per execution (EXPLAIN ANALYZE "Planning Time";
+  for the prepared run, after the warm-up executions that let Postgres
+  settle on a cached generic plan)
+- call us: mean execute_query round trip from the client, with
+  DB_PREPARED_STATEMENTS off and on
+
+Writes are not measured: EXPLAIN ANALYZE would execute them.
+
+Usage (from backend/):
+    python -m benchmarks.statements --iterations 500
+    python -m benchmarks.statements --only vote_user_vote,candidate_get_all --json statements.json
+
+End to end, compare `python -m benchmarks.run` with DB_PREPARED_STATEMENTS=false and true.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from config import Config
+from models import execute_query, get_db_connection
+from models.statements import registered
+import models.user_model  # noqa: F401 (declare the statements)
+import models.candidate_model  # noqa: F401
+import models.vote_model  # noqa: F401
+
+# Statement name -> params built from sample rows {'user', 'email', 'candidate', 'date'}
+READ_ONLY = {
+    'user_find_by_email': lambda s: (s['email'],),
+    'user_find_by_id': lambda s: (s['user'],),
+    'candidate_get_all': lambda s: (),
+    'candidate_active_ids': lambda s: (),
+    'candidate_get_by_id': lambda s: (s['candidate'],),
+    'candidate_get_by_user_id': lambda s: (s['user'],),
+    'candidate_status_by_user': lambda s: (s['user'],),
+    'candidate_vote_count': lambda s: (s['user'],),
+    'vote_has_voted_today': lambda s: (s['user'],),
+    'vote_voted_today': lambda s: (s['user'],),
+    'vote_user_vote': lambda s: (s['user'],),
+    'vote_user_vote_any_date': lambda s: (s['user'],),
+    'vote_results': lambda s: (),
+    'vote_results_for_date': lambda s: (s['date'],),
+    'vote_get_tallies': lambda s: (),
+}
+
+WARMUP = 10  # > 5 executions: the server may switch a prepared statement to its generic plan
+
+
+def _samples(cursor):
+    cursor.execute("SELECT u.id, u.email FROM candidates c JOIN users u ON u.id = c.user_id ORDER BY c.id LIMIT 1")
+    user = cursor.fetchone()
+    if user is None:
+        cursor.execute("SELECT id, email FROM users ORDER BY id LIMIT 1")
+        user = cursor.fetchone() or (1, 'nobody@example.com')
+    cursor.execute("SELECT id FROM candidates ORDER BY id LIMIT 1")
+    candidate = cursor.fetchone() or (1,)
+    cursor.execute("SELECT COALESCE(MAX(vote_date), CURRENT_DATE) FROM vote_tallies WHERE vote_date < CURRENT_DATE")
+    return {'user': user[0], 'email': user[1], 'candidate': candidate[0], 'date': cursor.fetchone()[0]}
+
+
+def _planning_ms(cursor, sql, params, iterations):
+    times = []
+    for i in range(WARMUP + iterations):
+        cursor.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + sql, params)
+        if i >= WARMUP:
+            times.append(cursor.fetchone()[0][0]['Planning Time'])
+    return statistics.fmean(times)
+
+
+def _call_us(stmt, params, iterations, prepared):
+    Config.DB_PREPARED_STATEMENTS = prepared
+    for _ in range(WARMUP):
+        execute_query(stmt, params, fetch=True)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        execute_query(stmt, params, fetch=True)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def measure(stmt, params, iterations, cursor):
+    result = {'statement': stmt.name}
+    result['plan_ms_plain'] = _planning_ms(cursor, stmt.sql, params, iterations)
+    cursor.execute(stmt.prepare_sql)
+    try:
+        result['plan_ms_prepared'] = _planning_ms(cursor, stmt.execute_sql, params, iterations)
+    finally:
+        cursor.execute(f"DEALLOCATE {stmt.name}")
+    cursor.connection.rollback()
+
+    prepared_setting = Config.DB_PREPARED_STATEMENTS
+    try:
+        result['call_us_plain'] = _call_us(stmt, params, iterations, False)
+        result['call_us_prepared'] = _call_us(stmt, params, iterations, True)
+    finally:
+        Config.DB_PREPARED_STATEMENTS = prepared_setting
+    return result
+
+
+def print_report(results):
+    header = f"{'statement':<28}{'plan ms':>10}{'prepared':>10}{'call us':>10}{'prepared':>10}{'speedup':>9}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        speedup = r['call_us_plain'] / r['call_us_prepared'] if r['call_us_prepared'] else 0.0
+        print(f"{r['statement']:<28}{r['plan_ms_plain']:>10.3f}{r['plan_ms_prepared']:>10.3f}"
+              f"{r['call_us_plain']:>10.1f}{r['call_us_prepared']:>10.1f}{speedup:>8.2f}x")
+    if results:
+        plain = sum(r['plan_ms_plain'] for r in results)
+        prepared = sum(r['plan_ms_prepared'] for r in results)
+        print('-' * len(header))
+        print(f"{'total planning':<28}{plain:>10.3f}{prepared:>10.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare plain and prepared model queries')
+    parser.add_argument('--iterations', type=int, default=500, help='executions per statement and mode')
+    parser.add_argument('--only', help='comma-separated statement names')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args(argv)
+
+    statements = registered()
+    names = [n.strip() for n in args.only.split(',')] if args.only else sorted(READ_ONLY)
+    results = []
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            samples = _samples(cursor)
+            connection.rollback()
+            for name in names:
+                if name not in READ_ONLY or name not in statements:
+                    print(f"⚠️  '{name}' is not a known read-only statement, skipping")
+                    continue
+                results.append(measure(statements[name], READ_ONLY[name](samples), args.iterations, cursor))
+    finally:
+        connection.close()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2, default=str)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""
+Check that the model queries are served by the intended indexes
+Usage: python check_query_plans.py [--verbose]
+
+Runs EXPLAIN for every statement registered by the models
+(models.statements.registered(), the exact SQL execute_query runs) with
+sequential and bitmap scans disabled, so the planner has to show which
+index it would use even on a small development database. EXPECTED says,
+per statement name, which index each table must be read with
+(database/tune_indexes.sql). A statement fails when it reads a table
+without an index (Seq Scan), with a different index, or a table that
+has no expectation, and queries on today's votes must be pruned to a
+single partition. A registered statement without an entry in EXPECTED,
+or an entry without a registered statement, fails too: update EXPECTED
+together with the model SQL. Nothing is written: EXPLAIN does not
+execute the statements and the transaction is rolled back.
+
+Plain-SQL queries (Vote.rebuild_tallies, Candidate.reactivate_candidacy,
+create_admin.py) are not registered statements and are not checked.
+
+Exit status 1 if any query fails; run it after schema or query changes.
+"""
+import argparse
+import sys
+from models import get_db_connection
+from models.schema import schema
+from models.statements import registered
+import models.user_model  # noqa: F401 (declare the statements)
+import models.candidate_model  # noqa: F401
+import models.vote_model  # noqa: F401
+import models.result_model  # noqa: F401
+import models.stats_model  # noqa: F401
+
+# Statement name -> (params built from sample rows {'user', 'email', 'candidate', 'date'},
+#                    {table: expected index, or None for any index} or None to skip the
+#                    scan checks (catalog queries and function calls), prune_votes)
+EXPECTED = {
+    'user_create': (lambda s: ('Name', 'plan@example.com', 'x', 'voter'), {}, False),
+    'user_find_by_email': (lambda s: (s['email'],), {'users': 'users_email_key'}, False),
+    'user_find_by_id': (lambda s: (s['user'],), {'users': 'users_pkey'}, False),
+    'user_find_by_id_basic': (lambda s: (s['user'],), {'users': 'users_pkey'}, False),
+    'user_rehash_password': (lambda s: ('x', s['user'], 'x'), {'users': 'users_pkey'}, False),
+    'user_update_status': (lambda s: ('active', s['user']), {'users': 'users_pkey'}, False),
+    'user_update_profile_pic': (lambda s: ('x.png', s['user']), {'users': 'users_pkey'}, False),
+    'user_update_profile_name': (lambda s: ('Name', s['user']), {'users': 'users_pkey'}, False),
+    'user_update_profile_name_dob': (lambda s: ('Name', None, s['user']), {'users': 'users_pkey'}, False),
+    'user_update_profile_name_gender': (lambda s: ('Name', None, s['user']), {'users': 'users_pkey'}, False),
+    'user_update_profile_name_dob_gender': (lambda s: ('Name', None, None, s['user']), {'users': 'users_pkey'}, False),
+
+    'candidate_create': (lambda s: ('Name', 'Party', 'Position', True), {}, False),
+    'candidate_create_from_user': (
+        lambda s: (s['user'], 'Name', '', True, 'Independent', 'Candidate', None, None, None), {}, False),
+    'candidate_get_all': (lambda s: (), {'candidates': None, 'users': 'users_pkey'}, False),  # join order decides; both are indexed
+    'candidate_active_ids': (lambda s: (), {'candidates': 'idx_candidates_active_name'}, False),
+    'candidate_get_by_id': (lambda s: (s['candidate'],), {'candidates': 'candidates_pkey'}, False),
+    'candidate_get_by_user_id': (
+        lambda s: (s['user'],),
+        {'candidates': 'candidates_user_id_key', 'users': 'users_pkey', 'vote_tallies': None}, False),
+    'candidate_owner_name': (lambda s: (s['user'],), {'users': 'users_pkey'}, False),
+    'candidate_status_by_user': (lambda s: (s['user'],), {'candidates': 'candidates_user_id_key'}, False),
+    'candidate_vote_count': (
+        lambda s: (s['user'],), {'candidates': 'candidates_user_id_key', 'vote_tallies': None}, False),
+    'candidate_update': (lambda s: ('Name', 'Party', 'Position', s['candidate']), {'candidates': 'candidates_pkey'}, False),
+    'candidate_update_profile_pic': (lambda s: ('x.png', s['user']), {'candidates': 'candidates_user_id_key'}, False),
+    'candidate_deactivate': (lambda s: (s['user'],), {'candidates': 'candidates_user_id_key'}, False),
+    'candidate_clear_todays_votes': (
+        lambda s: (s['candidate'], s['candidate'], s['candidate']),
+        {'votes': 'idx_votes_candidate_date', 'vote_tallies': 'vote_tallies_pkey'}, True),
+    'candidate_delete': (lambda s: (s['candidate'],), {'candidates': 'candidates_pkey'}, False),
+
+    'vote_try_cast': (lambda s: (s['candidate'], s['user']), {'candidates': 'candidates_pkey'}, False),
+    'vote_cast_batch': (
+        lambda s: ([s['user']], [s['candidate']], [None]), {'candidates': 'candidates_pkey'}, False),
+    'vote_has_voted_today': (lambda s: (s['user'],), {'votes': 'votes_user_date_unique'}, True),
+    'vote_voted_today': (lambda s: (s['user'],), {'votes': 'votes_user_date_unique'}, True),
+    'vote_user_vote': (lambda s: (s['user'],), {'votes': 'votes_user_date_unique'}, True),
+    'vote_user_vote_any_date': (lambda s: (s['user'],), {'votes': 'votes_user_date_unique'}, False),
+    'vote_results': (lambda s: (), {'candidates': None, 'vote_tallies': None}, False),
+    'vote_results_for_date': (lambda s: (s['date'],), {'candidates': None, 'vote_tallies': None}, False),
+    'vote_get_tallies': (lambda s: (), {'vote_tallies': 'idx_vote_tallies_date'}, False),
+    'vote_is_partitioned': (lambda s: (), None, False),
+    'vote_ensure_partitions': (lambda s: (None, 1), None, False),
+    'vote_detach_partitions': (lambda s: (12, False), None, False),
+    'vote_list_partitions': (lambda s: (), None, False),
+
+    'result_compute_all': (lambda s: (), {'candidates': None, 'vote_tallies': None}, False),
+    'result_compute_active': (
+        lambda s: (), {'candidates': 'idx_candidates_active_name', 'vote_tallies': None}, False),
+    'result_snapshot_today': (lambda s: (), {'results': 'idx_results_result_date'}, False),
+    'result_finalize': (lambda s: (None, '{}'), {}, False),
+    'result_current_date': (lambda s: (), {}, False),
+    'result_snapshot_for_date': (lambda s: (s['date'],), {'results': 'idx_results_result_date'}, False),
+    'result_archive_tallies': (
+        lambda s: (s['date'],), {'vote_tallies': 'idx_vote_tallies_date', 'candidates': 'candidates_pkey'}, False),
+    'result_archive': (lambda s: (s['date'], None, '{}', s['date']), {}, False),
+    'result_unarchived_days': (
+        lambda s: (s['date'], s['date']),
+        {'vote_tallies': 'idx_vote_tallies_date', 'results': 'idx_results_result_date'}, False),
+    'result_history': (lambda s: (s['date'], s['date']), {'results': 'idx_results_result_date'}, False),
+    'result_invalidate_today': (lambda s: (), {'results': 'idx_results_result_date'}, False),
+
+    'stats_fetch': (
+        lambda s: (), {'users': None, 'candidates': 'idx_candidates_active_name', 'vote_tallies': None}, False),
+}
+
+# Built only for the optional users columns that exist (models.schema): may be unregistered
+SCHEMA_VARIANTS = {
+    'user_find_by_id', 'user_find_by_id_basic', 'user_update_profile_name', 'user_update_profile_name_dob',
+    'user_update_profile_name_gender', 'user_update_profile_name_dob_gender',
+}
+
+# Not model SQL: Postgres runs it for ON DELETE CASCADE when a candidate is deleted
+# (candidate_delete), on every votes partition
+CASCADES = {
+    'votes ON DELETE CASCADE from candidates': (
+        "DELETE FROM votes WHERE candidate_id = %s", lambda s: (s['candidate'],),
+        {'votes': 'idx_votes_candidate_date'}, False),
+}
+
+INDEX_SCANS = ('Index Scan', 'Index Only Scan')
+
+
+def _scans(plan):
+    """Yield every node of a JSON plan that reads a relation (not ModifyTable targets)"""
+    if 'Relation Name' in plan and plan['Node Type'].endswith('Scan'):
+        yield plan
+    for child in plan.get('Plans', []):
+        yield from _scans(child)
+
+
+def _sample_params(cursor):
+    cursor.execute("SELECT id, email FROM users ORDER BY id LIMIT 1")
+    user = cursor.fetchone() or (1, 'nobody@example.com')
+    cursor.execute("SELECT id FROM candidates ORDER BY id LIMIT 1")
+    candidate = cursor.fetchone() or (1,)
+    cursor.execute("SELECT COALESCE(MAX(vote_date), CURRENT_DATE) FROM vote_tallies WHERE vote_date < CURRENT_DATE")
+    return {'user': user[0], 'email': user[1], 'candidate': candidate[0], 'date': cursor.fetchone()[0]}
+
+
+def check(cursor, sql, params, expected, prune_votes):
+    cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+    plan = cursor.fetchone()[0][0]['Plan']
+    problems = []
+    used = []
+    if expected is None:
+        return problems, used
+    votes_partitions = 0
+    for node in _scans(plan):
+        index_name = node.get('Index Name') or node['Relation Name']
+        cursor.execute(
+            "SELECT COALESCE(pg_partition_root(oid), oid)::regclass::text, "
+            "COALESCE(pg_partition_root(%s::regclass), %s::regclass)::text, reltuples "
+            "FROM pg_class WHERE oid = %s::regclass",
+            (index_name, index_name, node['Relation Name'])
+        )
+        table, index, rows = cursor.fetchone()
+        if table == 'votes':
+            votes_partitions += 1
+        if table not in expected:
+            problems.append(f"reads {table}, which has no expected index")
+            continue
+        if node['Node Type'] not in INDEX_SCANS:
+            problems.append(f"{node['Node Type']} on {node['Relation Name']}")
+            continue
+        used.append(f"{node['Node Type']} using {index}")
+        want = expected[table]
+        # Index choice on an empty table (e.g. next month's partition) is arbitrary
+        if want is not None and index != want and rows > 0:
+            problems.append(f"{table} uses {index}, expected {want}")
+    if prune_votes and votes_partitions > 1:
+        problems.append(f"reads {votes_partitions} votes partitions (expected pruning to 1)")
+    return problems, used
+
+
+def _checks(statements):
+    """(name, sql, params, expected, prune_votes) for every statement and cascade, and
+    the names of statements or entries that have no counterpart
+    """
+    checks = []
+    unmatched = []
+    for name, stmt in sorted(statements.items()):
+        if name not in EXPECTED:
+            unmatched.append(f"{name}: registered statement has no entry in EXPECTED")
+            continue
+        build, expected, prune_votes = EXPECTED[name]
+        checks.append((name, stmt.sql, build, expected, prune_votes))
+    for name in sorted(set(EXPECTED) - set(statements) - SCHEMA_VARIANTS):
+        unmatched.append(f"{name}: entry in EXPECTED has no registered statement")
+    for name, (sql, build, expected, prune_votes) in CASCADES.items():
+        checks.append((name, sql, build, expected, prune_votes))
+    return checks, unmatched
+
+
+def _disable_scans(cursor):
+    cursor.execute("SET LOCAL enable_seqscan = off")
+    cursor.execute("SET LOCAL enable_bitmapscan = off")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check model query plans against the tuned indexes')
+    parser.add_argument('--verbose', action='store_true', help='show the scans used by passing queries')
+    args = parser.parse_args(argv)
+
+    print("\n" + "="*60)
+    print("🔍 CHECKING QUERY PLANS")
+    print("="*60 + "\n")
+
+    schema.columns('users')  # builds the schema-dependent user statements
+    checks, unmatched = _checks(registered())
+    for problem in unmatched:
+        print(f"  ❌ {problem}")
+
+    failures = len(unmatched)
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            _disable_scans(cursor)
+            samples = _sample_params(cursor)
+            for name, sql, build, expected, prune_votes in checks:
+                try:
+                    problems, used = check(cursor, sql, build(samples), expected, prune_votes)
+                except Exception as e:
+                    connection.rollback()
+                    _disable_scans(cursor)
+                    problems, used = [f"EXPLAIN failed: {str(e).strip()}"], []
+                if problems:
+                    failures += 1
+                    print(f"  ❌ {name}")
+                    for problem in problems:
+                        print(f"       {problem}")
+                else:
+                    print(f"  ✅ {name}")
+                    if args.verbose:
+                        for scan in sorted(set(used)):
+                            print(f"       {scan}")
+    finally:
+        connection.rollback()
+        connection.close()
+
+    total = len(checks) + len(unmatched)
+    print("\n" + "="*60)
+    print(f"{'❌' if failures else '✅'} {total - failures}/{total} queries use their intended indexes")
+    print("="*60 + "\n")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,9 +10,95 @@ class Config:
 	DB_NAME = os.getenv('DB_NAME', 'voting_system')
 	DB_PORT = int(os.getenv('DB_PORT', '5432'))
 
+	# Database connection pool (per worker process)
+	DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+	DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+	DB_POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', '5'))
+	DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))  # seconds to wait for a free connection
+	DB_POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', '1800'))  # recycle connections after N seconds
+	DB_POOL_PING_INTERVAL = float(os.getenv('DB_POOL_PING_INTERVAL', '30'))  # health-check idle connections older than N seconds
+	# Run model queries (models.statements) as server-side prepared statements; turn off behind pgbouncer pool_mode=transaction
+	DB_PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', 'true').lower() == 'true'
+
+	# SQL instrumentation
+	SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '100'))  # statements slower than this are logged
+	SLOW_QUERY_SAMPLE_RATE = float(os.getenv('SLOW_QUERY_SAMPLE_RATE', '1.0'))  # fraction of slow statements logged
+	SLOW_QUERY_LOG_FILE = os.getenv('SLOW_QUERY_LOG_FILE', '')  # default: stderr
+	SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'true').lower() == 'true'
+
+	# Password hashing (utils.passwords): werkzeug method, per-process hashing pool and its queue limit
+	PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')  # e.g. scrypt, scrypt:32768:8:1, pbkdf2:sha256:600000
+	PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))  # 0 = hash on the request thread
+	PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '32'))  # beyond this, login/register answer 503
+	PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '30'))
+
+	# Rate limiting (utils.rate_limit); rates are "<requests>/<seconds>" token buckets
+	RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+	RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')  # memory | redis
+	RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL', 'redis://localhost:6379/0')
+	RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000'))  # in-memory buckets per process
+	# Reverse proxies in front of the app (Render / Railway: 1). Each one appends the address it saw to
+	# X-Forwarded-For; the client is the entry that many hops from the right (werkzeug ProxyFix).
+	# With 0, the per-IP limits see the proxy's address: one bucket for the whole site.
+	TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '1' if os.getenv('RATE_LIMIT_TRUST_PROXY', 'false').lower() == 'true' else '0'))
+	RATE_LIMIT_LOGIN_PER_IP = os.getenv('RATE_LIMIT_LOGIN_PER_IP', '60/60')
+	RATE_LIMIT_LOGIN_PER_EMAIL = os.getenv('RATE_LIMIT_LOGIN_PER_EMAIL', '10/60')
+	RATE_LIMIT_REGISTER_PER_IP = os.getenv('RATE_LIMIT_REGISTER_PER_IP', '30/60')
+	RATE_LIMIT_VOTE_PER_IP = os.getenv('RATE_LIMIT_VOTE_PER_IP', '300/60')
+	RATE_LIMIT_VOTE_PER_USER = os.getenv('RATE_LIMIT_VOTE_PER_USER', '10/60')
+	LOGIN_MAX_FAILURES_PER_EMAIL = int(os.getenv('LOGIN_MAX_FAILURES_PER_EMAIL', '5'))
+	LOGIN_MAX_FAILURES_PER_IP = int(os.getenv('LOGIN_MAX_FAILURES_PER_IP', '100'))
+	LOGIN_FAILURE_WINDOW = float(os.getenv('LOGIN_FAILURE_WINDOW', '900'))  # seconds
+
+	# Profile picture uploads: staged locally, then stored in the background
+	UPLOAD_BACKEND = os.getenv('UPLOAD_BACKEND', 'cloudinary')  # cloudinary | local
+	UPLOAD_STAGING_DIR = os.getenv('UPLOAD_STAGING_DIR', '')  # default: backend/uploads/staging
+	UPLOAD_WORKERS = int(os.getenv('UPLOAD_WORKERS', '2'))  # upload threads per process
+	UPLOAD_MAX_PENDING = int(os.getenv('UPLOAD_MAX_PENDING', '100'))  # queued uploads per process before 503
+	UPLOAD_RETRIES = int(os.getenv('UPLOAD_RETRIES', '3'))
+	UPLOAD_RETRY_BACKOFF = float(os.getenv('UPLOAD_RETRY_BACKOFF', '1.0'))  # seconds, doubled per retry
+	UPLOAD_STATUS_TTL = int(os.getenv('UPLOAD_STATUS_TTL', '86400'))  # seconds a finished upload's status stays queryable
+	UPLOAD_PENDING_TIMEOUT = int(os.getenv('UPLOAD_PENDING_TIMEOUT', '3600'))  # pending longer than this = lost with its process, marked failed
+	UPLOAD_CACHE_MAX_AGE = int(os.getenv('UPLOAD_CACHE_MAX_AGE', '3600'))  # Cache-Control max-age for non content-addressed uploads
+
+	# Vote ingestion: direct (insert on the request) | batch (group commit of concurrent requests)
+	# | queue (durable local log, flushed to the database in batches)
+	VOTE_INGEST_MODE = os.getenv('VOTE_INGEST_MODE', 'direct')
+	VOTE_BATCH_WINDOW_MS = float(os.getenv('VOTE_BATCH_WINDOW_MS', '2'))  # how long a batch leader waits for company
+	VOTE_BATCH_MAX = int(os.getenv('VOTE_BATCH_MAX', '64'))  # votes per group commit
+	VOTE_QUEUE_DIR = os.getenv('VOTE_QUEUE_DIR', '')  # default: backend/vote_queue (must be persistent, local disk)
+	VOTE_QUEUE_BATCH_SIZE = int(os.getenv('VOTE_QUEUE_BATCH_SIZE', '500'))  # votes per INSERT
+	VOTE_QUEUE_FLUSH_MS = float(os.getenv('VOTE_QUEUE_FLUSH_MS', '50'))  # how long the flusher lets a batch fill
+	VOTE_QUEUE_ACK_TIMEOUT = float(os.getenv('VOTE_QUEUE_ACK_TIMEOUT', '5'))  # seconds to wait for fsync before 503
+
+	# Monthly votes partitions (database/partition_votes.sql, manage_partitions.py)
+	VOTE_PARTITION_MONTHS_AHEAD = int(os.getenv('VOTE_PARTITION_MONTHS_AHEAD', '3'))  # future months created in advance
+	VOTE_PARTITION_CHECK_INTERVAL = float(os.getenv('VOTE_PARTITION_CHECK_INTERVAL', '21600'))  # seconds between in-process checks; 0 = off
+	VOTE_PARTITION_RETENTION_MONTHS = int(os.getenv('VOTE_PARTITION_RETENTION_MONTHS', '0'))  # months kept attached; 0 = keep all
+
+	# Metrics: when set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+	METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+	# In-process caches (per worker process; invalidated locally on writes, TTL bounds cross-worker staleness)
+	CANDIDATE_CACHE_TTL = float(os.getenv('CANDIDATE_CACHE_TTL', '30'))
+	USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '60'))
+	USER_CACHE_MAXSIZE = int(os.getenv('USER_CACHE_MAXSIZE', '10000'))
+	# Dashboard counters (/api/stats): fresh for STATS_CACHE_TTL, then served stale while refreshing
+	STATS_CACHE_TTL = float(os.getenv('STATS_CACHE_TTL', '10'))
+	STATS_MAX_STALE = float(os.getenv('STATS_MAX_STALE', '300'))
+
+	# Results history (/api/candidates/results/<date>, /results/history): closed days never change
+	RESULTS_HISTORY_CACHE_MAX_AGE = int(os.getenv('RESULTS_HISTORY_CACHE_MAX_AGE', '3600'))
+
+	# Live vote count stream (Server-Sent Events, per worker process). Each viewer holds a request
+	# open, so it is only served by workers that multiplex requests: SERVER_MODE=async (gevent), or
+	# set SSE_ENABLED=true for threaded servers. Otherwise the pages poll instead.
+	SSE_ENABLED = os.getenv('SSE_ENABLED', 'true' if os.getenv('SERVER_MODE', 'sync').lower() == 'async' else 'false').lower() == 'true'
+	SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+	SSE_MAX_SUBSCRIBERS = int(os.getenv('SSE_MAX_SUBSCRIBERS', '1000'))
+
 	# JWT
 	JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', os.getenv('SECRET_KEY', 'change-this-secret'))
 	JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=4)
 
 __all__ = ['Config']
-
@@ -5,6 +5,7 @@ This script creates a new admin account or resets the password for an existing a
 
 from werkzeug.security import generate_password_hash
 from models import execute_query
+from config import Config
 import sys
 
 def create_admin(name='Admin', email='admin@voting.com', password='admin123'):
@@ -21,7 +22,7 @@ def create_admin(name='Admin', email='admin@voting.com', password='admin123'):
     )
     
     # Hash the password
-    password_hash = generate_password_hash(password)
+    password_hash = generate_password_hash(password, method=Config.PASSWORD_HASH_METHOD)
     
     if existing_admin:
         # Update existing admin
@@ -0,0 +1,34 @@
+"""
+Freeze today's results after voting closes (schedule daily at 8:00 PM IST, e.g. a cron job)
+Usage: python finalize_results.py
+"""
+from models.result_model import Result
+from routes.voter_routes import is_voting_open, get_ist_time
+import sys
+
+print("\n" + "="*60)
+print("🏁 FINALIZING TODAY'S RESULTS")
+print("="*60 + "\n")
+
+if is_voting_open():
+    print(f"⚠️  Voting is still open ({get_ist_time().strftime('%I:%M %p IST')}). Run after 8:00 PM IST.\n")
+    sys.exit(1)
+
+if get_ist_time().hour < 20:
+    print("⚠️  Today's voting has not happened yet. Run after 8:00 PM IST.\n")
+    sys.exit(1)
+
+try:
+    snapshot = Result.get_snapshot()
+    if snapshot is not None:
+        print("✅ Results were already finalized\n")
+    else:
+        snapshot = Result.finalize()
+        print("✅ Results finalized\n")
+
+    winner = snapshot.get('winner')
+    print(f"  Total votes: {snapshot.get('total_votes', 0)}")
+    print(f"  Winner:      {winner['name'] + ' (' + str(winner['vote_count']) + ' votes)' if winner else 'None'}\n")
+except Exception as e:
+    print(f"❌ Finalization failed: {e}\n")
+    sys.exit(1)
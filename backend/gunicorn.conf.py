@@ -0,0 +1,76 @@
+"""
+Gunicorn settings (loaded automatically by `gunicorn app:app` from this directory)
+
+SERVER_MODE selects how requests are served:
+    sync   (default) one request per worker process/thread
+    async  gevent workers: each process multiplexes up to ASYNC_WORKER_CONNECTIONS
+           requests, yielding on DB, Cloudinary and SSE waits; also turns on the
+           live vote stream (Config.SSE_ENABLED), which sync workers cannot hold open
+
+Worker count still comes from WEB_CONCURRENCY / --workers. In async mode size
+DB_POOL_MAX_SIZE for the number of concurrent queries you want per process;
+requests beyond that wait for a pooled connection instead of opening more.
+"""
+import os
+import shutil
+import tempfile
+
+SERVER_MODE = os.getenv('SERVER_MODE', 'sync').lower()
+
+if SERVER_MODE == 'async':
+    worker_class = 'gevent'
+    worker_connections = int(os.getenv('ASYNC_WORKER_CONNECTIONS', '1000'))
+elif SERVER_MODE != 'sync':
+    raise ValueError(f"Unknown SERVER_MODE '{SERVER_MODE}' (expected 'sync' or 'async')")
+
+# Prometheus multiprocess mode: every worker writes metrics to shared files
+# and /metrics aggregates them. The directory must be set before workers import the app.
+_metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'voting-prometheus')
+)
+shutil.rmtree(_metrics_dir, ignore_errors=True)
+os.makedirs(_metrics_dir, exist_ok=True)
+
+
+def _detect_schema(server):
+    # Optional columns are detected once in the master; workers inherit the map
+    try:
+        from models import get_pool
+        from models.schema import schema
+        columns = schema.refresh()
+        server.log.info("Optional columns: %s", {table: sorted(c) for table, c in columns.items()})
+        get_pool().close_all()
+    except Exception as e:
+        server.log.warning("Could not detect the database schema (workers will on first use): %s", e)
+
+
+def on_starting(server):
+    # Make sure this month's (and the next few months') votes partitions exist before workers insert
+    try:
+        from config import Config
+        from models import get_pool
+        from models.vote_model import Vote
+        created = Vote.ensure_partitions(Config.VOTE_PARTITION_MONTHS_AHEAD)
+        if created:
+            server.log.info("Created %s votes partition(s)", created)
+        get_pool().close_all()
+    except Exception as e:
+        server.log.warning("Could not check votes partitions: %s", e)
+    _detect_schema(server)
+
+
+def on_reload(server):
+    # kill -HUP <master pid> after a migration: new workers get the re-detected schema
+    _detect_schema(server)
+
+
+def post_fork(server, worker):
+    if SERVER_MODE == 'async':
+        # Before the app is imported, so no connection is ever opened in blocking mode
+        from utils.green import make_psycopg_green
+        make_psycopg_green()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,198 @@
+"""
+Bulk import voters from a CSV file
+Usage: python import_voters.py voters.csv [--batch-size 5000] [--workers N] [--conflicts conflicts.csv]
+
+The CSV needs a header row with the columns:
+  name, email, and either password (plain text, hashed here) or password_hash (already hashed)
+  role and status are optional (default: user / active)
+
+Rows are streamed in batches: passwords are hashed in a process pool while the
+previous batch is loaded with COPY into a temporary staging table and inserted
+with ON CONFLICT (email) DO NOTHING. Emails that already exist (or repeat
+within the file) are reported and written to the --conflicts file.
+"""
+import argparse
+import csv
+import io
+import multiprocessing
+import os
+import sys
+import time
+from werkzeug.security import generate_password_hash
+from models import get_db_connection
+from config import Config
+
+STAGING_COLUMNS = ('line', 'name', 'email', 'password', 'role', 'status')
+
+
+def _hash_password(args):
+    password, method = args
+    return generate_password_hash(password, method=method)
+
+
+def read_batches(path, batch_size, rejected):
+    """Yield lists of validated rows (line, name, email, password, is_hashed, role, status)"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        fields = set(reader.fieldnames or [])
+        if not {'name', 'email'} <= fields or not fields & {'password', 'password_hash'}:
+            raise ValueError("CSV header must contain name, email and password (or password_hash)")
+
+        batch = []
+        for row in reader:
+            line = reader.line_num
+            name = (row.get('name') or '').strip()
+            email = (row.get('email') or '').strip()
+            password_hash = (row.get('password_hash') or '').strip()
+            password = row.get('password') or ''
+            role = (row.get('role') or 'user').strip() or 'user'
+            status = (row.get('status') or 'active').strip() or 'active'
+
+            if not name or not email or '@' not in email or not (password or password_hash):
+                rejected.append((line, email, 'missing or invalid name/email/password'))
+                continue
+            if role not in ('user', 'admin') or status not in ('active', 'inactive'):
+                rejected.append((line, email, 'invalid role/status'))
+                continue
+
+            batch.append((line, name, email, password_hash or password, bool(password_hash), role, status))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def load_batch(connection, rows):
+    """COPY one batch into the staging table and insert it. Returns (inserted, conflicts)."""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_escape(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    with connection.cursor() as cursor:
+        cursor.execute("TRUNCATE import_voters_staging")
+        cursor.copy_expert(f"COPY import_voters_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN", buffer)
+        # Only the first occurrence of an email in the batch is inserted; every other row is a conflict
+        cursor.execute("""
+            WITH ranked AS (
+                SELECT line, email, row_number() OVER (PARTITION BY email ORDER BY line) AS rn
+                FROM import_voters_staging
+            ), inserted AS (
+                INSERT INTO users (name, email, password, role, status)
+                SELECT s.name, s.email, s.password, s.role, s.status
+                FROM import_voters_staging s
+                JOIN ranked r ON r.line = s.line AND r.rn = 1
+                ORDER BY s.line
+                ON CONFLICT (email) DO NOTHING
+                RETURNING email
+            )
+            SELECT r.line, r.email
+            FROM ranked r
+            LEFT JOIN inserted i ON i.email = r.email AND r.rn = 1
+            WHERE i.email IS NULL
+            ORDER BY r.line
+        """)
+        conflicts = cursor.fetchall()
+    connection.commit()
+    return len(rows) - len(conflicts), conflicts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk import voters from CSV')
+    parser.add_argument('csv_path')
+    parser.add_argument('--batch-size', type=int, default=5000, help='rows per COPY batch (bounds memory)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='password hashing processes')
+    parser.add_argument('--hash-method', default=Config.PASSWORD_HASH_METHOD, help='werkzeug hash method, e.g. "pbkdf2:sha256:600000" (default: PASSWORD_HASH_METHOD)')
+    parser.add_argument('--conflicts', default='import_conflicts.csv', help='where to write skipped rows')
+    args = parser.parse_args(argv)
+
+    print("\n" + "="*60)
+    print("📥 IMPORTING VOTERS")
+    print("="*60 + "\n")
+
+    if not os.path.isfile(args.csv_path):
+        print(f"❌ File not found: {args.csv_path}\n")
+        return 1
+
+    rejected = []
+    conflicts = []
+    inserted = 0
+    processed = 0
+    started = time.perf_counter()
+
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                CREATE TEMP TABLE import_voters_staging (
+                    line INTEGER, name TEXT, email TEXT, password TEXT, role TEXT, status TEXT
+                )
+            """)
+        connection.commit()
+
+        with multiprocessing.Pool(args.workers) as pool:
+            def start_hashing(batch):
+                to_hash = [(row[3], args.hash_method) for row in batch if not row[4]]
+                return batch, pool.map_async(_hash_password, to_hash, chunksize=max(1, len(to_hash) // (args.workers * 4)))
+
+            def finish_hashing(batch, pending):
+                hashes = iter(pending.get())
+                return [
+                    (line, name, email, password if is_hashed else next(hashes), role, status)
+                    for line, name, email, password, is_hashed, role, status in batch
+                ]
+
+            # Hash batch N+1 in the pool while batch N is loaded
+            in_flight = None
+            for batch in read_batches(args.csv_path, args.batch_size, rejected):
+                next_flight = start_hashing(batch)
+                if in_flight:
+                    rows = finish_hashing(*in_flight)
+                    count, batch_conflicts = load_batch(connection, rows)
+                    inserted += count
+                    processed += len(rows)
+                    conflicts.extend(batch_conflicts)
+                    print(f"  ... {processed} rows ({processed / (time.perf_counter() - started):.0f} rows/s)")
+                in_flight = next_flight
+            if in_flight:
+                rows = finish_hashing(*in_flight)
+                count, batch_conflicts = load_batch(connection, rows)
+                inserted += count
+                processed += len(rows)
+                conflicts.extend(batch_conflicts)
+    except Exception as e:
+        connection.rollback()
+        print(f"❌ Import failed: {e}\n")
+        return 1
+    finally:
+        connection.close()
+
+    elapsed = time.perf_counter() - started
+    skipped = [(line, email, 'email already exists') for line, email in conflicts] + rejected
+    if skipped:
+        with open(args.conflicts, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['line', 'email', 'reason'])
+            writer.writerows(sorted(skipped))
+
+    print("\n" + "="*60)
+    print("📋 IMPORT SUMMARY")
+    print("="*60)
+    print(f"\n  Inserted:   {inserted}")
+    print(f"  Duplicates: {len(conflicts)}")
+    print(f"  Invalid:    {len(rejected)}")
+    print(f"  Time:       {elapsed:.1f}s ({(processed + len(rejected)) / elapsed if elapsed else 0:.0f} rows/s)")
+    if skipped:
+        print(f"\n  ⚠️  Skipped rows written to {args.conflicts}")
+    print("\n" + "="*60 + "\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -52,6 +52,11 @@ def init_database():
         print("🔧 Executing schema...")
         cursor.execute(sql_commands)
         
+        print("🗂️  Partitioning votes by month...")
+        partition_file = os.path.join(os.path.dirname(__file__), '..', 'database', 'partition_votes.sql')
+        with open(partition_file, 'r', encoding='utf-8') as f:
+            cursor.execute(f.read())
+        
         print("👤 Creating admin account...")
         cursor.close()
         conn.close()
@@ -66,7 +71,7 @@ def init_database():
         print("="*60)
         print("  • users (voters and admin)")
         print("  • candidates")
-        print("  • votes (with daily voting)")
+        print("  • votes (with daily voting, partitioned by month)")
         print("  • results")
         print("\n" + "="*60)
         print("👤 Default Admin Account:")
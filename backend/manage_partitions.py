@@ -0,0 +1,63 @@
+"""
+Maintain the monthly partitions of the votes table
+Usage: python manage_partitions.py [--months-ahead N] [--keep-months N] [--drop] [--list]
+
+Creates the partitions for the next --months-ahead months (default:
+VOTE_PARTITION_MONTHS_AHEAD) and, when --keep-months (default:
+VOTE_PARTITION_RETENTION_MONTHS) is above 0, detaches months older than
+that. Detached months are kept as <partition>_archive tables, or dropped
+with --drop. Their per-day counts stay in vote_tallies and results.
+Run it daily (cron / scheduled job) to detach old months; the app itself
+creates future months every VOTE_PARTITION_CHECK_INTERVAL seconds
+(utils/partition_maintenance.py). It is idempotent.
+
+Requires database/partition_votes.sql (python migrate_db.py partition_votes.sql).
+"""
+import argparse
+import sys
+from models.vote_model import Vote
+from config import Config
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Maintain votes partitions')
+    parser.add_argument('--months-ahead', type=int, default=Config.VOTE_PARTITION_MONTHS_AHEAD)
+    parser.add_argument('--keep-months', type=int, default=Config.VOTE_PARTITION_RETENTION_MONTHS,
+                        help='months kept attached before the current one; 0 keeps everything')
+    parser.add_argument('--drop', action='store_true', help='drop old partitions instead of archiving them')
+    parser.add_argument('--list', action='store_true', help='only list the partitions')
+    args = parser.parse_args(argv)
+
+    print("\n" + "="*60)
+    print("🗂️  VOTES PARTITIONS")
+    print("="*60 + "\n")
+
+    try:
+        if not Vote.is_partitioned():
+            print("❌ votes is not partitioned yet. Run: python migrate_db.py partition_votes.sql\n")
+            return 1
+
+        if not args.list:
+            created = Vote.ensure_partitions(args.months_ahead)
+            print(f"✅ Created {created} partition(s) ({args.months_ahead} months ahead)")
+
+            if args.keep_months > 0:
+                detached = Vote.detach_partitions(args.keep_months, drop=args.drop)
+                action = 'Dropped' if args.drop else 'Archived'
+                for name in detached:
+                    print(f"  📦 {action} {name}")
+                print(f"✅ {action} {len(detached)} partition(s) older than {args.keep_months} month(s)")
+
+        print("\nAttached partitions:")
+        for part in Vote.list_partitions():
+            print(f"  • {part['name']:<16} {part['bounds']}  (~{max(part['est_rows'], 0)} rows)")
+    except Exception as e:
+        print(f"❌ Partition maintenance failed: {e}\n")
+        return 1
+
+    print("\n" + "="*60 + "\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
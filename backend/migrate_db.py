@@ -1,5 +1,9 @@
 import psycopg2
 import os
+import sys
+
+# Usage: python migrate_db.py [migration.sql ...]  (files in ../database, default: candidate_migration.sql)
+migration_names = sys.argv[1:] or ['candidate_migration.sql']
 
 print("\n🔄 Running Database Migration...\n")
 
@@ -16,15 +20,17 @@ try:
     
     print("✅ Connected to database")
     
-    # Read migration file
-    migration_file = os.path.join(os.path.dirname(__file__), '..', 'database', 'candidate_migration.sql')
-    with open(migration_file, 'r') as f:
-        migration_sql = f.read()
-    
-    print("📝 Executing migration...")
-    cur.execute(migration_sql)
+    for migration_name in migration_names:
+        # Read migration file
+        migration_file = os.path.join(os.path.dirname(__file__), '..', 'database', migration_name)
+        with open(migration_file, 'r') as f:
+            migration_sql = f.read()
+        
+        print(f"📝 Executing migration {migration_name}...")
+        cur.execute(migration_sql)
     
-    print("✅ Migration completed successfully!\n")
+    print("✅ Migration completed successfully!")
+    print("ℹ️  Reload the running app (kill -HUP <gunicorn master pid>) so it re-detects optional columns\n")
     
     # Verify columns exist
     cur.execute("""
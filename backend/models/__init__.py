@@ -1,6 +1,11 @@
 import psycopg2
 import psycopg2.extras
+import threading
 from config import Config
+from models.db_pool import ConnectionPool, PoolTimeout
+from models.instrumentation import record_query, get_query_count
+from models.statements import Statement, statement, execute as execute_statement
+import time
 import os
 
 
@@ -24,23 +29,73 @@ def get_db_connection():
 	return connection
 
 
-def execute_query(query, params=None, fetch=False, fetch_one=False, returning=False):
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+	"""Return the process-wide connection pool, creating it on first use"""
+	global _pool
+	if _pool is None:
+		with _pool_lock:
+			if _pool is None:
+				_pool = ConnectionPool(
+					get_db_connection,
+					min_size=Config.DB_POOL_MIN_SIZE,
+					max_size=Config.DB_POOL_MAX_SIZE,
+					max_overflow=Config.DB_POOL_MAX_OVERFLOW,
+					timeout=Config.DB_POOL_TIMEOUT,
+					max_lifetime=Config.DB_POOL_MAX_LIFETIME,
+					ping_interval=Config.DB_POOL_PING_INTERVAL
+				)
+	return _pool
+
+
+def get_pool_stats():
+	"""Pool metrics (checkouts, wait time, overflow, ...) or None if no query ran yet"""
+	return _pool.stats() if _pool is not None else None
+
+
+def execute_query(query, params=None, fetch=False, fetch_one=False, returning=False, commit=False):
 	"""Execute a database query with optional parameters.
 	- fetch/fetch_one use RealDictCursor for dict-like results
 	- returning: for INSERT/UPDATE with RETURNING ...
+	- commit: with fetch/fetch_one, commit after fetching (data-modifying statements returning many rows)
+	query is SQL text or a models.statements.Statement, which runs as a prepared
+	statement on the pooled connection (unless DB_PREPARED_STATEMENTS is off).
+	Connections come from the process-wide pool and are returned after each call;
+	timings feed models.instrumentation (per-request stats, slow-query log).
 	"""
+	pool = get_pool()
 	connection = None
 	cursor = None
+	broken = False
+	failed = False
+	started = time.perf_counter()
+	acquired = started
 	try:
-		connection = get_db_connection()
+		connection = pool.getconn()
+		acquired = time.perf_counter()
 		cursor_factory = psycopg2.extras.RealDictCursor if (fetch or fetch_one or returning) else None
 		cursor = connection.cursor(cursor_factory=cursor_factory)
-		cursor.execute(query, params or ())
+		if isinstance(query, Statement):
+			prepared = None
+			if Config.DB_PREPARED_STATEMENTS:
+				info = pool.info(connection)
+				if info is not None:
+					prepared = info.setdefault('prepared', set())
+			execute_statement(cursor, query, params or (), prepared)
+		else:
+			cursor.execute(query, params or ())
 
 		if fetch_one:
 			result = cursor.fetchone()
+			if commit:
+				connection.commit()
 		elif fetch:
 			result = cursor.fetchall()
+			if commit:
+				connection.commit()
 		elif returning:
 			result = cursor.fetchone()
 			connection.commit()
@@ -49,13 +104,22 @@ def execute_query(query, params=None, fetch=False, fetch_one=False, returning=Fa
 			result = cursor.rowcount
 		return result
 	except psycopg2.Error:
+		failed = True
 		if connection:
-			connection.rollback()
+			try:
+				connection.rollback()
+			except psycopg2.Error:
+				broken = True
 		raise
 	finally:
+		finished = time.perf_counter()
+		record_query(query.sql if isinstance(query, Statement) else query, finished - acquired, acquired - started, failed)
 		if cursor:
-			cursor.close()
+			try:
+				cursor.close()
+			except psycopg2.Error:
+				pass
 		if connection:
-			connection.close()
+			pool.putconn(connection, discard=broken or bool(connection.closed))
 
-__all__ = ['get_db_connection', 'execute_query']
+__all__ = ['get_db_connection', 'get_pool', 'get_pool_stats', 'get_query_count', 'execute_query', 'statement', 'PoolTimeout']
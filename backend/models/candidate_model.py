@@ -1,58 +1,115 @@
-from models import execute_query
+from models import execute_query, statement
+from models.result_model import Result
+from utils.cache import invalidate_candidate_list, candidate_list_cache
+
+_GET_ALL = statement('candidate_get_all', """
+	SELECT c.id, c.name, c.party, c.position, c.user_id, c.description, c.is_active,
+		   c.dob, c.gender, c.profile_pic,
+		   u.name as user_name, u.email
+	FROM candidates c
+	LEFT JOIN users u ON c.user_id = u.id
+	WHERE c.is_active = true
+	ORDER BY c.name
+""")
+_ACTIVE_IDS = statement('candidate_active_ids', "SELECT id FROM candidates WHERE is_active = true")
+_GET_BY_ID = statement('candidate_get_by_id', "SELECT * FROM candidates WHERE id = %s")
+_GET_BY_USER_ID = statement('candidate_get_by_user_id', """
+	SELECT c.id, c.name, c.party, c.position, c.user_id, c.description, c.is_active,
+		   c.dob, c.gender, c.profile_pic, c.created_at,
+		   u.name as user_name, u.email,
+		   COALESCE(t.count, 0) as vote_count
+	FROM candidates c
+	LEFT JOIN users u ON c.user_id = u.id
+	LEFT JOIN vote_tallies t ON t.candidate_id = c.id AND t.vote_date = CURRENT_DATE
+	WHERE c.user_id = %s
+""")
+_STATUS_BY_USER = statement('candidate_status_by_user', "SELECT id, is_active FROM candidates WHERE user_id = %s")
+_OWNER_NAME = statement('candidate_owner_name', "SELECT name FROM users WHERE id = %s")
+_CREATE_FROM_USER = statement('candidate_create_from_user', """
+	INSERT INTO candidates (user_id, name, description, is_active, party, position, dob, gender, profile_pic)
+	VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+	RETURNING id
+""")
+_CREATE = statement('candidate_create', """
+	INSERT INTO candidates (name, party, position, is_active)
+	VALUES (%s, %s, %s, %s)
+	RETURNING id
+""")
+_UPDATE = statement('candidate_update', """
+	UPDATE candidates
+	SET name = %s, party = %s, position = %s
+	WHERE id = %s
+""")
+_DELETE = statement('candidate_delete', "DELETE FROM candidates WHERE id = %s")
+_VOTE_COUNT = statement('candidate_vote_count', """
+	SELECT COALESCE(t.count, 0) AS vote_count
+	FROM candidates c
+	LEFT JOIN vote_tallies t ON t.candidate_id = c.id AND t.vote_date = CURRENT_DATE
+	WHERE c.user_id = %s
+""")
+_CLEAR_TODAYS_VOTES = statement('candidate_clear_todays_votes', """
+	WITH deleted_votes AS (
+		DELETE FROM votes WHERE candidate_id = %s AND vote_date = CURRENT_DATE
+	), cleared AS (
+		DELETE FROM vote_tallies WHERE candidate_id = %s AND vote_date = CURRENT_DATE
+	)
+	SELECT pg_notify('vote_tallies', json_build_object(
+		'candidate_id', %s::int, 'vote_date', CURRENT_DATE, 'vote_count', 0
+	)::text)
+""")
+_DEACTIVATE = statement('candidate_deactivate', "UPDATE candidates SET is_active = false WHERE user_id = %s")
+_UPDATE_PROFILE_PIC = statement('candidate_update_profile_pic', "UPDATE candidates SET profile_pic = %s WHERE user_id = %s RETURNING id")
+
+
+def _candidates_changed(candidacy=False):
+	"""Drop views derived from candidates: the cached public list, and after candidacy changes
+	(apply, revoke, reactivate, create, delete) today's results snapshot. Detail and picture
+	edits leave the snapshot alone: after voting closes it is the finalized result.
+	"""
+	invalidate_candidate_list()
+	if candidacy:
+		Result.invalidate_snapshot()
 
 
 class Candidate:
 	@staticmethod
 	def get_all():
 		"""Get all active candidates WITHOUT vote counts (for public view)"""
-		query = """
-			SELECT c.id, c.name, c.party, c.position, c.user_id, c.description, c.is_active,
-				   c.dob, c.gender, c.profile_pic,
-				   u.name as user_name, u.email
-			FROM candidates c
-			LEFT JOIN users u ON c.user_id = u.id
-			WHERE c.is_active = true
-			ORDER BY c.name
-		"""
-		return execute_query(query, fetch=True)
+		return execute_query(_GET_ALL, fetch=True)
+
+	@staticmethod
+	def get_active_ids_cached():
+		"""Ids of active candidates, cached alongside the public candidate list"""
+		ids = candidate_list_cache.get('active_ids')
+		if ids is None:
+			generation = candidate_list_cache.generation
+			rows = execute_query(_ACTIVE_IDS, fetch=True) or []
+			ids = frozenset(row['id'] for row in rows)
+			candidate_list_cache.set('active_ids', ids, generation=generation)
+		return ids
 
 	@staticmethod
 	def get_by_id(candidate_id):
 		"""Get candidate by ID"""
-		query = "SELECT * FROM candidates WHERE id = %s"
-		return execute_query(query, (candidate_id,), fetch_one=True)
+		return execute_query(_GET_BY_ID, (candidate_id,), fetch_one=True)
 
 	@staticmethod
 	def get_by_user_id(user_id):
 		"""Get candidate by user ID with vote count for TODAY (daily voting)"""
-		query = """
-			SELECT c.id, c.name, c.party, c.position, c.user_id, c.description, c.is_active,
-				   c.dob, c.gender, c.profile_pic, c.created_at,
-				   u.name as user_name, u.email,
-				   COUNT(v.id) as vote_count
-			FROM candidates c
-			LEFT JOIN users u ON c.user_id = u.id
-			LEFT JOIN votes v ON c.id = v.candidate_id AND v.vote_date = CURRENT_DATE
-			WHERE c.user_id = %s
-			GROUP BY c.id, c.name, c.party, c.position, c.user_id, c.description, c.is_active,
-					 c.dob, c.gender, c.profile_pic, c.created_at, u.name, u.email
-		"""
-		return execute_query(query, (user_id,), fetch_one=True)
+		return execute_query(_GET_BY_USER_ID, (user_id,), fetch_one=True)
 
 	@staticmethod
 	def create_from_user(user_id, description, candidate_name=None, dob=None, gender=None, party='Independent', profile_pic=None):
 		"""Create a candidate from an existing user with detailed information"""
 		# Check if user is already a candidate
-		check_query = "SELECT id FROM candidates WHERE user_id = %s"
-		existing = execute_query(check_query, (user_id,), fetch_one=True)
+		existing = execute_query(_STATUS_BY_USER, (user_id,), fetch_one=True)
 
 		if existing:
 			return None  # Already a candidate
 
 		# If candidate_name not provided, get from user
 		if not candidate_name:
-			user_query = "SELECT name FROM users WHERE id = %s"
-			user = execute_query(user_query, (user_id,), fetch_one=True)
+			user = execute_query(_OWNER_NAME, (user_id,), fetch_one=True)
 
 			if not user:
 				return None
@@ -66,17 +123,12 @@ class Candidate:
 				candidate_name = 'Unknown'
 
 		# Create candidate entry with all fields
-		query = """
-			INSERT INTO candidates (user_id, name, description, is_active, party, position, dob, gender, profile_pic)
-			VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-			RETURNING id
-		"""
-
 		row = execute_query(
-			query,
+			_CREATE_FROM_USER,
 			(user_id, candidate_name, description, True, party or 'Independent', 'Candidate', dob, gender, profile_pic),
 			returning=True
 		)
+		_candidates_changed(candidacy=True)
 
 		if row is None:
 			return None
@@ -85,12 +137,8 @@ class Candidate:
 	@staticmethod
 	def create(name, party, position):
 		"""Create a new candidate (admin function)"""
-		query = """
-			INSERT INTO candidates (name, party, position, is_active)
-			VALUES (%s, %s, %s, %s)
-			RETURNING id
-		"""
-		row = execute_query(query, (name, party, position, True), returning=True)
+		row = execute_query(_CREATE, (name, party, position, True), returning=True)
+		_candidates_changed(candidacy=True)
 		if row is None:
 			return None
 		return row["id"] if isinstance(row, dict) else (row[0] if isinstance(row, (list, tuple)) else row)
@@ -98,34 +146,24 @@ class Candidate:
 	@staticmethod
 	def update(candidate_id, name, party, position):
 		"""Update a candidate"""
-		query = """
-			UPDATE candidates
-			SET name = %s, party = %s, position = %s
-			WHERE id = %s
-		"""
-		return execute_query(query, (name, party, position, candidate_id))
+		result = execute_query(_UPDATE, (name, party, position, candidate_id))
+		_candidates_changed()
+		return result
 
 	@staticmethod
 	def delete(candidate_id):
 		"""Delete a candidate"""
-		query = "DELETE FROM candidates WHERE id = %s"
-		return execute_query(query, (candidate_id,))
+		result = execute_query(_DELETE, (candidate_id,))
+		_candidates_changed(candidacy=True)
+		return result
 
 	@staticmethod
 	def get_vote_count(user_id):
 		"""Get vote count for TODAY for the candidate owned by the given user_id.
-		This counts votes where votes.candidate_id = candidates.id AND candidates.user_id = user_id
+		Reads the maintained vote_tallies row for candidates.user_id = user_id
 		AND vote_date = CURRENT_DATE (daily voting).
 		"""
-		query = (
-			"""
-			SELECT COUNT(v.id) AS vote_count
-			FROM candidates c
-			LEFT JOIN votes v ON v.candidate_id = c.id AND v.vote_date = CURRENT_DATE
-			WHERE c.user_id = %s
-			"""
-		)
-		result = execute_query(query, (user_id,), fetch_one=True)
+		result = execute_query(_VOTE_COUNT, (user_id,), fetch_one=True)
 
 		if isinstance(result, dict):
 			# RealDictRow with explicit alias
@@ -139,11 +177,10 @@ class Candidate:
 
 	@staticmethod
 	def revoke_candidacy(user_id):
-		"""Revoke (deactivate) a candidate application and delete all votes"""
+		"""Revoke (deactivate) a candidate application and delete its votes for today"""
 		try:
 			# Check if user is an active candidate
-			check_query = "SELECT id, is_active FROM candidates WHERE user_id = %s"
-			existing = execute_query(check_query, (user_id,), fetch_one=True)
+			existing = execute_query(_STATUS_BY_USER, (user_id,), fetch_one=True)
 
 			if not existing:
 				return False  # Not a candidate
@@ -161,14 +198,14 @@ class Candidate:
 			if not is_active:
 				return False  # Already inactive
 
-			# First, delete all vote records for this candidate
+			# First, delete today's votes and tally for this candidate (one statement, notifies live listeners).
+			# Past days are closed and finalized; filtering on vote_date keeps this to today's partition.
 			if candidate_id:
-				delete_votes_query = "DELETE FROM votes WHERE candidate_id = %s"
-				execute_query(delete_votes_query, (candidate_id,))
+				execute_query(_CLEAR_TODAYS_VOTES, (candidate_id, candidate_id, candidate_id))
 
-			# Then update to inactive (votes already deleted)
-			query = "UPDATE candidates SET is_active = false WHERE user_id = %s"
-			execute_query(query, (user_id,))
+			# Then update to inactive (today's votes are cleared; past days' votes stay in their results)
+			execute_query(_DEACTIVATE, (user_id,))
+			_candidates_changed(candidacy=True)
 
 			return True
 		except Exception as e:
@@ -179,8 +216,7 @@ class Candidate:
 	def reactivate_candidacy(user_id, description=None, candidate_name=None, dob=None, gender=None, party=None, profile_pic=None):
 		"""Reactivate an existing inactive candidate with optional data updates"""
 		# Check if user has an inactive candidate record
-		check_query = "SELECT id, is_active FROM candidates WHERE user_id = %s"
-		existing = execute_query(check_query, (user_id,), fetch_one=True)
+		existing = execute_query(_STATUS_BY_USER, (user_id,), fetch_one=True)
 
 		if not existing:
 			return None  # No candidate record exists
@@ -199,7 +235,8 @@ class Candidate:
 			return None  # Already active, shouldn't reactivate
 
 		# Build update query dynamically based on provided fields
-		# Votes are already deleted from revoke, so we just reactivate
+		# Revoke cleared today's votes and no votes are accepted while inactive, so today's count
+		# starts from zero; past days' votes and tallies were kept and stay in their finalized results
 		update_fields = ["is_active = true"]
 		params = []
 
@@ -229,10 +266,20 @@ class Candidate:
 
 		params.append(user_id)
 		
+		# The column list varies per call, so this one is not a registered statement
 		query = f"UPDATE candidates SET {', '.join(update_fields)} WHERE user_id = %s"
 		execute_query(query, tuple(params))
+		_candidates_changed(candidacy=True)
 
 		return candidate_id
 
+	@staticmethod
+	def update_profile_pic(user_id, profile_pic):
+		"""Set the profile picture of the user's candidate record (if any). Returns True if a row changed."""
+		updated = execute_query(_UPDATE_PROFILE_PIC, (profile_pic, user_id), returning=True)
+		if updated:
+			_candidates_changed()
+		return bool(updated)
+
 __all__ = ["Candidate"]
 
@@ -0,0 +1,255 @@
+"""
+Process-wide PostgreSQL connection pool used by models.execute_query
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+
+
+class PoolTimeout(Exception):
+	"""Raised when no connection becomes available before the pool timeout"""
+
+
+class ConnectionPool:
+	"""Thread-safe, fork-safe pool of psycopg2 connections.
+
+	- up to max_size connections are kept open and reused (LIFO)
+	- up to max_overflow extra connections are opened under bursts and closed on return
+	- connections older than max_lifetime are recycled on return/checkout
+	- connections idle longer than ping_interval are health-checked before reuse
+	- callers wait at most `timeout` seconds for a free connection
+	"""
+
+	def __init__(self, connect, min_size=1, max_size=10, max_overflow=0, timeout=10.0,
+				 max_lifetime=1800.0, ping_interval=30.0):
+		self._connect = connect
+		self._min_size = max(0, min(min_size, max_size))
+		self._max_size = max(1, max_size)
+		self._max_overflow = max(0, max_overflow)
+		self._timeout = timeout
+		self._max_lifetime = max_lifetime
+		self._ping_interval = ping_interval
+		self._inherited = []
+		self._reset_state()
+
+		# Connections opened before a fork share their sockets with the parent,
+		# so the child must start with an empty pool
+		if hasattr(os, 'register_at_fork'):
+			os.register_at_fork(after_in_child=self._after_fork)
+
+		for _ in range(self._min_size):
+			with self._lock:
+				self._size += 1
+			try:
+				conn = self._open()
+			except Exception:
+				with self._lock:
+					self._size -= 1
+				break
+			with self._lock:
+				self._idle.append(conn)
+
+	def _reset_state(self):
+		self._lock = threading.Condition()
+		self._idle = deque()
+		self._meta = {}  # id(conn) -> {'created': ts, 'last_used': ts, 'info': {}}
+		self._size = 0
+		self._in_use = 0
+		self._counters = {
+			'checkouts': 0,
+			'waits': 0,
+			'wait_time_total': 0.0,
+			'wait_time_max': 0.0,
+			'timeouts': 0,
+			'created': 0,
+			'recycled': 0,
+			'discarded': 0,
+			'overflow_peak': 0,
+		}
+
+	def _after_fork(self):
+		# Never close inherited connections: PQfinish would terminate the parent's
+		# session over the shared socket. Keep references so they are never finalized.
+		self._inherited.extend(self._idle)
+		self._reset_state()
+
+	def _open(self):
+		conn = self._connect()
+		now = time.monotonic()
+		with self._lock:
+			self._meta[id(conn)] = {'created': now, 'last_used': now, 'info': {}}
+			self._counters['created'] += 1
+		return conn
+
+	def _close(self, conn):
+		with self._lock:
+			self._meta.pop(id(conn), None)
+		try:
+			conn.close()
+		except Exception:
+			pass
+
+	def _is_expired(self, conn, now):
+		meta = self._meta.get(id(conn))
+		return meta is None or (self._max_lifetime and now - meta['created'] > self._max_lifetime)
+
+	def _is_healthy(self, conn, now):
+		if conn.closed:
+			return False
+		meta = self._meta.get(id(conn))
+		if meta is None or not self._ping_interval or now - meta['last_used'] < self._ping_interval:
+			return True
+		try:
+			cursor = conn.cursor()
+			cursor.execute("SELECT 1")
+			cursor.close()
+			conn.rollback()
+			return True
+		except psycopg2.Error:
+			return False
+
+	def getconn(self):
+		"""Check out a connection, waiting up to the pool timeout"""
+		start = time.monotonic()
+		deadline = start + self._timeout
+		waited = False
+		conn = None
+		with self._lock:
+			while True:
+				if self._idle:
+					conn = self._idle.pop()
+					break
+				if self._size < self._max_size + self._max_overflow:
+					self._size += 1
+					break
+				remaining = deadline - time.monotonic()
+				if remaining <= 0:
+					self._counters['timeouts'] += 1
+					raise PoolTimeout(
+						f"Timed out after {self._timeout}s waiting for a database connection "
+						f"(size={self._size}, in_use={self._in_use})"
+					)
+				waited = True
+				self._lock.wait(remaining)
+
+			self._in_use += 1
+			wait_time = time.monotonic() - start
+			self._counters['checkouts'] += 1
+			if waited:
+				self._counters['waits'] += 1
+			self._counters['wait_time_total'] += wait_time
+			self._counters['wait_time_max'] = max(self._counters['wait_time_max'], wait_time)
+			overflow = self._size - self._max_size
+			if overflow > self._counters['overflow_peak']:
+				self._counters['overflow_peak'] = overflow
+
+		try:
+			now = time.monotonic()
+			if conn is not None and (self._is_expired(conn, now) or not self._is_healthy(conn, now)):
+				self._close(conn)
+				with self._lock:
+					self._counters['recycled'] += 1
+				conn = None
+			if conn is None:
+				conn = self._open()
+		except Exception:
+			with self._lock:
+				self._size -= 1
+				self._in_use -= 1
+				self._lock.notify()
+			raise
+		return conn
+
+	def putconn(self, conn, discard=False):
+		"""Return a connection to the pool; broken or expired connections are closed"""
+		if id(conn) not in self._meta:
+			# Checked out before a fork: it belongs to the parent process
+			self._inherited.append(conn)
+			return
+
+		if not discard and not conn.closed:
+			try:
+				# Never hand out a connection with an open transaction
+				if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+					conn.rollback()
+			except psycopg2.Error:
+				discard = True
+
+		now = time.monotonic()
+		with self._lock:
+			self._in_use -= 1
+			if discard or conn.closed:
+				self._counters['discarded'] += 1
+				keep = False
+			elif self._size > self._max_size:
+				keep = False  # overflow connection
+			elif self._is_expired(conn, now):
+				self._counters['recycled'] += 1
+				keep = False
+			else:
+				keep = True
+
+			if keep:
+				self._meta[id(conn)]['last_used'] = now
+				self._idle.append(conn)
+			else:
+				self._size -= 1
+			self._lock.notify()
+
+		if not keep:
+			self._close(conn)
+
+	def info(self, conn):
+		"""Dict for state tied to one pooled connection's session (e.g. prepared statements).
+		It starts empty for every new connection and is dropped when the connection is closed.
+		None for connections the pool does not own (checked out before a fork).
+		"""
+		meta = self._meta.get(id(conn))
+		return meta['info'] if meta is not None else None
+
+	@contextmanager
+	def connection(self):
+		"""Context manager that checks out a connection and always returns it"""
+		conn = self.getconn()
+		try:
+			yield conn
+		except psycopg2.Error:
+			self.putconn(conn, discard=bool(conn.closed))
+			raise
+		except BaseException:
+			self.putconn(conn)
+			raise
+		else:
+			self.putconn(conn)
+
+	def close_all(self):
+		"""Close every idle connection (checked-out ones are closed when returned)"""
+		with self._lock:
+			idle = list(self._idle)
+			self._idle.clear()
+			self._size -= len(idle)
+		for conn in idle:
+			self._close(conn)
+
+	def stats(self):
+		"""Snapshot of pool gauges and cumulative counters"""
+		with self._lock:
+			counters = dict(self._counters)
+			checkouts = counters['checkouts']
+			return {
+				'size': self._size,
+				'idle': len(self._idle),
+				'in_use': self._in_use,
+				'overflow': max(0, self._size - self._max_size),
+				'max_size': self._max_size,
+				'max_overflow': self._max_overflow,
+				**counters,
+				'wait_time_avg': (counters['wait_time_total'] / checkouts) if checkouts else 0.0,
+			}
+
+__all__ = ['ConnectionPool', 'PoolTimeout']
@@ -0,0 +1,113 @@
+"""
+SQL instrumentation for execute_query: per-request query stats and a sampled slow-query log
+"""
+import contextvars
+import functools
+import json
+import logging
+import random
+import re
+import threading
+from config import Config
+from utils.metrics import DB_POOL_ACQUIRE, DB_QUERY_LATENCY
+
+slow_query_logger = logging.getLogger('voting.slow_query')
+if Config.SLOW_QUERY_LOG_FILE and not slow_query_logger.handlers:
+	_handler = logging.FileHandler(Config.SLOW_QUERY_LOG_FILE)
+	_handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+	slow_query_logger.addHandler(_handler)
+	slow_query_logger.setLevel(logging.INFO)
+	slow_query_logger.propagate = False
+
+
+class QueryStats:
+	"""Statements executed while handling one request"""
+	__slots__ = ('count', 'db_time', 'acquire_time', 'slowest_time', 'slowest_sql')
+
+	def __init__(self):
+		self.count = 0
+		self.db_time = 0.0
+		self.acquire_time = 0.0
+		self.slowest_time = 0.0
+		self.slowest_sql = None
+
+
+_current_stats = contextvars.ContextVar('query_stats', default=None)
+_query_count = 0
+_query_count_lock = threading.Lock()
+
+
+def start_request():
+	"""Begin collecting query stats for the current request"""
+	_current_stats.set(QueryStats())
+
+
+def end_request():
+	"""Stop collecting and return the current request's QueryStats (or None)"""
+	stats = _current_stats.get()
+	_current_stats.set(None)
+	return stats
+
+
+def get_query_count():
+	"""Total statements executed through execute_query by this process"""
+	return _query_count
+
+
+_WHITESPACE = re.compile(r'\s+')
+_COMMENTS = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDERS = re.compile(r'%s|%\(\w+\)s|\$\d+')
+_IN_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(sql):
+	"""Normalize SQL so statements differing only in literals/parameters group together"""
+	text = _COMMENTS.sub(' ', str(sql))
+	text = _STRINGS.sub('?', text)
+	text = _PLACEHOLDERS.sub('?', text)
+	text = _NUMBERS.sub('?', text)
+	text = _IN_LISTS.sub('(...)', text)
+	return _WHITESPACE.sub(' ', text).strip()
+
+
+def record_query(sql, elapsed, acquire_time, failed=False):
+	"""Account one execute_query call (times in seconds)"""
+	global _query_count
+	with _query_count_lock:
+		_query_count += 1
+
+	DB_QUERY_LATENCY.observe(elapsed)
+	DB_POOL_ACQUIRE.observe(acquire_time)
+
+	stats = _current_stats.get()
+	if stats is not None:
+		stats.count += 1
+		stats.db_time += elapsed
+		stats.acquire_time += acquire_time
+		if elapsed >= stats.slowest_time:
+			stats.slowest_time = elapsed
+			stats.slowest_sql = sql
+
+	elapsed_ms = elapsed * 1000
+	if elapsed_ms >= Config.SLOW_QUERY_MS and random.random() < Config.SLOW_QUERY_SAMPLE_RATE:
+		slow_query_logger.warning(json.dumps({
+			'event': 'slow_query',
+			'duration_ms': round(elapsed_ms, 2),
+			'acquire_ms': round(acquire_time * 1000, 2),
+			'failed': failed,
+			'fingerprint': fingerprint(sql)
+		}))
+
+
+def server_timing_header(stats):
+	"""Format QueryStats as a Server-Timing header value"""
+	return ', '.join([
+		f'db;dur={stats.db_time * 1000:.2f};desc="{stats.count} queries"',
+		f'db-acquire;dur={stats.acquire_time * 1000:.2f}',
+		f'db-slowest;dur={stats.slowest_time * 1000:.2f}'
+	])
+
+__all__ = ['start_request', 'end_request', 'get_query_count', 'fingerprint', 'record_query', 'server_timing_header']
@@ -0,0 +1,294 @@
+from models import execute_query, statement
+from psycopg2.extras import Json
+
+
+HISTORY_MAX_DAYS = 366
+
+# All candidates (including inactive, to detect a revoked winner) and the active ones, with today's counts
+_COMPUTE_ALL = statement('result_compute_all', """
+	SELECT c.id, c.name, c.party, c.position, c.description, c.profile_pic,
+		   COALESCE(t.count, 0) as vote_count, c.is_active
+	FROM candidates c
+	LEFT JOIN vote_tallies t ON t.candidate_id = c.id AND t.vote_date = CURRENT_DATE
+	ORDER BY vote_count DESC, c.name ASC
+""")
+_COMPUTE_ACTIVE = statement('result_compute_active', """
+	SELECT c.id, c.name, c.party, c.position, c.description, c.profile_pic,
+		   COALESCE(t.count, 0) as vote_count
+	FROM candidates c
+	LEFT JOIN vote_tallies t ON t.candidate_id = c.id AND t.vote_date = CURRENT_DATE
+	WHERE c.is_active = true
+	ORDER BY vote_count DESC, c.name ASC
+""")
+_SNAPSHOT_TODAY = statement('result_snapshot_today', "SELECT snapshot FROM results WHERE result_date = CURRENT_DATE AND snapshot IS NOT NULL")
+_FINALIZE = statement('result_finalize', """
+	INSERT INTO results (result_date, is_finalized, winner_id, finalized_at, snapshot)
+	VALUES (CURRENT_DATE, TRUE, %s, CURRENT_TIMESTAMP, %s)
+	ON CONFLICT (result_date) DO NOTHING
+	RETURNING id
+""")
+_CURRENT_DATE = statement('result_current_date', "SELECT CURRENT_DATE AS today")
+_SNAPSHOT_FOR_DATE = statement('result_snapshot_for_date', "SELECT snapshot FROM results WHERE result_date = %s AND snapshot IS NOT NULL")
+_ARCHIVE_TALLIES = statement('result_archive_tallies', """
+	SELECT c.id, c.name, c.party, c.position, c.description, c.profile_pic, t.count AS vote_count
+	FROM vote_tallies t
+	JOIN candidates c ON c.id = t.candidate_id
+	WHERE t.vote_date = %s AND t.count > 0
+	ORDER BY t.count DESC, c.name ASC
+""")
+# Only days before CURRENT_DATE are stored; stored snapshots are never rewritten
+_ARCHIVE = statement('result_archive', """
+	INSERT INTO results (result_date, is_finalized, winner_id, finalized_at, snapshot)
+	SELECT %s, TRUE, %s, CURRENT_TIMESTAMP, %s
+	WHERE %s::date < CURRENT_DATE
+	ON CONFLICT (result_date) DO NOTHING
+	RETURNING id
+""")
+_UNARCHIVED_DAYS = statement('result_unarchived_days', """
+	SELECT DISTINCT t.vote_date
+	FROM vote_tallies t
+	WHERE t.vote_date BETWEEN %s AND %s AND t.vote_date < CURRENT_DATE AND t.count > 0
+	  AND NOT EXISTS (SELECT 1 FROM results r WHERE r.result_date = t.vote_date AND r.snapshot IS NOT NULL)
+""")
+_HISTORY = statement('result_history', """
+	SELECT result_date,
+		   (snapshot->>'total_votes')::int AS total_votes,
+		   (snapshot->>'total_candidates')::int AS total_candidates,
+		   snapshot->'winner' AS winner
+	FROM results
+	WHERE result_date BETWEEN %s AND %s AND snapshot IS NOT NULL
+	ORDER BY result_date DESC
+""")
+_INVALIDATE_TODAY = statement('result_invalidate_today', "DELETE FROM results WHERE result_date = CURRENT_DATE")
+
+
+def _pick_winner(formatted_results):
+	"""Winner of results sorted by vote_count descending (ties broken alphabetically), or None"""
+	if not formatted_results:
+		return None
+	# Get candidates with highest vote count
+	max_votes = formatted_results[0]['vote_count']
+	top_candidates = [c for c in formatted_results if c['vote_count'] == max_votes]
+
+	if len(top_candidates) == 1:
+		# Clear winner
+		return top_candidates[0]
+
+	# TIE-BREAKING RULES:
+	# 1. Alphabetical order by name (earliest alphabetically wins)
+	top_candidates.sort(key=lambda x: x['name'].lower())
+	winner = top_candidates[0]
+	winner['tie_broken'] = True
+	winner['tie_breaking_method'] = 'alphabetical'
+	winner['tied_candidates'] = [c['name'] for c in top_candidates]
+	return winner
+
+
+class Result:
+	@staticmethod
+	def compute(is_finalized):
+		"""Compute today's results payload (vote counts, winner with tie-breaking, status message)"""
+		# Get ALL candidates (including inactive) to check if winner revoked
+		all_results = execute_query(_COMPUTE_ALL, fetch=True)
+
+		# Get all candidates with their vote counts (only active for display)
+		results = execute_query(_COMPUTE_ACTIVE, fetch=True)
+
+		# Type guard: ensure results is a list/tuple, not None or int
+		if not results or not isinstance(results, (list, tuple)):
+			return {
+				'results': [],
+				'total_votes': 0,
+				'total_candidates': 0,
+				'is_finalized': is_finalized,
+				'winner': None
+			}
+
+		# Format results
+		formatted_results = []
+		total_votes = 0
+
+		for result in results:
+			# Type guard: ensure result is tuple or dict with proper length
+			if isinstance(result, tuple) and len(result) >= 7:
+				vote_count = int(result[6]) if result[6] is not None else 0
+				formatted_results.append({
+					'id': result[0],
+					'name': result[1],
+					'party': result[2] if result[2] else 'Independent',
+					'position': result[3] if result[3] else 'Candidate',
+					'description': result[4] if result[4] else '',
+					'profile_pic': result[5] if result[5] else None,
+					'vote_count': vote_count
+				})
+				total_votes += vote_count
+			elif isinstance(result, dict):
+				vote_count = int(result.get('vote_count', 0))
+				formatted_results.append({
+					'id': result.get('id'),
+					'name': result.get('name'),
+					'party': result.get('party', 'Independent'),
+					'position': result.get('position', 'Candidate'),
+					'description': result.get('description', ''),
+					'profile_pic': result.get('profile_pic'),
+					'vote_count': vote_count
+				})
+				total_votes += vote_count
+
+		# Determine winner with tie-breaking if voting is finalized
+		winner = None
+		previous_winner_revoked = False
+		revoked_winner_info = None
+
+		if is_finalized:
+			# Check if the candidate with most votes (from ALL candidates) has revoked
+			if all_results and isinstance(all_results, (list, tuple)) and len(all_results) > 0:
+				# Get the top candidate from all results (including inactive)
+				top_all = all_results[0]
+				if isinstance(top_all, tuple) and len(top_all) >= 8:
+					top_is_active = top_all[7]
+					top_vote_count = int(top_all[6]) if top_all[6] is not None else 0
+
+					# If top candidate is inactive and has votes, they revoked after winning
+					if not top_is_active and top_vote_count > 0:
+						# Check if they would have been the winner (compare with current active candidates)
+						if formatted_results and top_vote_count >= formatted_results[0]['vote_count']:
+							previous_winner_revoked = True
+							revoked_winner_info = {
+								'name': top_all[1],
+								'vote_count': top_vote_count,
+								'party': top_all[2] if top_all[2] else 'Independent'
+							}
+
+			# Determine winner from active candidates only
+			winner = _pick_winner(formatted_results)
+
+		# Build voting status message
+		if is_finalized:
+			if previous_winner_revoked and revoked_winner_info:
+				voting_status = f"Voting has ended for today. Original winner {revoked_winner_info['name']} ({revoked_winner_info['vote_count']} votes) withdrew from candidacy. Winner recalculated from remaining candidates."
+			else:
+				voting_status = 'Voting has ended for today (8:00 PM IST). Results are final. Come back tomorrow at 8:00 AM IST for a new vote!'
+		else:
+			voting_status = 'Voting is currently in progress. Vote now before 8:00 PM IST!'
+
+		return {
+			'results': formatted_results,
+			'total_votes': total_votes,
+			'total_candidates': len(formatted_results),
+			'is_finalized': is_finalized,
+			'winner': winner,
+			'voting_status': voting_status,
+			'previous_winner_revoked': previous_winner_revoked,
+			'revoked_winner_info': revoked_winner_info
+		}
+
+
+	@staticmethod
+	def get_snapshot():
+		"""Get today's frozen results payload, or None if today has not been finalized"""
+		row = execute_query(_SNAPSHOT_TODAY, fetch_one=True)
+		if isinstance(row, dict):
+			return row.get('snapshot')
+		return None
+
+	@staticmethod
+	def finalize():
+		"""Compute today's final results once and persist them as the day's snapshot.
+		If another worker finalized first, its snapshot is returned instead.
+		"""
+		payload = Result.compute(True)
+		winner = payload.get('winner')
+		row = execute_query(_FINALIZE, (winner.get('id') if winner else None, Json(payload)), returning=True)
+		if row is None:
+			return Result.get_snapshot() or payload
+		return payload
+
+	@staticmethod
+	def current_date():
+		"""Today according to the database: votes, tallies and snapshots are all dated with CURRENT_DATE"""
+		return execute_query(_CURRENT_DATE, fetch_one=True)['today']
+
+	@staticmethod
+	def get_for_date(result_date):
+		"""Final results of a past day: the stored snapshot (primary-key lookup on result_date).
+		A day that closed without being finalized is archived on first request from its
+		vote_tallies rows. Returns None if nobody voted that day.
+		"""
+		row = execute_query(_SNAPSHOT_FOR_DATE, (result_date,), fetch_one=True)
+		if row is not None:
+			return row['snapshot']
+		return Result.archive(result_date)
+
+	@staticmethod
+	def archive(result_date):
+		"""Build a closed day's snapshot from vote_tallies and store it (days before CURRENT_DATE only;
+		stored snapshots are never rewritten). Candidates are listed if they received votes that day.
+		Returns the payload, or None if the day has no votes. A day that is not over yet in database
+		time (CURRENT_DATE, the clock votes are dated with) is not stored and comes back with
+		is_finalized False.
+		"""
+		rows = execute_query(_ARCHIVE_TALLIES, (result_date,), fetch=True) or []
+		if not rows:
+			return None
+
+		formatted_results = [{
+			'id': row['id'],
+			'name': row['name'],
+			'party': row['party'] or 'Independent',
+			'position': row['position'] or 'Candidate',
+			'description': row['description'] or '',
+			'profile_pic': row['profile_pic'],
+			'vote_count': int(row['vote_count'])
+		} for row in rows]
+		winner = _pick_winner(formatted_results)
+		payload = {
+			'results': formatted_results,
+			'total_votes': sum(c['vote_count'] for c in formatted_results),
+			'total_candidates': len(formatted_results),
+			'is_finalized': True,
+			'winner': winner,
+			'voting_status': f"Final results for {result_date.isoformat()}",
+			'previous_winner_revoked': False,
+			'revoked_winner_info': None
+		}
+
+		params = (result_date, winner['id'] if winner else None, Json(payload), result_date)
+		if execute_query(_ARCHIVE, params, returning=True) is None:
+			# Finalized concurrently (keep the stored snapshot), or still today in database time
+			stored = execute_query(_SNAPSHOT_FOR_DATE, (result_date,), fetch_one=True)
+			if stored is not None:
+				return stored['snapshot']
+			return dict(payload, is_finalized=False, voting_status=f"Results for {result_date.isoformat()} (not final yet)")
+		return payload
+
+	@staticmethod
+	def get_history(start_date, end_date):
+		"""One summary per closed day in [start_date, end_date], newest first:
+		{result_date, total_votes, total_candidates, winner}. Days with votes that were never
+		finalized are archived first, so every listed day is backed by a stored snapshot.
+		"""
+		for row in execute_query(_UNARCHIVED_DAYS, (start_date, end_date), fetch=True) or []:
+			Result.archive(row['vote_date'])
+
+		rows = execute_query(_HISTORY, (start_date, end_date), fetch=True) or []
+		days = []
+		for row in rows:
+			winner = row['winner']
+			days.append({
+				'result_date': row['result_date'].isoformat(),
+				'total_votes': row['total_votes'] or 0,
+				'total_candidates': row['total_candidates'] or 0,
+				'winner': {
+					key: winner.get(key) for key in ('id', 'name', 'party', 'profile_pic', 'vote_count', 'tie_broken')
+					if key in winner
+				} if winner else None
+			})
+		return days
+
+	@staticmethod
+	def invalidate_snapshot():
+		"""Drop today's snapshot (after candidacy changes); earlier days are never touched"""
+		return execute_query(_INVALIDATE_TODAY)
+
+__all__ = ["Result"]
@@ -0,0 +1,84 @@
+"""
+Optional columns of the live database schema, detected once per process
+
+Older databases may lack columns added by later migrations (users.dob,
+users.gender, users.profile_pic). Instead of trying a query and falling
+back when it fails, models ask `schema` which optional columns exist and
+use query variants built for exactly those. Detection is one catalog
+query, run on first use (or at startup, see gunicorn.conf.py) and cached.
+
+After a migration adds or drops an optional column, call schema.refresh():
+gunicorn does it on reload (kill -HUP <master pid>), and models call it
+themselves when a statement hits a column that no longer exists.
+Callbacks registered with schema.on_refresh rebuild their query variants.
+"""
+import threading
+from models import execute_query
+
+# table -> optional columns the models adapt to
+OPTIONAL_COLUMNS = {
+	'users': ('dob', 'gender', 'profile_pic'),
+}
+
+
+class SchemaCapabilities:
+	"""Cached map of which optional columns exist, with refresh callbacks"""
+
+	def __init__(self, optional_columns):
+		self._optional = optional_columns
+		self._columns = None  # table -> frozenset of present optional columns
+		self._callbacks = []
+		self._lock = threading.RLock()
+
+	def _detect(self):
+		rows = execute_query(
+			"""
+			SELECT table_name, column_name
+			FROM information_schema.columns
+			WHERE table_schema = current_schema() AND table_name = ANY(%s) AND column_name = ANY(%s)
+			""",
+			(list(self._optional), sorted({c for columns in self._optional.values() for c in columns})),
+			fetch=True
+		) or []
+		present = {(row['table_name'], row['column_name']) for row in rows}
+		return {
+			table: frozenset(c for c in columns if (table, c) in present)
+			for table, columns in self._optional.items()
+		}
+
+	def refresh(self):
+		"""Detect the optional columns again and rebuild the registered query variants.
+		Returns {table: frozenset of present optional columns}.
+		"""
+		with self._lock:
+			self._columns = self._detect()
+			for callback in self._callbacks:
+				callback(self)
+			return dict(self._columns)
+
+	def columns(self, table):
+		"""Optional columns of table that exist (detected on first use)"""
+		columns = self._columns
+		if columns is None:
+			with self._lock:
+				if self._columns is None:
+					self.refresh()
+				columns = self._columns
+		return columns.get(table, frozenset())
+
+	def has(self, table, column):
+		return column in self.columns(table)
+
+	def on_refresh(self, callback):
+		"""Call callback(schema) after every detection (e.g. to rebuild query variants).
+		Runs right away if the schema was already detected.
+		"""
+		with self._lock:
+			self._callbacks.append(callback)
+			if self._columns is not None:
+				callback(self)
+
+
+schema = SchemaCapabilities(OPTIONAL_COLUMNS)
+
+__all__ = ['OPTIONAL_COLUMNS', 'SchemaCapabilities', 'schema']
@@ -0,0 +1,118 @@
+"""
+Registry of the model queries, executed as server-side prepared statements
+
+Each query of User, Candidate, Vote, Result and Stats is declared once, at import time:
+
+	_FIND_BY_EMAIL = statement('user_find_by_email', "SELECT * FROM users WHERE email = %s")
+	execute_query(_FIND_BY_EMAIL, (email,), fetch_one=True)
+
+execute_query PREPAREs a statement the first time it runs on a pooled
+connection and EXECUTEs it from then on, so Postgres parses and plans it
+once per connection instead of on every call (after five executions the
+server switches to a cached generic plan when it is not worse than the
+custom ones). The names prepared on a connection are kept in the pool's
+per-connection info, which starts empty for every new connection:
+statements are prepared again after a reconnect, recycle or fork. When
+the server lost them anyway (e.g. DISCARD ALL by a pooler) or a schema
+change altered a statement's result columns, the statement is prepared
+again and retried once.
+
+Set DB_PREPARED_STATEMENTS=false behind a transaction-pooling proxy
+(pgbouncer pool_mode=transaction): statements then run as plain queries.
+"""
+import re
+import threading
+
+import psycopg2
+
+_NAME = re.compile(r'^[a-z_][a-z0-9_]*$')
+_PLACEHOLDER = re.compile(r'%(%|s)((?:::\w+(?:\[\])?)?)')
+
+# Errors raised before a statement runs, after which it is safe to prepare it again and retry:
+# the prepared statement is gone (26000), or its result columns changed (0A000,
+# "cached plan must not change result type", e.g. SELECT * after ALTER TABLE ... ADD COLUMN)
+_STALE = {'26000': False, '0A000': True}  # pgcode -> DEALLOCATE the old one first
+
+
+class Statement:
+	"""A named query with %s placeholders (psycopg2 style)"""
+	__slots__ = ('name', 'sql', 'param_count', 'prepare_sql', 'execute_sql')
+
+	def __init__(self, name, sql):
+		self.name = name
+		self.sql = sql
+		# An explicit cast on a placeholder (%s::date[]) is repeated on its EXECUTE argument:
+		# psycopg2 sends literals, and e.g. ARRAY[NULL] is text[] unless cast
+		args = []
+
+		def number(match):
+			if match.group(1) == '%':
+				return '%' + match.group(2)
+			args.append('%s' + match.group(2))
+			return f"${len(args)}{match.group(2)}"
+
+		server_sql = _PLACEHOLDER.sub(number, sql)
+		self.param_count = len(args)
+		self.prepare_sql = f"PREPARE {name} AS {server_sql}"
+		self.execute_sql = f"EXECUTE {name}" + (f" ({', '.join(args)})" if args else "")
+
+	def __repr__(self):
+		return f"Statement({self.name!r})"
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def statement(name, sql):
+	"""Declare a query once and return its Statement (pass it to execute_query).
+	Declaring the same name again with different SQL is an error.
+	"""
+	if not _NAME.match(name):
+		raise ValueError(f"Invalid statement name: {name!r}")
+	with _registry_lock:
+		existing = _registry.get(name)
+		if existing is not None:
+			if existing.sql != sql:
+				raise ValueError(f"Statement {name!r} is already declared with different SQL")
+			return existing
+		stmt = _registry[name] = Statement(name, sql)
+		return stmt
+
+
+def registered():
+	"""All declared statements, by name"""
+	with _registry_lock:
+		return dict(_registry)
+
+
+def _prepare(cursor, stmt, prepared):
+	cursor.execute(stmt.prepare_sql)
+	prepared.add(stmt.name)
+
+
+def execute(cursor, stmt, params, prepared):
+	"""Run stmt on cursor's connection. prepared is the set of statement names already
+	prepared on that connection, or None to run the query unprepared.
+	"""
+	if len(params) != stmt.param_count:
+		raise ValueError(f"Statement {stmt.name!r} takes {stmt.param_count} parameter(s), got {len(params)}")
+	if prepared is None:
+		cursor.execute(stmt.sql, params)
+		return
+	if stmt.name not in prepared:
+		_prepare(cursor, stmt, prepared)
+	try:
+		cursor.execute(stmt.execute_sql, params)
+	except psycopg2.Error as e:
+		if e.pgcode not in _STALE:
+			raise
+		cursor.connection.rollback()
+		prepared.discard(stmt.name)
+		if _STALE[e.pgcode]:
+			cursor.execute(f"DEALLOCATE {stmt.name}")
+		_prepare(cursor, stmt, prepared)
+		cursor.execute(stmt.execute_sql, params)
+
+
+__all__ = ['Statement', 'statement', 'registered', 'execute']
@@ -0,0 +1,32 @@
+from models import execute_query, statement
+from utils.cache import RefreshingValue
+from config import Config
+
+_FETCH = statement('stats_fetch', """
+	SELECT
+		(SELECT COUNT(*) FROM users) AS total_voters,
+		(SELECT COUNT(*) FROM candidates WHERE is_active = TRUE) AS total_candidates,
+		(SELECT COALESCE(SUM(count), 0) FROM vote_tallies) AS total_votes
+""")
+
+
+class Stats:
+	@staticmethod
+	def fetch():
+		"""Dashboard counters in one round trip; total votes come from vote_tallies, not a scan of votes"""
+		row = execute_query(_FETCH, fetch_one=True)
+		if not row or not isinstance(row, dict):
+			return {'totalVoters': 0, 'totalCandidates': 0, 'totalVotes': 0}
+		return {
+			'totalVoters': row['total_voters'],
+			'totalCandidates': row['total_candidates'],
+			'totalVotes': int(row['total_votes'])
+		}
+
+	@staticmethod
+	def get():
+		"""Cached dashboard counters (refreshed in the background once older than STATS_CACHE_TTL)"""
+		return dashboard_stats.get()
+
+
+dashboard_stats = RefreshingValue(Stats.fetch, ttl=Config.STATS_CACHE_TTL, max_stale=Config.STATS_MAX_STALE, name='dashboard_stats')
@@ -1,18 +1,64 @@
-from models import execute_query
-from werkzeug.security import generate_password_hash, check_password_hash
+from psycopg2 import DataError
+from psycopg2.errors import UndefinedColumn
+from models import execute_query, statement
+from models.schema import schema
+from utils.cache import invalidate_candidate_list, invalidate_user, user_cache
+from utils.passwords import password_hasher
+
+_CREATE = statement('user_create', """
+	INSERT INTO users (name, email, password, role, status)
+	VALUES (%s, %s, %s, %s, 'active')
+	RETURNING id
+""")
+_FIND_BY_EMAIL = statement('user_find_by_email', "SELECT * FROM users WHERE email = %s")
+_REHASH_PASSWORD = statement('user_rehash_password', "UPDATE users SET password = %s WHERE id = %s AND password = %s")
+_UPDATE_STATUS = statement('user_update_status', "UPDATE users SET status = %s WHERE id = %s")
+_UPDATE_PROFILE_PIC = statement('user_update_profile_pic', "UPDATE users SET profile_pic = %s WHERE id = %s")
+
+# Statements that depend on optional users columns (models.schema), rebuilt on every detection
+_variants = {}
+
+
+def _build_variants(capabilities):
+	columns = capabilities.columns('users')
+	if 'profile_pic' in columns:
+		_variants['find_by_id'] = statement('user_find_by_id', "SELECT id, name, email, role, status, profile_pic FROM users WHERE id = %s")
+	else:
+		_variants['find_by_id'] = statement('user_find_by_id_basic', "SELECT id, name, email, role, status FROM users WHERE id = %s")
+
+	# One UPDATE for all profile fields; None keeps the current value
+	fields = ['name'] + [c for c in ('dob', 'gender') if c in columns]
+	_variants['update_profile'] = (fields, statement(
+		'user_update_profile_' + '_'.join(fields),
+		"UPDATE users SET " + ', '.join(f"{f} = COALESCE(%s, {f})" for f in fields) + " WHERE id = %s"
+	))
+
+
+schema.on_refresh(_build_variants)
+
+
+def _variant(key):
+	schema.columns('users')  # detects the schema (and builds the variants) on first use
+	return _variants[key]
+
+
+def _execute_variant(build, **kwargs):
+	"""execute_query(*build(), ...) for a schema-dependent statement. If a detected column
+	was dropped since, detect the schema again and retry once with the new variant.
+	"""
+	try:
+		return execute_query(*build(), **kwargs)
+	except UndefinedColumn:
+		schema.refresh()
+		return execute_query(*build(), **kwargs)
 
 
 class User:
 	@staticmethod
 	def create(name, email, password, role='user'):
-		"""Create a new user"""
-		hashed_password = generate_password_hash(password)
-		query = """
-			INSERT INTO users (name, email, password, role, status)
-			VALUES (%s, %s, %s, %s, 'active')
-			RETURNING id
-		"""
-		row = execute_query(query, (name, email, hashed_password, role), returning=True)
+		"""Create a new user (may raise utils.passwords.PasswordHasherBusy)"""
+		hashed_password = password_hasher.hash(password)
+		row = execute_query(_CREATE, (name, email, hashed_password, role), returning=True)
 		if row is None:
 			return None
 		return row["id"] if isinstance(row, dict) else (row[0] if isinstance(row, (list, tuple)) else row)
@@ -20,73 +66,85 @@ class User:
 	@staticmethod
 	def find_by_email(email):
 		"""Find a user by email"""
-		query = "SELECT * FROM users WHERE email = %s"
-		return execute_query(query, (email,), fetch_one=True)
+		return execute_query(_FIND_BY_EMAIL, (email,), fetch_one=True)
 
 	@staticmethod
 	def find_by_id(user_id):
-		"""Find a user by ID"""
-		# Try to include profile_pic; if column doesn't exist, fall back to basic query
-		try:
-			query = "SELECT id, name, email, role, status, profile_pic FROM users WHERE id = %s"
-			return execute_query(query, (user_id,), fetch_one=True)
-		except Exception as e:
-			# If profile_pic column doesn't exist, use basic query
-			if 'profile_pic' in str(e):
-				query = "SELECT id, name, email, role, status FROM users WHERE id = %s"
-				return execute_query(query, (user_id,), fetch_one=True)
-			raise
+		"""Find a user by ID (with profile_pic when the column exists)"""
+		return _execute_variant(lambda: (_variant('find_by_id'), (user_id,)), fetch_one=True)
+
+	@staticmethod
+	def find_by_id_cached(user_id):
+		"""Find a user by ID through the in-process user cache (bounded LRU with TTL)"""
+		user = user_cache.get(user_id)
+		if user is None:
+			generation = user_cache.generation
+			row = User.find_by_id(user_id)
+			if not row:
+				return row
+			user = dict(row)
+			user_cache.set(user_id, user, generation=generation)
+		return dict(user)
 
 	@staticmethod
 	def verify_password(stored_password, provided_password):
-		"""Verify password hash"""
-		return check_password_hash(stored_password, provided_password)
+		"""Verify password hash (may raise utils.passwords.PasswordHasherBusy)"""
+		return password_hasher.verify(stored_password, provided_password)
+
+	@staticmethod
+	def rehash_password_if_needed(user_id, stored_password, provided_password):
+		"""Re-hash a verified password when PASSWORD_HASH_METHOD has changed. Returns True if upgraded."""
+		if not password_hasher.needs_rehash(stored_password):
+			return False
+		new_hash = password_hasher.hash(provided_password)
+		# Only replace the hash that was verified (a concurrent password change wins)
+		updated = execute_query(_REHASH_PASSWORD, (new_hash, user_id, stored_password))
+		return bool(updated)
 
 	@staticmethod
 	def update_status(user_id, status):
 		"""Update user status"""
-		query = "UPDATE users SET status = %s WHERE id = %s"
-		return execute_query(query, (status, user_id))
+		result = execute_query(_UPDATE_STATUS, (status, user_id))
+		invalidate_user(user_id)
+		return result
 
 	@staticmethod
 	def update_profile_pic(user_id, profile_path) -> bool:
 		"""Update user's profile picture path. Returns True if updated, False if column doesn't exist."""
-		try:
-			query = "UPDATE users SET profile_pic = %s WHERE id = %s"
-			execute_query(query, (profile_path, user_id))
-			return True
-		except Exception:
-			# Column may not exist; treat as non-fatal and return False
+		if not schema.has('users', 'profile_pic'):
 			return False
+		execute_query(_UPDATE_PROFILE_PIC, (profile_path, user_id))
+		invalidate_user(user_id)
+		return True
 
 	@staticmethod
 	def update_profile(user_id, name=None, dob=None, gender=None) -> dict:
-		"""Update profile fields individually with graceful fallback if columns are missing.
-		Returns a dict of persisted flags per field.
+		"""Update the given profile fields (None = unchanged) in one statement.
+		Fields whose column does not exist in this database are skipped.
+		Returns a dict of persisted flags per field (all False if the values were rejected).
 		"""
-		results = { 'name': False, 'dob': False, 'gender': False }
-
-		if name is not None:
-			try:
-				execute_query("UPDATE users SET name = %s WHERE id = %s", (name, user_id))
-				results['name'] = True
-			except Exception:
-				results['name'] = False
-
-		if dob is not None:
-			try:
-				execute_query("UPDATE users SET dob = %s WHERE id = %s", (dob, user_id))
-				results['dob'] = True
-			except Exception:
-				results['dob'] = False
-
-		if gender is not None:
-			try:
-				execute_query("UPDATE users SET gender = %s WHERE id = %s", (gender, user_id))
-				results['gender'] = True
-			except Exception:
-				results['gender'] = False
+		values = {'name': name, 'dob': dob, 'gender': gender}
+		results = {field: False for field in values}
+		used = []
 
+		def build():
+			fields, stmt = _variant('update_profile')
+			used[:] = fields
+			return stmt, tuple(values[f] for f in fields) + (user_id,)
+
+		if all(values[f] is None for f in _variant('update_profile')[0]):
+			return results
+		try:
+			updated = _execute_variant(build)
+		except DataError:
+			# e.g. a malformed date: the update is atomic, nothing was saved
+			return results
+		invalidate_user(user_id)
+		if updated:
+			if name is not None:
+				invalidate_candidate_list()  # candidate list shows the owner's user name
+			for field in used:
+				results[field] = values[field] is not None
 		return results
 
 __all__ = ['User']
@@ -1,31 +1,194 @@
-from models import execute_query
+from models import execute_query, statement
 from datetime import datetime, date
 
+_TRY_CAST = statement('vote_try_cast', """
+	WITH candidate AS (
+		SELECT id FROM candidates WHERE id = %s AND is_active = true
+	), inserted AS (
+		INSERT INTO votes (user_id, candidate_id, vote_date)
+		SELECT %s, id, CURRENT_DATE FROM candidate
+		ON CONFLICT (user_id, vote_date) DO NOTHING
+		RETURNING id, candidate_id, vote_date
+	), tallied AS (
+		INSERT INTO vote_tallies (candidate_id, vote_date, count)
+		SELECT candidate_id, vote_date, 1 FROM inserted
+		ON CONFLICT (candidate_id, vote_date) DO UPDATE SET count = vote_tallies.count + 1
+		RETURNING candidate_id, vote_date, count
+	)
+	SELECT
+		(SELECT id FROM inserted) AS vote_id,
+		EXISTS (SELECT 1 FROM candidate) AS candidate_ok,
+		(SELECT COUNT(*) FROM (
+			SELECT pg_notify('vote_tallies', json_build_object(
+				'candidate_id', candidate_id, 'vote_date', vote_date, 'vote_count', count
+			)::text) FROM tallied
+		) AS notified) AS notified
+""")
+_CAST_BATCH = statement('vote_cast_batch', """
+	WITH input AS (
+		SELECT ord, user_id, candidate_id, COALESCE(vote_date, CURRENT_DATE) AS vote_date
+		FROM unnest(%s::int[], %s::int[], %s::date[]) WITH ORDINALITY AS v(user_id, candidate_id, vote_date, ord)
+	), valid AS (
+		SELECT i.* FROM input i
+		JOIN candidates c ON c.id = i.candidate_id AND c.is_active = true
+	), first_per_user AS (
+		SELECT DISTINCT ON (user_id, vote_date) * FROM valid ORDER BY user_id, vote_date, ord
+	), inserted AS (
+		INSERT INTO votes (user_id, candidate_id, vote_date)
+		SELECT user_id, candidate_id, vote_date FROM first_per_user ORDER BY ord
+		ON CONFLICT (user_id, vote_date) DO NOTHING
+		RETURNING id, user_id, candidate_id, vote_date
+	), tallied AS (
+		INSERT INTO vote_tallies (candidate_id, vote_date, count)
+		SELECT candidate_id, vote_date, COUNT(*) FROM inserted GROUP BY candidate_id, vote_date
+		ON CONFLICT (candidate_id, vote_date) DO UPDATE SET count = vote_tallies.count + EXCLUDED.count
+		RETURNING candidate_id, vote_date, count
+	), notified AS (
+		SELECT pg_notify('vote_tallies', json_build_object(
+			'candidate_id', candidate_id, 'vote_date', vote_date, 'vote_count', count
+		)::text) FROM tallied
+	)
+	SELECT
+		i.ord,
+		ins.id AS vote_id,
+		v.ord IS NOT NULL AS candidate_ok,
+		(SELECT COUNT(*) FROM notified) AS notified
+	FROM input i
+	LEFT JOIN valid v ON v.ord = i.ord
+	LEFT JOIN first_per_user f ON f.ord = i.ord
+	LEFT JOIN inserted ins ON f.ord IS NOT NULL AND ins.user_id = f.user_id AND ins.vote_date = f.vote_date
+	ORDER BY i.ord
+""")
+_HAS_VOTED_TODAY = statement('vote_has_voted_today', """
+	SELECT EXISTS (
+		SELECT 1 FROM votes 
+		WHERE user_id = %s AND vote_date = CURRENT_DATE
+	) AS exists
+""")
+# The database's date with the check, so a queued vote is dated exactly as direct inserts would be
+_VOTED_TODAY = statement('vote_voted_today', """
+	SELECT CURRENT_DATE AS today, EXISTS (
+		SELECT 1 FROM votes
+		WHERE user_id = %s AND vote_date = CURRENT_DATE
+	) AS voted
+""")
+_USER_VOTE = statement('vote_user_vote', """
+	SELECT candidate_id, created_at, vote_date
+	FROM votes
+	WHERE user_id = %s AND vote_date = CURRENT_DATE
+""")
+_USER_VOTE_ANY_DATE = statement('vote_user_vote_any_date', """
+	SELECT candidate_id, created_at, vote_date
+	FROM votes
+	WHERE user_id = %s
+	ORDER BY vote_date DESC, created_at DESC
+	LIMIT 1
+""")
+_RESULTS = statement('vote_results', """
+	SELECT 
+		c.id as candidateId,
+		c.name,
+		c.party,
+		COALESCE(t.count, 0) as votes
+	FROM candidates c
+	LEFT JOIN vote_tallies t ON t.candidate_id = c.id AND t.vote_date = CURRENT_DATE
+	ORDER BY votes DESC, c.name
+""")
+_RESULTS_FOR_DATE = statement('vote_results_for_date', """
+	SELECT 
+		c.id as candidateId,
+		c.name,
+		c.party,
+		COALESCE(t.count, 0) as votes
+	FROM candidates c
+	LEFT JOIN vote_tallies t ON t.candidate_id = c.id AND t.vote_date = %s
+	ORDER BY votes DESC, c.name
+""")
+_TALLIES = statement('vote_get_tallies', "SELECT candidate_id, count FROM vote_tallies WHERE vote_date = CURRENT_DATE")
+_IS_PARTITIONED = statement('vote_is_partitioned', "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('votes')) AS partitioned")
+_ENSURE_PARTITIONS = statement('vote_ensure_partitions', """
+	SELECT create_vote_partitions(
+		COALESCE(%s::date, CURRENT_DATE),
+		(CURRENT_DATE + make_interval(months => %s))::date
+	) AS created
+""")
+_DETACH_PARTITIONS = statement('vote_detach_partitions', """
+	SELECT detach_vote_partitions(
+		(date_trunc('month', CURRENT_DATE) - make_interval(months => %s))::date, %s
+	) AS name
+""")
+_LIST_PARTITIONS = statement('vote_list_partitions', """
+	SELECT c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bounds, c.reltuples::bigint AS est_rows
+	FROM pg_inherits i
+	JOIN pg_class c ON c.oid = i.inhrelid
+	WHERE i.inhparent = to_regclass('votes')
+	ORDER BY c.relname
+""")
+
 
 class Vote:
+	# Outcomes of Vote.try_cast_vote
+	CAST = 'cast'
+	DUPLICATE = 'duplicate'
+	INVALID_CANDIDATE = 'invalid_candidate'
+
+	@staticmethod
+	def try_cast_vote(user_id, candidate_id):
+		"""Cast a vote for today in a single statement.
+		Validates that the candidate exists and is active, relies on the
+		(user_id, vote_date) unique constraint to enforce one vote per day and
+		bumps the candidate's vote_tallies row in the same transaction, notifying
+		live listeners (channel 'vote_tallies') on commit.
+		Returns a dict: {'status': CAST | DUPLICATE | INVALID_CANDIDATE, 'vote_id': id or None}
+		"""
+		result = execute_query(_TRY_CAST, (candidate_id, user_id), returning=True)
+
+		if not result or not result.get('candidate_ok'):
+			return {'status': Vote.INVALID_CANDIDATE, 'vote_id': None}
+		if result.get('vote_id') is None:
+			return {'status': Vote.DUPLICATE, 'vote_id': None}
+		return {'status': Vote.CAST, 'vote_id': result['vote_id']}
+
+	@staticmethod
+	def cast_votes_batch(votes):
+		"""Cast many votes in one statement (one transaction, one commit).
+		votes: list of (user_id, candidate_id) or (user_id, candidate_id, vote_date);
+		vote_date None means CURRENT_DATE. Same rules as try_cast_vote: inactive or
+		unknown candidates are rejected and a user gets at most one vote per day,
+		including when the same user appears more than once in the batch (the
+		first occurrence wins). Tallies are bumped once per candidate and live
+		listeners are notified on commit.
+		Returns one outcome dict per input vote, in input order.
+		"""
+		if not votes:
+			return []
+		user_ids, candidate_ids, vote_dates = [], [], []
+		for vote in votes:
+			user_ids.append(vote[0])
+			candidate_ids.append(vote[1])
+			vote_dates.append(vote[2] if len(vote) > 2 else None)
+
+		rows = execute_query(_CAST_BATCH, (user_ids, candidate_ids, vote_dates), fetch=True, commit=True)
+
+		outcomes = []
+		for row in rows or []:
+			if not row['candidate_ok']:
+				outcomes.append({'status': Vote.INVALID_CANDIDATE, 'vote_id': None})
+			elif row['vote_id'] is None:
+				outcomes.append({'status': Vote.DUPLICATE, 'vote_id': None})
+			else:
+				outcomes.append({'status': Vote.CAST, 'vote_id': row['vote_id']})
+		return outcomes
+
 	@staticmethod
 	def cast_vote(user_id, candidate_id):
 		"""Cast a vote for today"""
-		# Check if user has already voted today
-		if Vote.has_voted_today(user_id):
+		outcome = Vote.try_cast_vote(user_id, candidate_id)
+		if outcome['status'] == Vote.DUPLICATE:
 			raise Exception("User has already voted today")
-
-		query = """
-			INSERT INTO votes (user_id, candidate_id, vote_date)
-			VALUES (%s, %s, CURRENT_DATE)
-			RETURNING id
-		"""
-		result = execute_query(query, (user_id, candidate_id), returning=True)
-		
-		# Extract vote_id from result
-		if isinstance(result, dict):
-			vote_id = result.get('id')
-		elif isinstance(result, (list, tuple)):
-			vote_id = result[0] if len(result) > 0 else None
-		else:
-			vote_id = result
-			
-		return vote_id
+		if outcome['status'] == Vote.INVALID_CANDIDATE:
+			raise Exception("Candidate not found")
+		return outcome['vote_id']
 
 	@staticmethod
 	def has_voted(user_id):
@@ -35,56 +198,33 @@ class Vote:
 	@staticmethod
 	def has_voted_today(user_id):
 		"""Check if user has already voted today"""
-		query = """
-			SELECT EXISTS (
-				SELECT 1 FROM votes 
-				WHERE user_id = %s AND vote_date = CURRENT_DATE
-			) AS exists
-		"""
-		result = execute_query(query, (user_id,), fetch_one=True)
+		result = execute_query(_HAS_VOTED_TODAY, (user_id,), fetch_one=True)
 		if isinstance(result, dict):
 			return bool(result.get('exists', False))
 		if isinstance(result, (list, tuple)):
 			return bool(result[0]) if len(result) > 0 else False
 		return bool(result)
 
+	@staticmethod
+	def voted_today(user_id):
+		"""(today, voted): the database's CURRENT_DATE and whether user has a vote on it"""
+		row = execute_query(_VOTED_TODAY, (user_id,), fetch_one=True)
+		return row['today'], bool(row['voted'])
+
 	@staticmethod
 	def get_user_vote(user_id):
 		"""Get user's vote information for today"""
-		query = """
-			SELECT candidate_id, created_at, vote_date
-			FROM votes
-			WHERE user_id = %s AND vote_date = CURRENT_DATE
-		"""
-		return execute_query(query, (user_id,), fetch_one=True)
+		return execute_query(_USER_VOTE, (user_id,), fetch_one=True)
 	
 	@staticmethod
 	def get_user_vote_any_date(user_id):
 		"""Get user's most recent vote (any date)"""
-		query = """
-			SELECT candidate_id, created_at, vote_date
-			FROM votes
-			WHERE user_id = %s
-			ORDER BY vote_date DESC, created_at DESC
-			LIMIT 1
-		"""
-		return execute_query(query, (user_id,), fetch_one=True)
+		return execute_query(_USER_VOTE_ANY_DATE, (user_id,), fetch_one=True)
 
 	@staticmethod
 	def get_results():
 		"""Get voting results for today"""
-		query = """
-			SELECT 
-				c.id as candidateId,
-				c.name,
-				c.party,
-				COUNT(v.id) as votes
-			FROM candidates c
-			LEFT JOIN votes v ON c.id = v.candidate_id AND v.vote_date = CURRENT_DATE
-			GROUP BY c.id, c.name, c.party
-			ORDER BY votes DESC, c.name
-		"""
-		totals = execute_query(query, fetch=True)
+		totals = execute_query(_RESULTS, fetch=True)
 
 		return {
 			'totals': totals,
@@ -94,18 +234,7 @@ class Vote:
 	@staticmethod
 	def get_results_for_date(target_date):
 		"""Get voting results for a specific date"""
-		query = """
-			SELECT 
-				c.id as candidateId,
-				c.name,
-				c.party,
-				COUNT(v.id) as votes
-			FROM candidates c
-			LEFT JOIN votes v ON c.id = v.candidate_id AND v.vote_date = %s
-			GROUP BY c.id, c.name, c.party
-			ORDER BY votes DESC, c.name
-		"""
-		totals = execute_query(query, (target_date,), fetch=True)
+		totals = execute_query(_RESULTS_FOR_DATE, (target_date,), fetch=True)
 
 		return {
 			'totals': totals,
@@ -113,5 +242,73 @@ class Vote:
 			'lastUpdated': datetime.now().isoformat()
 		}
 
+	@staticmethod
+	def get_tallies():
+		"""Get today's vote counts as {candidate_id: count} (candidates without votes are omitted)"""
+		rows = execute_query(_TALLIES, fetch=True) or []
+		return {row['candidate_id']: row['count'] for row in rows}
+
+	@staticmethod
+	def is_partitioned():
+		"""True once database/partition_votes.sql has been applied"""
+		result = execute_query(_IS_PARTITIONED, fetch_one=True)
+		return bool(result and result['partitioned'])
+
+	@staticmethod
+	def ensure_partitions(months_ahead=3, since=None):
+		"""Create missing monthly partitions from `since` (default: this month) to months_ahead months out.
+		Returns the number created, or None if votes is not partitioned.
+		"""
+		if not Vote.is_partitioned():
+			return None
+		result = execute_query(_ENSURE_PARTITIONS, (since, months_ahead), fetch_one=True, commit=True)
+		return result['created']
+
+	@staticmethod
+	def detach_partitions(keep_months, drop=False):
+		"""Detach (or drop) partitions of months that ended more than keep_months months ago.
+		The current month is always kept. Returns the detached partition names.
+		"""
+		if not Vote.is_partitioned():
+			return []
+		rows = execute_query(_DETACH_PARTITIONS, (max(0, keep_months), drop), fetch=True, commit=True) or []
+		return [row['name'] for row in rows]
+
+	@staticmethod
+	def list_partitions():
+		"""Attached partitions with their bounds and estimated row counts, oldest first"""
+		return execute_query(_LIST_PARTITIONS, fetch=True) or []
+
+	@staticmethod
+	def rebuild_tallies(target_date=None):
+		"""Rebuild vote_tallies from the raw votes table (all dates, or a single date).
+		"All dates" means the months still attached to votes: tallies of detached (archived) months are kept.
+		Holds an EXCLUSIVE lock on vote_tallies so concurrent votes wait instead of being lost.
+		Returns the number of tally rows written.
+		"""
+		date_filter = "WHERE vote_date = %s" if target_date is not None else ""
+		params = (target_date, target_date) if target_date is not None else ()
+		# All dates: every tally from the oldest attached partition on (all of them when votes is not
+		# partitioned), also when no votes are left. Earlier months were detached.
+		delete_filter = date_filter or """
+			WHERE vote_date >= COALESCE((
+				SELECT MIN(to_date(substr(c.relname, 7), 'YYYY_MM'))
+				FROM pg_inherits i
+				JOIN pg_class c ON c.oid = i.inhrelid
+				WHERE i.inhparent = to_regclass('votes') AND c.relname ~ '^votes_[0-9]{4}_[0-9]{2}$'
+			), '-infinity')
+		"""
+		# Several statements in one call: runs as plain SQL (PREPARE takes a single statement)
+		query = f"""
+			LOCK TABLE vote_tallies IN EXCLUSIVE MODE;
+			DELETE FROM vote_tallies {delete_filter};
+			INSERT INTO vote_tallies (candidate_id, vote_date, count)
+			SELECT candidate_id, vote_date, COUNT(*)
+			FROM votes
+			{date_filter}
+			GROUP BY candidate_id, vote_date;
+		"""
+		return execute_query(query, params)
+
 __all__ = ["Vote"]
 
@@ -0,0 +1,30 @@
+"""
+Reconcile the vote_tallies aggregate with the raw votes table
+Usage: python rebuild_tallies.py [YYYY-MM-DD]
+"""
+from models.vote_model import Vote
+from datetime import date
+import sys
+
+target_date = None
+if len(sys.argv) > 1:
+    try:
+        target_date = date.fromisoformat(sys.argv[1])
+    except ValueError:
+        print("\nUsage:")
+        print("  python rebuild_tallies.py             # rebuild every date")
+        print("  python rebuild_tallies.py 2025-01-31  # rebuild a single date\n")
+        sys.exit(1)
+
+print("\n" + "="*60)
+print("🔄 REBUILDING VOTE TALLIES")
+print("="*60 + "\n")
+
+try:
+    scope = target_date.isoformat() if target_date else "all dates"
+    print(f"📝 Recounting votes for {scope}...")
+    rows = Vote.rebuild_tallies(target_date)
+    print(f"✅ Wrote {rows} tally rows\n")
+except Exception as e:
+    print(f"❌ Rebuild failed: {e}\n")
+    sys.exit(1)
@@ -1,2 +1,2 @@
 # Make routes a package and export token_required for IDEs
-from .auth_routes import token_required  # re-export for Pylance
\ No newline at end of file
+from .auth_routes import token_required, token_claims_required  # re-export for Pylance
\ No newline at end of file
@@ -6,7 +6,9 @@ from functools import wraps
 import jwt
 import os
 from werkzeug.utils import secure_filename
-from utils.cloudinary_config import upload_image_to_cloudinary
+from utils.uploads import upload_queue, UploadQueueFull, TARGET_USER
+from utils.passwords import PasswordHasherBusy
+from utils.rate_limit import rate_limit, client_ip, submitted_email, login_failures, too_many_requests
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -18,37 +20,84 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 def _allowed_file(filename: str) -> bool:
 	return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def _decode_request_token():
+	"""Decode the Bearer token of the current request.
+	Returns (claims, None) on success or (None, error_response) on failure.
+	"""
+	token = None
+
+	if 'Authorization' in request.headers:
+		auth_header = request.headers['Authorization']
+		try:
+			token = auth_header.split(" ")[1]  # Bearer <token>
+		except IndexError:
+			return None, (jsonify({'error': {'code': 'INVALID_TOKEN', 'message': 'Invalid token format'}}), 401)
+
+	if not token:
+		return None, (jsonify({'error': {'code': 'NO_TOKEN', 'message': 'Token is missing'}}), 401)
+
+	try:
+		return jwt.decode(token, Config.JWT_SECRET_KEY, algorithms=["HS256"]), None
+	except jwt.ExpiredSignatureError:
+		return None, (jsonify({'error': {'code': 'TOKEN_EXPIRED', 'message': 'Token has expired'}}), 401)
+	except jwt.InvalidTokenError:
+		return None, (jsonify({'error': {'code': 'INVALID_TOKEN', 'message': 'Token is invalid'}}), 401)
+
+def _create_access_token(user_id, role='user', status='active'):
+	"""Issue a JWT; role/status claims let token_claims_required skip the user lookup"""
+	return jwt.encode({
+		'user_id': user_id,
+		'role': role,
+		'status': status,
+		'exp': datetime.utcnow() + Config.JWT_ACCESS_TOKEN_EXPIRES
+	}, Config.JWT_SECRET_KEY, algorithm="HS256")
+
 def token_required(f):
-	"""Decorator to protect routes with JWT"""
+	"""Decorator to protect routes with JWT (user loaded through the in-process user cache)"""
 	@wraps(f)
 	def decorated(*args, **kwargs):
-		token = None
+		data, error = _decode_request_token()
+		if error:
+			return error
 
-		if 'Authorization' in request.headers:
-			auth_header = request.headers['Authorization']
-			try:
-				token = auth_header.split(" ")[1]  # Bearer <token>
-			except IndexError:
-				return jsonify({'error': {'code': 'INVALID_TOKEN', 'message': 'Invalid token format'}}), 401
+		current_user = User.find_by_id_cached(data['user_id'])
+		if not current_user:
+			return jsonify({'error': {'code': 'USER_NOT_FOUND', 'message': 'User not found'}}), 401
 
-		if not token:
-			return jsonify({'error': {'code': 'NO_TOKEN', 'message': 'Token is missing'}}), 401
+		return f(current_user, *args, **kwargs)
 
-		try:
-			data = jwt.decode(token, Config.JWT_SECRET_KEY, algorithms=["HS256"])
-			current_user = User.find_by_id(data['user_id'])
+	return decorated
+
+def token_claims_required(f):
+	"""Decorator for hot routes that only need the user's id/role/status.
+	Builds current_user from the signed token claims without touching the database;
+	tokens issued without role/status claims fall back to the token_required lookup.
+	"""
+	@wraps(f)
+	def decorated(*args, **kwargs):
+		data, error = _decode_request_token()
+		if error:
+			return error
+
+		if 'role' in data and 'status' in data:
+			current_user = {'id': data['user_id'], 'role': data['role'], 'status': data['status']}
+		else:
+			current_user = User.find_by_id_cached(data['user_id'])
 			if not current_user:
 				return jsonify({'error': {'code': 'USER_NOT_FOUND', 'message': 'User not found'}}), 401
-		except jwt.ExpiredSignatureError:
-			return jsonify({'error': {'code': 'TOKEN_EXPIRED', 'message': 'Token has expired'}}), 401
-		except jwt.InvalidTokenError:
-			return jsonify({'error': {'code': 'INVALID_TOKEN', 'message': 'Token is invalid'}}), 401
 
 		return f(current_user, *args, **kwargs)
 
 	return decorated
 
+def _server_busy(error):
+	"""503 response used when the password hashing queue is full"""
+	response = jsonify({'error': {'code': 'SERVER_BUSY', 'message': str(error)}})
+	response.headers['Retry-After'] = '1'
+	return response, 503
+
 @auth_bp.route('/register', methods=['POST'])
+@rate_limit(('register_ip', client_ip, Config.RATE_LIMIT_REGISTER_PER_IP))
 def register():
 	"""Register a new user"""
 	try:
@@ -67,10 +116,7 @@ def register():
 		user_id = User.create(data['name'], data['email'], data['password'])
 
 		# Generate JWT token for immediate login after registration
-		token = jwt.encode({
-			'user_id': user_id,
-			'exp': datetime.utcnow() + Config.JWT_ACCESS_TOKEN_EXPIRES
-		}, Config.JWT_SECRET_KEY, algorithm="HS256")
+		token = _create_access_token(user_id)
 
 		return jsonify({
 			'accessToken': token,
@@ -82,10 +128,16 @@ def register():
 			}
 		}), 201
 
+	except PasswordHasherBusy as e:
+		return _server_busy(e)
 	except Exception as e:
 		return jsonify({'error': {'code': 'SERVER_ERROR', 'message': str(e)}}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit(
+	('login_ip', client_ip, Config.RATE_LIMIT_LOGIN_PER_IP),
+	('login_email', submitted_email, Config.RATE_LIMIT_LOGIN_PER_EMAIL)
+)
 def login():
 	"""Login user"""
 	try:
@@ -95,9 +147,16 @@ def login():
 		if not data.get('email') or not data.get('password'):
 			return jsonify({'error': {'code': 'VALIDATION_ERROR', 'message': 'Email and password required'}}), 400
 
+		# Too many recent failures for this email or IP: reject before any DB or hash work
+		email_key, ip = submitted_email(), client_ip()
+		retry_after = login_failures.blocked(email_key, ip)
+		if retry_after is not None:
+			return too_many_requests('login_failures', retry_after)
+
 		user = User.find_by_email(data['email'])
 		print(f"✅ User found: {user is not None}")
 		if not user:
+			login_failures.failed(email_key, ip)
 			# Return a clear error code so frontend can show a friendly, themed message
 			return jsonify({'error': {'code': 'USER_NOT_FOUND', 'message': 'No account found with this email'}}), 401
 
@@ -123,19 +182,24 @@ def login():
 		print(f"🔑 Verifying password...")
 		if not User.verify_password(user_password, data['password']):
 			print(f"❌ Password verification failed")
+			login_failures.failed(email_key, ip)
 			return jsonify({'error': {'code': 'INVALID_CREDENTIALS', 'message': 'Invalid credentials'}}), 401
 		print(f"✅ Password verified!")
+		login_failures.succeeded(email_key)
 
 		# Check user status
 		if user_status != 'active':
 			return jsonify({'error': {'code': 'ACCOUNT_INACTIVE', 'message': 'Account is inactive'}}), 401
 
+		# Upgrade the stored hash if the hashing parameters changed (best effort, active accounts only)
+		try:
+			User.rehash_password_if_needed(user_id, user_password, data['password'])
+		except Exception as e:
+			print(f"⚠️  Password rehash skipped: {e}")
+
 		# Generate JWT token
 		print(f"🎫 Generating token...")
-		token = jwt.encode({
-			'user_id': user_id,
-			'exp': datetime.utcnow() + Config.JWT_ACCESS_TOKEN_EXPIRES
-		}, Config.JWT_SECRET_KEY, algorithm="HS256")
+		token = _create_access_token(user_id, user_role, user_status)
 		print(f"✅ Token generated!")
 
 		print(f"📤 Sending successful response")
@@ -149,6 +213,8 @@ def login():
 			}
 		}), 200
 
+	except PasswordHasherBusy as e:
+		return _server_busy(e)
 	except Exception as e:
 		print(f"❌ LOGIN ERROR: {str(e)}")
 		import traceback
@@ -189,7 +255,8 @@ def logout(current_user):
 def upload_profile_picture(current_user):
 	"""Upload or change the current user's profile picture.
 	Expects multipart/form-data with field name 'profile_pic'.
-	Returns the public URL path of the stored picture.
+	The file is uploaded in the background: responds 202 with an upload_id whose
+	status can be polled at /profile/picture/<upload_id>.
 	"""
 	# Resolve user id from tuple/dict
 	if isinstance(current_user, dict):
@@ -210,23 +277,28 @@ def upload_profile_picture(current_user):
 	if not _allowed_file(file.filename):
 		return jsonify({'error': {'code': 'VALIDATION_ERROR', 'message': 'Unsupported file type'}}), 400
 
-	# Upload to Cloudinary instead of local filesystem
-	upload_result = upload_image_to_cloudinary(file, folder="voting-system/profiles")
-	
-	if not upload_result:
-		return jsonify({'error': {'code': 'UPLOAD_ERROR', 'message': 'Failed to upload image to cloud storage'}}), 500
-	
-	# Get the secure URL from Cloudinary
-	public_path = upload_result['url']
-
-	# Try to persist in users.profile_pic if the column exists
-	persisted = User.update_profile_pic(user_id, public_path)
+	# Stage the file and upload it in the background; users.profile_pic is set when it completes
+	try:
+		job = upload_queue.submit(file, user_id, targets=(TARGET_USER,))
+	except UploadQueueFull as e:
+		return jsonify({'error': {'code': 'UPLOAD_BUSY', 'message': str(e)}}), 503
+	except OSError:
+		return jsonify({'error': {'code': 'UPLOAD_ERROR', 'message': 'Failed to store uploaded image'}}), 500
 
 	return jsonify({
-		'message': 'Profile picture updated' if persisted else 'Profile picture uploaded',
-		'profile_pic': public_path,
-		'persisted': persisted
-	}), 200
+		'message': 'Profile picture upload accepted',
+		**job
+	}), 202
+
+
+@auth_bp.route('/profile/picture/<upload_id>', methods=['GET'])
+@token_claims_required
+def get_upload_status(current_user, upload_id):
+	"""Status of a background profile picture upload (pending, done or failed)"""
+	job = upload_queue.status(upload_id, user_id=current_user['id'])
+	if job is None:
+		return jsonify({'error': {'code': 'NOT_FOUND', 'message': 'Upload not found'}}), 404
+	return jsonify(job), 200
 
 
 @auth_bp.route('/profile', methods=['PUT'])
@@ -251,4 +323,4 @@ def update_profile(current_user):
 	results = User.update_profile(user_id, name=name, dob=dob, gender=gender)
 	return jsonify({ 'updated': results }), 200
 
-__all__ = ["token_required", "auth_bp"]
+__all__ = ["token_required", "token_claims_required", "auth_bp"]
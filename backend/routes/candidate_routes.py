@@ -1,10 +1,18 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response
 from models.candidate_model import Candidate
-from .auth_routes import token_required
+from models.result_model import Result, HISTORY_MAX_DAYS
+from models.vote_model import Vote
+from .auth_routes import token_required, token_claims_required
+from utils.cache import candidate_list_cache
+from utils.tally_stream import tally_broadcaster
+from config import Config
+import hashlib
+import json
 import os
+import queue
 from werkzeug.utils import secure_filename
 from datetime import datetime, timedelta, timezone
-from utils.cloudinary_config import upload_image_to_cloudinary
+from utils.uploads import upload_queue, UploadQueueFull, TARGET_CANDIDATE
 
 # IST timezone (UTC+5:30)
 IST = timezone(timedelta(hours=5, minutes=30))
@@ -25,6 +33,17 @@ def allowed_file(filename):
     return '.'  in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def _queue_profile_pic(file, user_id):
+    """Queue a candidate's profile picture for background upload; returns the upload status or None"""
+    if file is None:
+        return None
+    try:
+        return upload_queue.submit(file, user_id, targets=(TARGET_CANDIDATE,))
+    except (UploadQueueFull, OSError) as e:
+        # The application itself succeeded; the picture can be uploaded again later
+        print(f"⚠️  Profile picture for user {user_id} not queued: {e}")
+        return {'upload_id': None, 'status': 'failed', 'profile_pic': None, 'error': str(e)}
+
 @candidate_bp.route('/apply', methods=['POST'])
 @token_required
 def apply_as_candidate(current_user):
@@ -61,15 +80,12 @@ def apply_as_candidate(current_user):
         if not gender:
             return jsonify({'error': {'code': 'VALIDATION_ERROR', 'message': 'Gender is required'}}), 400
         
-        # Handle profile picture upload to Cloudinary
-        profile_pic_path = None
+        # Profile picture is uploaded in the background once the candidate row exists
+        profile_pic_file = None
         if 'profile_pic' in request.files:
             file = request.files['profile_pic']
             if file and file.filename and allowed_file(file.filename):
-                # Upload to Cloudinary
-                upload_result = upload_image_to_cloudinary(file, folder="voting-system/profiles")
-                if upload_result:
-                    profile_pic_path = upload_result['url']
+                profile_pic_file = file
         
         # Check if user already has a candidate record (active or inactive)
         check_query = "SELECT id, is_active FROM candidates WHERE user_id = %s"
@@ -96,8 +112,7 @@ def apply_as_candidate(current_user):
                     candidate_name,
                     dob,
                     gender,
-                    party,
-                    profile_pic_path
+                    party
                 )
                 
                 if candidate_id is None:
@@ -106,7 +121,8 @@ def apply_as_candidate(current_user):
                 return jsonify({
                     'message': 'Successfully reactivated your candidacy',
                     'candidate_id': candidate_id,
-                    'reactivated': True
+                    'reactivated': True,
+                    'profile_pic_upload': _queue_profile_pic(profile_pic_file, current_user_id)
                 }), 200
         else:
             # Create new candidate
@@ -116,8 +132,7 @@ def apply_as_candidate(current_user):
                 candidate_name,
                 dob,
                 gender,
-                party,
-                profile_pic_path
+                party
             )
             
             if candidate_id is None:
@@ -126,7 +141,8 @@ def apply_as_candidate(current_user):
             return jsonify({
                 'message': 'Successfully applied as a candidate',
                 'candidate_id': candidate_id,
-                'reactivated': False
+                'reactivated': False,
+                'profile_pic_upload': _queue_profile_pic(profile_pic_file, current_user_id)
             }), 201
     
     except Exception as e:
@@ -192,7 +208,7 @@ def get_candidate_status(current_user):
         return jsonify({'error': {'code': 'SERVER_ERROR', 'message': str(e)}}), 500
 
 @candidate_bp.route('/votes', methods=['GET'])
-@token_required
+@token_claims_required
 def get_vote_count(current_user):
     """Get vote count for current user as a candidate"""
     try:
@@ -242,45 +258,59 @@ def revoke_candidacy(current_user):
     except Exception as e:
         return jsonify({'error': {'code': 'SERVER_ERROR', 'message': str(e)}}), 500
 
+def _build_candidate_list_entry():
+    """Query active candidates and pre-serialize the public list with its ETag"""
+    candidates = Candidate.get_all()
+    
+    if candidates is None or not isinstance(candidates, (list, tuple)):
+        candidates = []
+    
+    # Format candidates WITHOUT vote counts (privacy protection)
+    formatted_candidates = []
+    for candidate in candidates:
+        if isinstance(candidate, tuple):
+            formatted_candidates.append({
+                'id': candidate[0],
+                'name': candidate[1],
+                'party': candidate[2] if len(candidate) > 2 else 'Independent',
+                'position': candidate[3] if len(candidate) > 3 else 'Candidate',
+                'user_id': candidate[4] if len(candidate) > 4 else None,
+                'description': candidate[5] if len(candidate) > 5 else '',
+                'is_active': candidate[6] if len(candidate) > 6 else True,
+                'dob': str(candidate[7]) if len(candidate) > 7 and candidate[7] else None,
+                'gender': candidate[8] if len(candidate) > 8 else None,
+                'profile_pic': candidate[9] if len(candidate) > 9 else None
+                # Note: vote_count removed for privacy - users only see their own in profile
+            })
+        elif isinstance(candidate, dict):
+            # Remove vote_count if present in dict
+            candidate_copy = candidate.copy()
+            candidate_copy.pop('vote_count', None)
+            formatted_candidates.append(candidate_copy)
+    
+    body = current_app.json.dumps({'candidates': formatted_candidates}, separators=(',', ':')) + "\n"
+    return {
+        'body': body,
+        'etag': hashlib.sha256(body.encode('utf-8')).hexdigest()
+    }
+
+
 @candidate_bp.route('/all', methods=['GET'])
 def get_all_candidates():
-    """Get all active candidates - Public endpoint, no vote counts shown"""
+    """Get all active candidates - Public endpoint, no vote counts shown.
+    Served from an in-process TTL cache; If-None-Match with the current ETag returns 304.
+    """
     try:
-        print("DEBUG: Starting get_all_candidates()")
-        candidates = Candidate.get_all()
-        print(f"DEBUG: Got candidates: {candidates}")
-        
-        if candidates is None or not isinstance(candidates, (list, tuple)):
-            print("DEBUG: No candidates or wrong type, returning empty list")
-            return jsonify({'candidates': []}), 200
-        
-        # Format candidates WITHOUT vote counts (privacy protection)
-        formatted_candidates = []
-        for candidate in candidates:
-            if isinstance(candidate, tuple):
-                formatted_candidates.append({
-                    'id': candidate[0],
-                    'name': candidate[1],
-                    'party': candidate[2] if len(candidate) > 2 else 'Independent',
-                    'position': candidate[3] if len(candidate) > 3 else 'Candidate',
-                    'user_id': candidate[4] if len(candidate) > 4 else None,
-                    'description': candidate[5] if len(candidate) > 5 else '',
-                    'is_active': candidate[6] if len(candidate) > 6 else True,
-                    'dob': str(candidate[7]) if len(candidate) > 7 and candidate[7] else None,
-                    'gender': candidate[8] if len(candidate) > 8 else None,
-                    'profile_pic': candidate[9] if len(candidate) > 9 else None
-                    # Note: vote_count removed for privacy - users only see their own in profile
-                })
-            elif isinstance(candidate, dict):
-                # Remove vote_count if present in dict
-                candidate_copy = candidate.copy()
-                candidate_copy.pop('vote_count', None)
-                formatted_candidates.append(candidate_copy)
+        entry = candidate_list_cache.get('all')
+        if entry is None:
+            generation = candidate_list_cache.generation
+            entry = _build_candidate_list_entry()
+            candidate_list_cache.set('all', entry, generation=generation)
         
-        print(f"DEBUG: Returning {len(formatted_candidates)} formatted candidates")
-        return jsonify({
-            'candidates': formatted_candidates
-        }), 200
+        response = current_app.response_class(entry['body'], mimetype='application/json')
+        response.set_etag(entry['etag'])
+        response.headers['Cache-Control'] = 'no-cache'  # always revalidate, usually with a 304
+        return response.make_conditional(request)
     
     except Exception as e:
         print(f"ERROR in get_all_candidates: {type(e).__name__}: {str(e)}")
@@ -299,139 +329,127 @@ def get_candidates_alias():
 def get_results():
     """Get voting results with vote counts - Public endpoint after voting ends"""
     try:
-        from models import execute_query
-        
         # Check if voting has ended (after 8 PM IST)
         now = get_ist_time()
         current_hour = now.hour
         is_finalized = current_hour >= 20 or current_hour < 8  # After 8 PM or before 8 AM IST
         
-        # Get ALL candidates (including inactive) to check if winner revoked
-        all_candidates_query = """
-            SELECT c.id, c.name, c.party, c.position, c.description, c.profile_pic,
-                   COUNT(v.id) as vote_count, c.is_active
-            FROM candidates c
-            LEFT JOIN votes v ON c.id = v.candidate_id AND v.vote_date = CURRENT_DATE
-            GROUP BY c.id, c.name, c.party, c.position, c.description, c.profile_pic, c.is_active
-            ORDER BY vote_count DESC, c.name ASC
-        """
-        all_results = execute_query(all_candidates_query, fetch=True)
-        
-        # Get all candidates with their vote counts (only active for display)
-        query = """
-            SELECT c.id, c.name, c.party, c.position, c.description, c.profile_pic,
-                   COUNT(v.id) as vote_count
-            FROM candidates c
-            LEFT JOIN votes v ON c.id = v.candidate_id AND v.vote_date = CURRENT_DATE
-            WHERE c.is_active = true
-            GROUP BY c.id, c.name, c.party, c.position, c.description, c.profile_pic
-            ORDER BY vote_count DESC, c.name ASC
-        """
-        results = execute_query(query, fetch=True)
-        
-        # Type guard: ensure results is a list/tuple, not None or int
-        if not results or not isinstance(results, (list, tuple)):
-            return jsonify({
-                'results': [],
-                'total_votes': 0,
-                'total_candidates': 0,
-                'is_finalized': is_finalized,
-                'winner': None
-            }), 200
-        
-        # Format results
-        formatted_results = []
-        total_votes = 0
+        if not is_finalized:
+            return jsonify(Result.compute(False)), 200
         
-        for result in results:
-            # Type guard: ensure result is tuple or dict with proper length
-            if isinstance(result, tuple) and len(result) >= 7:
-                vote_count = int(result[6]) if result[6] is not None else 0
-                formatted_results.append({
-                    'id': result[0],
-                    'name': result[1],
-                    'party': result[2] if result[2] else 'Independent',
-                    'position': result[3] if result[3] else 'Candidate',
-                    'description': result[4] if result[4] else '',
-                    'profile_pic': result[5] if result[5] else None,
-                    'vote_count': vote_count
-                })
-                total_votes += vote_count
-            elif isinstance(result, dict):
-                vote_count = int(result.get('vote_count', 0))
-                formatted_results.append({
-                    'id': result.get('id'),
-                    'name': result.get('name'),
-                    'party': result.get('party', 'Independent'),
-                    'position': result.get('position', 'Candidate'),
-                    'description': result.get('description', ''),
-                    'profile_pic': result.get('profile_pic'),
-                    'vote_count': vote_count
-                })
-                total_votes += vote_count
+        # After close, serve the day's frozen snapshot (computed once by the first reader
+        # after 8 PM or by finalize_results.py); before 8 AM fall back to a live read
+        snapshot = Result.get_snapshot()
+        if snapshot is None:
+            snapshot = Result.finalize() if current_hour >= 20 else Result.compute(True)
         
-        # Determine winner with tie-breaking if voting is finalized
-        winner = None
-        previous_winner_revoked = False
-        revoked_winner_info = None
-        
-        if is_finalized:
-            # Check if the candidate with most votes (from ALL candidates) has revoked
-            if all_results and isinstance(all_results, (list, tuple)) and len(all_results) > 0:
-                # Get the top candidate from all results (including inactive)
-                top_all = all_results[0]
-                if isinstance(top_all, tuple) and len(top_all) >= 8:
-                    top_is_active = top_all[7]
-                    top_vote_count = int(top_all[6]) if top_all[6] is not None else 0
-                    
-                    # If top candidate is inactive and has votes, they revoked after winning
-                    if not top_is_active and top_vote_count > 0:
-                        # Check if they would have been the winner (compare with current active candidates)
-                        if formatted_results and top_vote_count >= formatted_results[0]['vote_count']:
-                            previous_winner_revoked = True
-                            revoked_winner_info = {
-                                'name': top_all[1],
-                                'vote_count': top_vote_count,
-                                'party': top_all[2] if top_all[2] else 'Independent'
-                            }
-            
-            # Determine winner from active candidates only
-            if formatted_results:
-                # Get candidates with highest vote count
-                max_votes = formatted_results[0]['vote_count'] if formatted_results else 0
-                top_candidates = [c for c in formatted_results if c['vote_count'] == max_votes]
-                
-                if len(top_candidates) == 1:
-                    # Clear winner
-                    winner = top_candidates[0]
-                else:
-                    # TIE-BREAKING RULES:
-                    # 1. Alphabetical order by name (earliest alphabetically wins)
-                    top_candidates.sort(key=lambda x: x['name'].lower())
-                    winner = top_candidates[0]
-                    winner['tie_broken'] = True
-                    winner['tie_breaking_method'] = 'alphabetical'
-                    winner['tied_candidates'] = [c['name'] for c in top_candidates]
-        
-        # Build voting status message
-        if is_finalized:
-            if previous_winner_revoked and revoked_winner_info:
-                voting_status = f"Voting has ended for today. Original winner {revoked_winner_info['name']} ({revoked_winner_info['vote_count']} votes) withdrew from candidacy. Winner recalculated from remaining candidates."
-            else:
-                voting_status = 'Voting has ended for today (8:00 PM IST). Results are final. Come back tomorrow at 8:00 AM IST for a new vote!'
-        else:
-            voting_status = 'Voting is currently in progress. Vote now before 8:00 PM IST!'
-        
-        return jsonify({
-            'results': formatted_results,
-            'total_votes': total_votes,
-            'total_candidates': len(formatted_results),
-            'is_finalized': is_finalized,
-            'winner': winner,
-            'voting_status': voting_status,
-            'previous_winner_revoked': previous_winner_revoked,
-            'revoked_winner_info': revoked_winner_info
-        }), 200
+        return jsonify(snapshot), 200
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a date in YYYY-MM-DD format")
+
+
+@candidate_bp.route('/results/<result_date>', methods=['GET'])
+def get_results_for_date(result_date):
+    """Final results of a given day - Public endpoint. Past days never change, so they are cacheable."""
+    try:
+        target = _parse_date(result_date, 'date')
+    except ValueError as e:
+        return jsonify({'error': {'code': 'VALIDATION_ERROR', 'message': str(e)}}), 400
+    
+    try:
+        # Same clock as the stored votes and snapshots (not IST): a day is past once the database says so
+        today = Result.current_date()
+        if target > today:
+            return jsonify({'error': {'code': 'NOT_FOUND', 'message': 'No results for a future date'}}), 404
+        if target == today:
+            return get_results()
+        snapshot = Result.get_for_date(target)
+    except Exception as e:
+        return jsonify({'error': {'code': 'SERVER_ERROR', 'message': str(e)}}), 500
+    if snapshot is None:
+        return jsonify({'error': {'code': 'NOT_FOUND', 'message': f"No votes were cast on {target.isoformat()}"}}), 404
+    
+    response = jsonify(dict(snapshot, result_date=target.isoformat()))
+    if snapshot.get('is_finalized'):
+        response.headers['Cache-Control'] = f"public, max-age={Config.RESULTS_HISTORY_CACHE_MAX_AGE}"
+    return response, 200
+
+
+@candidate_bp.route('/results/history', methods=['GET'])
+def get_results_history():
+    """Daily winners and totals for a date range - Public endpoint.
+    Query: from, to (YYYY-MM-DD, default: the 30 days before today), at most 366 days.
+    """
+    try:
+        today = Result.current_date()  # database clock, as in get_results_for_date
+    except Exception as e:
+        return jsonify({'error': {'code': 'SERVER_ERROR', 'message': str(e)}}), 500
+    try:
+        end = _parse_date(request.args['to'], 'to') if request.args.get('to') else today - timedelta(days=1)
+        start = _parse_date(request.args['from'], 'from') if request.args.get('from') else end - timedelta(days=29)
+    except ValueError as e:
+        return jsonify({'error': {'code': 'VALIDATION_ERROR', 'message': str(e)}}), 400
+    
+    if start > end:
+        return jsonify({'error': {'code': 'VALIDATION_ERROR', 'message': 'from must not be after to'}}), 400
+    if (end - start).days >= HISTORY_MAX_DAYS:
+        return jsonify({'error': {'code': 'VALIDATION_ERROR', 'message': f"Date range is limited to {HISTORY_MAX_DAYS} days"}}), 400
+    
+    try:
+        days = Result.get_history(start, min(end, today))
+    except Exception as e:
+        return jsonify({'error': {'code': 'SERVER_ERROR', 'message': str(e)}}), 500
+    
+    response = jsonify({'from': start.isoformat(), 'to': end.isoformat(), 'days': days})
+    if end < today:
+        # Only closed days: the listing can only change if a day had not been archived yet
+        response.headers['Cache-Control'] = f"public, max-age={Config.RESULTS_HISTORY_CACHE_MAX_AGE}"
+    return response, 200
+
+
+@candidate_bp.route('/stream', methods=['GET'])
+def stream_vote_counts():
+    """Server-Sent Events stream of today's vote counts - Public endpoint.
+    Sends a 'snapshot' event ({"tallies": {candidate_id: count}}) on connect, then a
+    'tally' event ({"candidate_id", "vote_date", "vote_count"}) whenever a count changes.
+    Only served when SSE_ENABLED (async workers): a sync worker would be held by one viewer
+    until it times out. EventSource does not reconnect after an error status; the pages poll instead.
+    """
+    if not Config.SSE_ENABLED:
+        return jsonify({'error': 'Live updates are not available on this server'}), 404
+
+    subscriber = tally_broadcaster.subscribe()
+    if subscriber is None:
+        return jsonify({'error': 'Too many live subscribers, please retry later'}), 503
+    
+    try:
+        snapshot = {'tallies': Vote.get_tallies()}
+    except Exception as e:
+        tally_broadcaster.unsubscribe(subscriber)
+        return jsonify({'error': str(e)}), 500
+    
+    def generate():
+        try:
+            yield f"retry: 5000\nevent: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+            while True:
+                try:
+                    event = subscriber.get(timeout=Config.SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: tally\ndata: {json.dumps(event)}\n\n"
+        finally:
+            tally_broadcaster.unsubscribe(subscriber)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # disable proxy buffering
+    })
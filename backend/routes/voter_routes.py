@@ -1,7 +1,13 @@
 from flask import Blueprint, request, jsonify
 from models.vote_model import Vote
 from models.candidate_model import Candidate
-from .auth_routes import token_required
+from models.result_model import Result
+from .auth_routes import token_required, token_claims_required
+from utils.metrics import VOTES_CAST, VOTE_REJECTIONS
+from utils.rate_limit import rate_limit, client_ip, token_user
+from utils.vote_queue import vote_queue, VoteQueueError, PENDING, FAILED
+from utils.vote_batcher import vote_batcher
+from config import Config
 from datetime import datetime, timedelta, timezone
 
 voter_bp = Blueprint('voters', __name__)
@@ -21,12 +27,17 @@ def is_voting_open():
     return 8 <= current_hour < 20
 
 @voter_bp.route('/vote', methods=['POST'])
+@rate_limit(
+    ('vote_ip', client_ip, Config.RATE_LIMIT_VOTE_PER_IP),
+    ('vote_user', token_user, Config.RATE_LIMIT_VOTE_PER_USER)
+)
 @token_required
 def cast_vote(current_user):
     """Cast a vote for a candidate"""
     try:
         # Check if voting is open
         if not is_voting_open():
+            VOTE_REJECTIONS.labels('voting_closed').inc()
             now = get_ist_time()
             current_time = now.strftime('%I:%M %p')
             return jsonify({
@@ -50,21 +61,30 @@ def cast_vote(current_user):
         if not candidate_id:
             return jsonify({'error': 'Candidate ID is required'}), 400
         
-        # Check if user has already voted
-        has_voted = Vote.has_voted(voter_id)
-        if has_voted:
+        if Config.VOTE_INGEST_MODE == 'queue':
+            return _queue_vote(voter_id, candidate_id)
+        
+        if Config.VOTE_INGEST_MODE == 'batch':
+            # Shares one INSERT and commit with votes from concurrent requests
+            candidate_id = _parse_candidate_id(candidate_id)
+            if candidate_id is None:
+                outcome = {'status': Vote.INVALID_CANDIDATE, 'vote_id': None}
+            else:
+                outcome = vote_batcher.cast(voter_id, candidate_id)
+        else:
+            # Validate candidate, enforce one vote per day and insert in one round-trip
+            outcome = Vote.try_cast_vote(voter_id, candidate_id)
+        
+        if outcome['status'] == Vote.DUPLICATE:
+            VOTE_REJECTIONS.labels('duplicate').inc()
             return jsonify({'error': 'You have already voted'}), 400
         
-        # Check if candidate exists and is active
-        candidate = Candidate.get_by_id(candidate_id)
-        if not candidate:
+        if outcome['status'] == Vote.INVALID_CANDIDATE:
+            VOTE_REJECTIONS.labels('unknown_candidate').inc()
             return jsonify({'error': 'Candidate not found'}), 404
         
-        # Cast vote
-        vote_id = Vote.cast_vote(voter_id, candidate_id)
-        
-        if vote_id is None:
-            return jsonify({'error': 'Failed to cast vote'}), 500
+        vote_id = outcome['vote_id']
+        VOTES_CAST.inc()
         
         return jsonify({
             'message': 'Vote cast successfully',
@@ -74,8 +94,54 @@ def cast_vote(current_user):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _parse_candidate_id(candidate_id):
+    """Candidate id as an int, or None if it cannot be one (batched statements bind int[])"""
+    try:
+        candidate_id = int(candidate_id)
+    except (TypeError, ValueError):
+        return None
+    return candidate_id if 0 < candidate_id < 2**31 else None
+
+def _queue_vote(voter_id, candidate_id):
+    """Validate the vote, append it to the durable vote queue and acknowledge with 202.
+    The insert happens in the background; /my-vote reports it as pending until then.
+    """
+    candidate_id = _parse_candidate_id(candidate_id)
+    if candidate_id not in Candidate.get_active_ids_cached():
+        VOTE_REJECTIONS.labels('unknown_candidate').inc()
+        return jsonify({'error': 'Candidate not found'}), 404
+    
+    # Dated by the database, like the direct and batch inserts and the one-vote-per-day check
+    vote_date, voted = Vote.voted_today(voter_id)
+    queued = vote_queue.status(voter_id, vote_date)
+    if voted or (queued and queued['status'] in (PENDING, Vote.CAST)):
+        VOTE_REJECTIONS.labels('duplicate').inc()
+        return jsonify({'error': 'You have already voted'}), 400
+    
+    try:
+        accepted = vote_queue.submit(voter_id, candidate_id, vote_date)
+    except VoteQueueError as e:
+        print(f"⚠️  {e}")
+        return jsonify({'error': 'Server is busy, please try again shortly'}), 503
+    
+    if accepted['duplicate']:
+        VOTE_REJECTIONS.labels('duplicate').inc()
+        return jsonify({'error': 'You have already voted'}), 400
+    
+    VOTES_CAST.inc()
+    return jsonify({
+        'message': 'Vote accepted',
+        'status': PENDING
+    }), 202
+
+def _queued_vote(voter_id):
+    """Today's vote as known to this process's vote queue (queue mode only)"""
+    if Config.VOTE_INGEST_MODE != 'queue':
+        return None
+    return vote_queue.status(voter_id, Result.current_date())
+
 @voter_bp.route('/status', methods=['GET'])
-@token_required
+@token_claims_required
 def get_voter_status(current_user):
     """Check if the user has voted"""
     try:
@@ -90,6 +156,15 @@ def get_voter_status(current_user):
         if not voter_id:
             return jsonify({'error': 'Unable to resolve current user'}), 401
         
+        queued = _queued_vote(voter_id)
+        if queued and queued['status'] == PENDING:
+            return jsonify({
+                'has_voted': True,
+                'status': PENDING,
+                'voter_id': voter_id,
+                'message': 'Your vote has been received and is being recorded'
+            }), 200
+        
         has_voted = Vote.has_voted_today(voter_id)
         
         return jsonify({
@@ -102,7 +177,7 @@ def get_voter_status(current_user):
         return jsonify({'error': str(e)}), 500
 
 @voter_bp.route('/my-vote', methods=['GET'])
-@token_required
+@token_claims_required
 def get_my_vote(current_user):
     """Get the candidate the user voted for (if any)"""
     try:
@@ -117,14 +192,30 @@ def get_my_vote(current_user):
         if not voter_id:
             return jsonify({'error': 'Unable to resolve current user'}), 401
         
+        # Queue mode: a vote accepted by this worker may not be in the database yet
+        queued = _queued_vote(voter_id)
+        if queued and queued['status'] == PENDING:
+            return jsonify({
+                'has_voted': True,
+                'status': PENDING,
+                'candidate': Candidate.get_by_id(queued['candidate_id'])
+            }), 200
+        
         # Use the correct method name: get_user_vote instead of get_vote_by_voter
         vote = Vote.get_user_vote(voter_id)
         
         if not vote:
-            return jsonify({
+            response = {
                 'has_voted': False,
                 'candidate': None
-            }), 200
+            }
+            if queued and queued['status'] == Vote.INVALID_CANDIDATE:
+                response['status'] = 'rejected'
+                response['reason'] = 'Candidate is no longer available'
+            elif queued and queued['status'] == FAILED:
+                response['status'] = 'rejected'
+                response['reason'] = 'Your vote could not be recorded, please vote again'
+            return jsonify(response), 200
         
         # Get candidate details
         if isinstance(vote, tuple):
@@ -153,6 +244,7 @@ def get_my_vote(current_user):
         
         return jsonify({
             'has_voted': True,
+            'status': 'recorded',
             'candidate': candidate_data
         }), 200
         
@@ -0,0 +1,159 @@
+"""
+In-process caching utilities
+"""
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+from utils.metrics import CACHE_REQUESTS
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU cache whose entries expire after `ttl` seconds.
+
+    `generation` is bumped by every invalidation; pass the value read before a
+    slow load to set() so a result computed from pre-invalidation data is dropped.
+    """
+
+    def __init__(self, ttl, maxsize=128, name=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.name = name
+        self.generation = 0
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._hit_metric = CACHE_REQUESTS.labels(name or 'unnamed', 'hit')
+        self._miss_metric = CACHE_REQUESTS.labels(name or 'unnamed', 'miss')
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing/expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self._misses += 1
+                self._miss_metric.inc()
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            self._hit_metric.inc()
+            return entry[1]
+
+    def set(self, key, value, ttl=None, generation=None):
+        """Store value under key; ignored if the cache was invalidated since `generation`"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+    def invalidate(self, key):
+        """Remove a single key"""
+        with self._lock:
+            self.generation += 1
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'name': self.name,
+                'size': len(self._data),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': (self._hits / lookups) if lookups else 0.0
+            }
+
+
+# Pre-serialized public candidate list (GET /api/candidates, /api/candidates/all)
+candidate_list_cache = TTLCache(ttl=Config.CANDIDATE_CACHE_TTL, maxsize=4, name='candidate_list')
+
+
+def invalidate_candidate_list():
+    """Drop the cached candidate list; call after any change to candidates"""
+    candidate_list_cache.clear()
+
+
+# Authenticated principals by user id (used by routes.auth_routes.token_required)
+user_cache = TTLCache(ttl=Config.USER_CACHE_TTL, maxsize=Config.USER_CACHE_MAXSIZE, name='user')
+
+
+def invalidate_user(user_id):
+    """Drop a cached user; call after any change to that user's row"""
+    user_cache.invalidate(user_id)
+
+
+class RefreshingValue:
+    """
+    A single cached value that is refreshed in the background.
+
+    Fresh for `ttl` seconds; after that get() keeps returning the stale value
+    (for up to `max_stale` seconds) while one background thread reloads it,
+    so callers never wait on the loader except for the very first load.
+    """
+
+    def __init__(self, loader, ttl, max_stale=None, name=None):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_stale = max_stale if max_stale is not None else ttl * 10
+        self.name = name
+        self._value = None
+        self._loaded_at = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._hit_metric = CACHE_REQUESTS.labels(name or 'unnamed', 'hit')
+        self._miss_metric = CACHE_REQUESTS.labels(name or 'unnamed', 'miss')
+
+    def get(self):
+        """Return the cached value, loading synchronously only if missing or too stale"""
+        now = time.monotonic()
+        with self._lock:
+            age = None if self._loaded_at is None else now - self._loaded_at
+            if age is not None and age < self.ttl:
+                self._hit_metric.inc()
+                return self._value
+            if age is not None and age < self.max_stale:
+                self._hit_metric.inc()
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh, daemon=True).start()
+                return self._value
+        self._miss_metric.inc()
+        return self._load()
+
+    def invalidate(self):
+        """Force the next get() to reload synchronously"""
+        with self._lock:
+            self._loaded_at = None
+
+    def _load(self):
+        value = self.loader()
+        with self._lock:
+            self._value = value
+            self._loaded_at = time.monotonic()
+        return value
+
+    def _refresh(self):
+        try:
+            self._load()
+        except Exception as e:
+            print(f"⚠️  Background refresh of {self.name or 'cached value'} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
@@ -4,7 +4,9 @@ Cloudinary configuration and upload utilities
 import cloudinary
 import cloudinary.uploader
 import os
+import time
 from config import Config
+from utils.metrics import UPLOAD_LATENCY
 
 # Configure Cloudinary
 cloudinary.config(
@@ -26,6 +28,7 @@ def upload_image_to_cloudinary(file, folder="voting-system/profiles"):
         dict: Upload result containing 'url' and 'public_id'
         None: If upload fails
     """
+    started = time.perf_counter()
     try:
         # Upload to Cloudinary
         result = cloudinary.uploader.upload(
@@ -39,11 +42,13 @@ def upload_image_to_cloudinary(file, folder="voting-system/profiles"):
             ]
         )
         
+        UPLOAD_LATENCY.labels('success').observe(time.perf_counter() - started)
         return {
             'url': result.get('secure_url'),
             'public_id': result.get('public_id')
         }
     except Exception as e:
+        UPLOAD_LATENCY.labels('error').observe(time.perf_counter() - started)
         print(f"❌ Cloudinary upload error: {e}")
         return None
 
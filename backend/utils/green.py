@@ -0,0 +1,39 @@
+"""
+Cooperative (gevent) serving support
+
+With SERVER_MODE=async, gunicorn runs gevent workers: the standard library
+is monkey-patched so sockets, locks, queues and sleeps yield to other
+greenlets instead of blocking the process. psycopg2 is a C extension and
+would still block, so make_psycopg_green() installs a wait callback that
+drives libpq in non-blocking mode and waits on the socket through gevent.
+"""
+import psycopg2
+from psycopg2 import extensions
+
+
+def _gevent_wait_callback(conn, timeout=None):
+    """Wait for a non-blocking psycopg2 connection without blocking the event loop"""
+    from gevent.socket import wait_read, wait_write
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise psycopg2.OperationalError(f"Bad result from poll: {state!r}")
+
+
+def make_psycopg_green():
+    """Make every psycopg2 connection cooperative with gevent (call once per worker)"""
+    if not hasattr(extensions, 'set_wait_callback'):
+        raise ImportError("psycopg2 does not support wait callbacks")
+    extensions.set_wait_callback(_gevent_wait_callback)
+
+
+def is_green():
+    """True when the gevent wait callback is active"""
+    return extensions.get_wait_callback() is _gevent_wait_callback
@@ -0,0 +1,110 @@
+"""
+Local image processing and content-addressed thumbnail store
+
+An uploaded image is decoded once and written as one file per size and
+format under <store>/<digest>/, where digest is the SHA-256 of the
+original bytes. Uploading the same image again reuses the existing
+directory. The public path is /uploads/profiles/<digest>, and
+app.serve_upload picks the variant (?size=) and format (Accept header).
+"""
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from PIL import Image, ImageOps
+
+# Longest edge in pixels; images are never upscaled
+VARIANTS = {
+    'avatar': 96,
+    'card': 320,
+    'full': 800,
+}
+DEFAULT_VARIANT = 'full'
+
+# Served format -> (file extension, Pillow save options)
+FORMATS = {
+    'webp': ('webp', {'format': 'WEBP', 'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+DIGEST_LENGTH = 32
+_DIGEST_RE = re.compile(r'^[0-9a-f]{%d}$' % DIGEST_LENGTH)
+
+
+def file_digest(path):
+    """Content address of a file (truncated SHA-256 hex)"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()[:DIGEST_LENGTH]
+
+
+def is_digest(name):
+    return bool(_DIGEST_RE.match(name))
+
+
+def variant_filename(variant, fmt):
+    return f"{variant}.{FORMATS[fmt][0]}"
+
+
+def _flatten(image):
+    """RGB copy of image with any transparency composited onto white (for JPEG)"""
+    if image.mode == 'RGB':
+        return image
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+    return background
+
+
+def process_image(path, store_dir):
+    """Write every variant of the image at `path` into store_dir/<digest>/ and return the digest.
+    Raises ValueError if the file is not a readable image.
+    """
+    digest = file_digest(path)
+    target = os.path.join(store_dir, digest)
+    if os.path.isdir(target):
+        return digest  # already processed (duplicate upload)
+
+    largest = max(VARIANTS.values())
+    try:
+        with Image.open(path) as source:
+            source.draft('RGB', (largest, largest))  # JPEG: decode at reduced scale when possible
+            image = ImageOps.exif_transpose(source)
+            image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+            image.thumbnail((largest, largest), Image.LANCZOS)
+    except (OSError, Image.DecompressionBombError):
+        raise ValueError('Unsupported or corrupt image')
+
+    os.makedirs(store_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=f".{digest}-", dir=store_dir)
+    try:
+        # Largest first so each smaller size is resampled from an already reduced image
+        current = image
+        for variant, size in sorted(VARIANTS.items(), key=lambda item: -item[1]):
+            if max(current.size) > size:
+                current = current.copy()
+                current.thumbnail((size, size), Image.LANCZOS)
+            for fmt, (ext, options) in FORMATS.items():
+                out = current if fmt == 'webp' else _flatten(current)
+                out.save(os.path.join(work_dir, variant_filename(variant, fmt)), **options)
+        try:
+            os.rename(work_dir, target)
+        except OSError:
+            if not os.path.isdir(target):
+                raise
+            shutil.rmtree(work_dir, ignore_errors=True)  # a concurrent upload of the same image won
+    except Exception:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+    return digest
+
+
+def resolve_variant(store_dir, digest, size=None, accept=''):
+    """Return (relative path, format) of the best stored variant, or None if unknown"""
+    if not is_digest(digest) or not os.path.isdir(os.path.join(store_dir, digest)):
+        return None
+    variant = size if size in VARIANTS else DEFAULT_VARIANT
+    fmt = 'webp' if 'image/webp' in (accept or '') else 'jpeg'
+    return f"{digest}/{variant_filename(variant, fmt)}", fmt
@@ -0,0 +1,102 @@
+"""
+Prometheus metrics for the voting backend
+
+Metrics are aggregated in-process by prometheus_client. Under gunicorn,
+set PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py does this) so every worker
+writes its samples to shared mmap files and /metrics reports the sum
+across workers.
+"""
+import os
+import threading
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    REGISTRY,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# HTTP
+REQUEST_COUNT = Counter(
+    'voting_http_requests_total', 'HTTP requests handled',
+    ['blueprint', 'endpoint', 'method', 'status']
+)
+REQUEST_LATENCY = Histogram(
+    'voting_http_request_duration_seconds', 'HTTP request latency',
+    ['blueprint', 'endpoint', 'method'], buckets=LATENCY_BUCKETS
+)
+
+# Votes (votes per second = rate(voting_votes_cast_total[1m]))
+VOTES_CAST = Counter('voting_votes_cast_total', 'Votes recorded')
+VOTE_REJECTIONS = Counter(
+    'voting_vote_rejections_total', 'Rejected vote attempts',
+    ['reason']  # voting_closed, duplicate, unknown_candidate
+)
+
+VOTE_BATCH_SIZE = Histogram(
+    'voting_vote_batch_size', 'Votes committed per group-commit batch (VOTE_INGEST_MODE=batch)',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+# Requests rejected by utils.rate_limit
+RATE_LIMITED = Counter('voting_rate_limited_total', 'Requests rejected by rate limiting', ['rule'])
+
+# Database pool (gauges summed over live workers)
+DB_POOL_CONNECTIONS = Gauge(
+    'voting_db_pool_connections', 'Database pool connections by state',
+    ['state'], multiprocess_mode='livesum'
+)
+DB_POOL_CHECKOUTS = Counter('voting_db_pool_checkouts_total', 'Connections checked out of the pool')
+DB_POOL_WAITS = Counter('voting_db_pool_waits_total', 'Checkouts that had to wait for a free connection')
+DB_POOL_TIMEOUTS = Counter('voting_db_pool_timeouts_total', 'Checkouts that timed out')
+DB_POOL_ACQUIRE = Histogram(
+    'voting_db_pool_acquire_seconds', 'Time to acquire a pooled connection',
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+DB_QUERY_LATENCY = Histogram(
+    'voting_db_query_duration_seconds', 'execute_query statement latency', buckets=LATENCY_BUCKETS
+)
+
+# Caches (hit ratio = hits / (hits + misses))
+CACHE_REQUESTS = Counter('voting_cache_requests_total', 'Cache lookups', ['cache', 'result'])
+
+# Cloudinary
+UPLOAD_LATENCY = Histogram(
+    'voting_cloudinary_upload_duration_seconds', 'Cloudinary upload latency',
+    ['outcome'], buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+)
+
+_pool_counters_seen = {'checkouts': 0, 'waits': 0, 'timeouts': 0}
+_pool_counters_lock = threading.Lock()
+
+
+def sync_pool_metrics(stats):
+    """Publish a models.get_pool_stats() snapshot: gauges are set, counters advance by the delta"""
+    if not stats:
+        return
+    for state in ('size', 'idle', 'in_use', 'overflow'):
+        DB_POOL_CONNECTIONS.labels(state).set(stats[state])
+    with _pool_counters_lock:
+        for name, counter in (('checkouts', DB_POOL_CHECKOUTS), ('waits', DB_POOL_WAITS), ('timeouts', DB_POOL_TIMEOUTS)):
+            current = stats[name]
+            seen = _pool_counters_seen[name]
+            if current < seen:  # pool was recreated (e.g. after fork)
+                seen = 0
+            if current > seen:
+                counter.inc(current - seen)
+            _pool_counters_seen[name] = current
+
+
+def render_metrics():
+    """Return (body, content_type) for the /metrics endpoint"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
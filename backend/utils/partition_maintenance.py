@@ -0,0 +1,53 @@
+"""
+In-process upkeep of the votes partitions
+
+votes has no DEFAULT partition, so a vote dated past the last monthly
+partition fails. gunicorn's master creates VOTE_PARTITION_MONTHS_AHEAD
+months on start, and manage_partitions.py does it when scheduled; this
+timer keeps a long-running deployment covered without either: every
+worker process creates the missing months every
+VOTE_PARTITION_CHECK_INTERVAL seconds. Creating partitions is
+idempotent and safe to run concurrently.
+"""
+import os
+import threading
+import time
+from config import Config
+
+
+class PartitionMaintainer:
+    """Periodically run Vote.ensure_partitions on a daemon thread (one per process)"""
+
+    def __init__(self, months_ahead, interval):
+        self.months_ahead = months_ahead
+        self.interval = interval
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the timer thread (again after a fork); the first check runs right away"""
+        with self._lock:
+            if self._pid == os.getpid() or self.interval <= 0:
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='vote-partitions', daemon=True).start()
+
+    def _run(self):
+        while True:
+            self.check()
+            time.sleep(self.interval)
+
+    def check(self):
+        """Create missing partitions; returns how many were created (None if votes is not partitioned)"""
+        from models.vote_model import Vote
+        try:
+            created = Vote.ensure_partitions(self.months_ahead)
+            if created:
+                print(f"🗂️  Created {created} votes partition(s)")
+            return created
+        except Exception as e:
+            print(f"⚠️  Could not check votes partitions (retrying in {self.interval:.0f}s): {e}")
+            return None
+
+
+partition_maintainer = PartitionMaintainer(Config.VOTE_PARTITION_MONTHS_AHEAD, Config.VOTE_PARTITION_CHECK_INTERVAL)
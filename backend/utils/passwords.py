@@ -0,0 +1,122 @@
+"""
+Password hashing off the request thread
+
+Hashing and verification run in a small per-worker process pool, so a
+burst of logins cannot take all the CPU away from request handling.
+Admission control caps the queue: when PASSWORD_HASH_MAX_PENDING operations
+are already in flight, new ones fail fast with PasswordHasherBusy (the
+routes answer 503) instead of piling up behind each other.
+
+PASSWORD_HASH_METHOD selects the werkzeug hash parameters; hashes created
+with other parameters are reported by needs_rehash() so they can be
+upgraded on the next successful login.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash
+from config import Config
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hash operations are already queued"""
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(stored_hash, password):
+    return check_password_hash(stored_hash, password)
+
+
+def _method_of(password_hash):
+    return password_hash.split('$', 1)[0] if password_hash else ''
+
+
+class PasswordHasher:
+    """Bounded process pool for password hashing; workers=0 runs inline (scripts, tests)"""
+
+    def __init__(self, method, workers=2, max_pending=64, timeout=30):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        # Canonical parameter string (werkzeug expands e.g. 'pbkdf2' to 'pbkdf2:sha256:<iterations>')
+        self.method_id = _method_of(generate_password_hash('', method=method))
+        self._executor = None
+        self._executor_pid = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _ensure_executor(self):
+        # One pool per worker process, created on first use (and again after a fork)
+        if self._executor is None or self._executor_pid != os.getpid():
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            if self._executor_pid != os.getpid():
+                self._pending = 0
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def _submit(self, executor, fn, args):
+        """Submit with a pending slot already taken; the slot is released when the operation
+        finishes in the pool, not when the caller stops waiting, so max_pending bounds the queue
+        """
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PasswordHasherBusy('Server is busy, please try again shortly')
+            executor = self._ensure_executor()
+            self._pending += 1
+        try:
+            return self._submit(executor, fn, args).result(timeout=self.timeout)
+        except BrokenProcessPool:
+            # A pool process died (e.g. OOM-killed); start a fresh pool and retry once
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+                executor = self._ensure_executor()
+                self._pending += 1
+            return self._submit(executor, fn, args).result(timeout=self.timeout)
+
+    def hash(self, password):
+        """Hash a password with the configured method"""
+        return self._run(_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        """Check a password against a stored werkzeug hash"""
+        return self._run(_verify, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        """True if stored_hash was created with different parameters than the configured ones"""
+        return _method_of(stored_hash) != self.method_id
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.workers, 'pending': self._pending, 'max_pending': self.max_pending, 'method': self.method_id}
+
+
+password_hasher = PasswordHasher(
+    Config.PASSWORD_HASH_METHOD,
+    workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING,
+    timeout=Config.PASSWORD_HASH_TIMEOUT
+)
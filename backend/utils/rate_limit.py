@@ -0,0 +1,249 @@
+"""
+Rate limiting for abuse-prone endpoints (login, register, vote)
+
+Each rule is a token bucket of `capacity` requests refilled evenly over
+`period` seconds, keyed by client IP, submitted email or user id. Login
+failures are additionally counted in a sliding window per email and per
+IP; once the limit is reached further attempts are rejected without
+touching the database or the password hasher.
+
+Buckets live in process memory by default (bounded LRU). Set
+RATE_LIMIT_BACKEND=redis and RATE_LIMIT_REDIS_URL to share them between
+workers and hosts (requires the optional `redis` package).
+"""
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from functools import wraps
+import jwt
+from flask import request, jsonify
+from config import Config
+from utils.metrics import RATE_LIMITED
+
+
+def parse_rate(value):
+    """'30/60' -> (30, 60.0): 30 requests per 60 seconds"""
+    count, _, period = str(value).partition('/')
+    return int(count), float(period or 1)
+
+
+class MemoryStore:
+    """Per-process token buckets and sliding windows (LRU-bounded)"""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()  # key -> [tokens, updated_at]
+        self._windows = OrderedDict()  # key -> deque of timestamps
+        self._lock = threading.Lock()
+
+    def _touch(self, table, key, default):
+        entry = table.get(key)
+        if entry is None:
+            entry = table[key] = default()
+            while len(table) > self.maxsize:
+                table.popitem(last=False)
+        else:
+            table.move_to_end(key)
+        return entry
+
+    def take(self, key, capacity, period):
+        """Take one token. Returns (allowed, retry_after_seconds)."""
+        rate = capacity / period
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._touch(self._buckets, key, lambda: [float(capacity), now])
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True, 0
+            return False, (1 - bucket[0]) / rate
+
+    def count(self, key, window):
+        """Events recorded under key within the last `window` seconds"""
+        now = time.monotonic()
+        with self._lock:
+            events = self._windows.get(key)
+            if not events:
+                return 0
+            while events and events[0] <= now - window:
+                events.popleft()
+            return len(events)
+
+    def record(self, key, window, limit):
+        now = time.monotonic()
+        with self._lock:
+            events = self._touch(self._windows, key, lambda: deque(maxlen=limit))
+            events.append(now)
+
+    def retry_after(self, key, window):
+        with self._lock:
+            events = self._windows.get(key)
+            oldest = events[0] if events else None
+        return max(0.0, oldest + window - time.monotonic()) if oldest is not None else 0.0
+
+    def clear(self, key):
+        with self._lock:
+            self._windows.pop(key, None)
+
+
+class RedisStore:
+    """Token buckets and sliding windows shared through Redis"""
+
+    _TAKE = """
+        local capacity = tonumber(ARGV[1])
+        local rate = tonumber(ARGV[2])
+        local now = tonumber(ARGV[3])
+        local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+        local tokens = tonumber(state[1]) or capacity
+        local ts = tonumber(state[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+        local allowed = 0
+        if tokens >= 1 then
+            tokens = tokens - 1
+            allowed = 1
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+        redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+        return {allowed, tostring((1 - tokens) / rate)}
+    """
+
+    def __init__(self, url, prefix='ratelimit:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._take = self.client.register_script(self._TAKE)
+
+    def take(self, key, capacity, period):
+        allowed, retry_after = self._take(keys=[self.prefix + key], args=[capacity, capacity / period, time.time()])
+        return bool(allowed), 0 if allowed else float(retry_after)
+
+    def count(self, key, window):
+        name = self.prefix + key
+        pipe = self.client.pipeline()
+        pipe.zremrangebyscore(name, 0, time.time() - window)
+        pipe.zcard(name)
+        return pipe.execute()[1]
+
+    def record(self, key, window, limit):
+        name = self.prefix + key
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.zadd(name, {f"{now}:{uuid.uuid4().hex[:8]}": now})
+        pipe.zremrangebyrank(name, 0, -limit - 1)
+        pipe.expire(name, int(math.ceil(window)))
+        pipe.execute()
+
+    def retry_after(self, key, window):
+        oldest = self.client.zrange(self.prefix + key, 0, 0, withscores=True)
+        return max(0.0, oldest[0][1] + window - time.time()) if oldest else 0.0
+
+    def clear(self, key):
+        self.client.delete(self.prefix + key)
+
+
+def _create_store():
+    if Config.RATE_LIMIT_BACKEND == 'redis':
+        try:
+            return RedisStore(Config.RATE_LIMIT_REDIS_URL)
+        except ImportError:
+            print("⚠️  RATE_LIMIT_BACKEND=redis but the redis package is not installed; using in-memory rate limits")
+    return MemoryStore(maxsize=Config.RATE_LIMIT_MAX_KEYS)
+
+
+store = _create_store()
+
+
+# Key functions (return None to skip the rule for this request)
+
+def client_ip():
+    # Behind TRUSTED_PROXY_HOPS proxies, app.py's ProxyFix has already replaced remote_addr with
+    # the address the outermost trusted proxy saw (not the client-controlled leftmost entry)
+    return request.remote_addr or 'unknown'
+
+
+def submitted_email():
+    data = request.get_json(silent=True) or {}
+    email = data.get('email')
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+def token_user():
+    """User id from a valid Bearer token (no database access)"""
+    auth_header = request.headers.get('Authorization', '')
+    parts = auth_header.split(' ')
+    if len(parts) != 2:
+        return None
+    try:
+        return str(jwt.decode(parts[1], Config.JWT_SECRET_KEY, algorithms=["HS256"]).get('user_id'))
+    except jwt.InvalidTokenError:
+        return None
+
+
+def too_many_requests(rule, retry_after):
+    RATE_LIMITED.labels(rule).inc()
+    response = jsonify({'error': {'code': 'RATE_LIMITED', 'message': 'Too many requests, please try again later'}})
+    response.headers['Retry-After'] = str(max(1, int(math.ceil(retry_after))))
+    return response, 429
+
+
+def rate_limit(*rules):
+    """Decorator applying token-bucket rules: (name, key_func, 'count/seconds')"""
+    parsed = [(name, key_func, parse_rate(rate)) for name, key_func, rate in rules]
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if Config.RATE_LIMIT_ENABLED:
+                for name, key_func, (capacity, period) in parsed:
+                    key = key_func()
+                    if key is None:
+                        continue
+                    allowed, retry_after = store.take(f"{name}:{key}", capacity, period)
+                    if not allowed:
+                        return too_many_requests(name, retry_after)
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
+
+
+class FailureTracker:
+    """Sliding-window count of failed logins per email and per IP"""
+
+    def __init__(self, email_limit, ip_limit, window):
+        self.email_limit = email_limit
+        self.ip_limit = ip_limit
+        self.window = window
+
+    def _keys(self, email, ip):
+        keys = []
+        if email:
+            keys.append((f"login_fail_email:{email}", self.email_limit))
+        if ip:
+            keys.append((f"login_fail_ip:{ip}", self.ip_limit))
+        return keys
+
+    def blocked(self, email, ip):
+        """Retry-After seconds if the email or IP has too many recent failures, else None"""
+        if not Config.RATE_LIMIT_ENABLED:
+            return None
+        for key, limit in self._keys(email, ip):
+            if store.count(key, self.window) >= limit:
+                return store.retry_after(key, self.window)
+        return None
+
+    def failed(self, email, ip):
+        if Config.RATE_LIMIT_ENABLED:
+            for key, limit in self._keys(email, ip):
+                store.record(key, self.window, limit)
+
+    def succeeded(self, email):
+        if Config.RATE_LIMIT_ENABLED and email:
+            store.clear(f"login_fail_email:{email}")
+
+
+login_failures = FailureTracker(
+    Config.LOGIN_MAX_FAILURES_PER_EMAIL, Config.LOGIN_MAX_FAILURES_PER_IP, Config.LOGIN_FAILURE_WINDOW
+)
@@ -0,0 +1,109 @@
+"""
+Live vote tally fan-out for Server-Sent Events.
+
+The vote insert path emits pg_notify('vote_tallies', ...) in the same
+statement as the tally update. Each worker process keeps ONE dedicated
+LISTEN connection and fans notifications out to in-memory subscriber
+queues, so watchers cost no per-poll queries.
+"""
+import json
+import os
+import queue
+import select
+import threading
+import time
+import psycopg2
+import psycopg2.extensions
+from config import Config
+
+TALLY_CHANNEL = 'vote_tallies'
+
+
+class TallyBroadcaster:
+    """Fan out Postgres notifications on `channel` to subscriber queues"""
+
+    def __init__(self, connect, channel=TALLY_CHANNEL, queue_size=100, max_subscribers=1000):
+        self._connect = connect
+        self._channel = channel
+        self._queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def subscribe(self):
+        """Register a subscriber; returns its queue, or None when at capacity"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscriber = queue.Queue(maxsize=self._queue_size)
+            self._subscribers.add(subscriber)
+            # (Re)start the listener lazily, and again in a forked worker
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._listen, name='tally-listener', daemon=True)
+                self._thread.start()
+            return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event):
+        """Deliver an event to every subscriber without blocking; slow subscribers lose their oldest event"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                try:
+                    subscriber.get_nowait()
+                    subscriber.put_nowait(event)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def _listen(self):
+        backoff = 1
+        while True:
+            conn = None
+            try:
+                conn = self._connect()
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {self._channel}")
+                backoff = 1
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notification = conn.notifies.pop(0)
+                        try:
+                            self.publish(json.loads(notification.payload))
+                        except ValueError:
+                            print(f"❌ Ignoring malformed tally notification: {notification.payload!r}")
+            except Exception as e:
+                print(f"❌ Tally listener error, reconnecting in {backoff}s: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+def _connect():
+    # Dedicated connection: LISTEN must stay on one session, so it never comes from the pool
+    from models import get_db_connection
+    return get_db_connection()
+
+
+tally_broadcaster = TallyBroadcaster(_connect, max_subscribers=Config.SSE_MAX_SUBSCRIBERS)
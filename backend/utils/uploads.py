@@ -0,0 +1,276 @@
+"""
+Background profile picture uploads
+
+Requests only stage the file locally and enqueue a job; a bounded pool of
+worker threads pushes it to the storage backend (with retries) and then
+points users.profile_pic / candidates.profile_pic at the stored image.
+
+Job state lives next to the staged file as <job_id>.json so any worker
+process on the host can answer status requests. Status files of finished
+jobs are swept after status_ttl seconds. A job still pending after
+pending_timeout seconds was lost with the process running it: it is marked
+failed (and its staged file removed) by the sweep or the next status request.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.utils import secure_filename
+from config import Config
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(__file__))
+PROFILES_FOLDER = os.path.join(BACKEND_DIR, 'uploads', 'profiles')
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+# Which rows a finished upload updates
+TARGET_USER = 'user'
+TARGET_CANDIDATE = 'candidate'
+
+
+class UploadQueueFull(Exception):
+    """Raised by submit() when max_pending uploads are already queued"""
+
+
+class CloudinaryBackend:
+    """Stores images in Cloudinary (resizing is done by Cloudinary's transformations)"""
+
+    def store(self, path):
+        from utils.cloudinary_config import upload_image_to_cloudinary
+        result = upload_image_to_cloudinary(path, folder="voting-system/profiles")
+        if not result or not result.get('url'):
+            raise IOError('Cloudinary upload failed')
+        return result['url']
+
+
+class LocalBackend:
+    """Resizes images locally (utils.images) into a content-addressed store under uploads/profiles,
+    served by app.serve_upload"""
+
+    def __init__(self, folder=PROFILES_FOLDER, url_prefix='/uploads/profiles'):
+        self.folder = folder
+        self.url_prefix = url_prefix
+        os.makedirs(folder, exist_ok=True)
+
+    def store(self, path):
+        from utils.images import process_image
+        digest = process_image(path, self.folder)
+        return f"{self.url_prefix}/{digest}"
+
+
+BACKENDS = {
+    'cloudinary': CloudinaryBackend,
+    'local': LocalBackend,
+}
+
+
+def _apply_profile_pic(user_id, url, targets):
+    """Persist a finished upload on the user's and/or candidate's row"""
+    from models.user_model import User
+    from models.candidate_model import Candidate
+    if TARGET_USER in targets:
+        User.update_profile_pic(user_id, url)
+    if TARGET_CANDIDATE in targets:
+        Candidate.update_profile_pic(user_id, url)
+
+
+class UploadQueue:
+    """Stage uploads on disk and process them on a bounded thread pool with retries"""
+
+    def __init__(self, backend, staging_dir, workers=2, max_pending=100, retries=3, backoff=1.0, on_complete=_apply_profile_pic,
+                 status_ttl=86400, sweep_interval=600, pending_timeout=3600):
+        self.backend = backend
+        self.staging_dir = staging_dir
+        self.retries = retries
+        self.backoff = backoff
+        self.max_pending = max_pending
+        self.on_complete = on_complete
+        self.status_ttl = status_ttl
+        self.sweep_interval = sweep_interval
+        self.pending_timeout = pending_timeout
+        self._last_sweep = 0.0
+        self._workers = workers
+        self._executor = None
+        self._executor_pid = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        os.makedirs(staging_dir, exist_ok=True)
+
+    def _ensure_executor(self):
+        # Created lazily (and again after a fork) so each worker process owns its threads
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='upload')
+            self._executor_pid = os.getpid()
+            self._pending = 0
+        return self._executor
+
+    def submit(self, file, user_id, targets=(TARGET_USER,)):
+        """Stage a werkzeug FileStorage and queue it. Returns the job status dict."""
+        with self._lock:
+            executor = self._ensure_executor()
+            if self._pending >= self.max_pending:
+                raise UploadQueueFull('Too many uploads in progress, please try again shortly')
+            self._pending += 1
+
+        try:
+            job_id = uuid.uuid4().hex
+            ext = os.path.splitext(secure_filename(file.filename or ''))[1].lower()
+            staged_path = os.path.join(self.staging_dir, f"{job_id}{ext}")
+            file.save(staged_path)
+            job = {
+                'id': job_id,
+                'status': PENDING,
+                'user_id': user_id,
+                'targets': list(targets),
+                'attempts': 0,
+                'profile_pic': None,
+                'error': None,
+                'created_at': time.time()
+            }
+            self._write_status(job)
+            executor.submit(self._process, job, staged_path)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return self._public(job)
+
+    def status(self, job_id, user_id=None):
+        """Return the job status dict, or None if unknown (or owned by another user)"""
+        if not job_id or not job_id.isalnum():
+            return None
+        try:
+            with open(self._status_path(job_id)) as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if user_id is not None and job.get('user_id') != user_id:
+            return None
+        self._expire_if_abandoned(job)
+        return self._public(job)
+
+    def _process(self, job, staged_path):
+        try:
+            while True:
+                job['attempts'] += 1
+                try:
+                    url = self.backend.store(staged_path)
+                    self.on_complete(job['user_id'], url, job['targets'])
+                    job.update(status=DONE, profile_pic=url, error=None)
+                    break
+                except Exception as e:
+                    job['error'] = str(e)
+                    # ValueError means the file itself is unusable; retrying cannot help
+                    if isinstance(e, ValueError) or job['attempts'] > self.retries:
+                        job['status'] = FAILED
+                        print(f"❌ Upload {job['id']} failed after {job['attempts']} attempts: {e}")
+                        break
+                    time.sleep(self.backoff * (2 ** (job['attempts'] - 1)))
+            self._write_status(job)
+        finally:
+            try:
+                os.remove(staged_path)
+            except OSError:
+                pass
+            with self._lock:
+                self._pending -= 1
+            self._maybe_sweep()
+
+    def _maybe_sweep(self):
+        with self._lock:
+            now = time.time()
+            if now - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = now
+        try:
+            removed, abandoned = self.sweep(now)
+            if removed or abandoned:
+                print(f"🧹 Removed {removed} expired upload status file(s), failed {abandoned} abandoned upload(s)")
+        except Exception as e:
+            print(f"⚠️  Upload status sweep failed: {e}")
+
+    def sweep(self, now=None):
+        """Delete the status files of done or failed jobs that finished more than status_ttl
+        seconds ago (the file is last written when the job finishes), and fail jobs pending for
+        more than pending_timeout. Returns (status files removed, jobs failed).
+        """
+        now = now or time.time()
+        cutoff = now - min(self.status_ttl, self.pending_timeout)
+        removed = abandoned = 0
+        for entry in os.scandir(self.staging_dir):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                if entry.stat().st_mtime > cutoff:
+                    continue
+                with open(entry.path) as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if job.get('status') == PENDING:
+                abandoned += self._expire_if_abandoned(job, now)
+            elif entry.stat().st_mtime <= now - self.status_ttl:
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed, abandoned
+
+    def _expire_if_abandoned(self, job, now=None):
+        """Mark a job failed when it has been pending longer than any attempt can take (its
+        process died). Removes the staged file. Returns True if the job was failed.
+        """
+        if job.get('status') != PENDING or (now or time.time()) - job.get('created_at', 0) < self.pending_timeout:
+            return False
+        for name in os.listdir(self.staging_dir):
+            if name.startswith(job['id'] + '.') and not name.startswith(job['id'] + '.json'):
+                try:
+                    os.remove(os.path.join(self.staging_dir, name))
+                except OSError:
+                    pass
+        job.update(status=FAILED, error='Upload was interrupted, please try again')
+        self._write_status(job)
+        return True
+
+    def _status_path(self, job_id):
+        return os.path.join(self.staging_dir, f"{job_id}.json")
+
+    def _write_status(self, job):
+        # Unique temp name: a status request and the sweep may both fail an abandoned job
+        tmp = f"{self._status_path(job['id'])}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(job, f)
+        os.replace(tmp, self._status_path(job['id']))
+
+    @staticmethod
+    def _public(job):
+        return {
+            'upload_id': job['id'],
+            'status': job['status'],
+            'profile_pic': job['profile_pic'],
+            'error': job['error'] if job['status'] == FAILED else None
+        }
+
+
+def _create_queue():
+    backend_cls = BACKENDS.get(Config.UPLOAD_BACKEND)
+    if backend_cls is None:
+        raise ValueError(f"Unknown UPLOAD_BACKEND '{Config.UPLOAD_BACKEND}' (expected one of {sorted(BACKENDS)})")
+    return UploadQueue(
+        backend_cls(),
+        staging_dir=Config.UPLOAD_STAGING_DIR or os.path.join(BACKEND_DIR, 'uploads', 'staging'),
+        workers=Config.UPLOAD_WORKERS,
+        max_pending=Config.UPLOAD_MAX_PENDING,
+        retries=Config.UPLOAD_RETRIES,
+        backoff=Config.UPLOAD_RETRY_BACKOFF,
+        status_ttl=Config.UPLOAD_STATUS_TTL,
+        pending_timeout=Config.UPLOAD_PENDING_TIMEOUT
+    )
+
+
+upload_queue = _create_queue()
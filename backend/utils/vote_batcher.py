@@ -0,0 +1,85 @@
+"""
+Group commit for votes (VOTE_INGEST_MODE=batch)
+
+Votes arriving on different request threads within VOTE_BATCH_WINDOW_MS
+of each other are cast in a single Vote.cast_votes_batch statement, so
+they share one transaction and one commit. The first request to join an
+empty batch is its leader: it waits out the window (or until the batch
+holds VOTE_BATCH_MAX votes), runs the statement and hands each follower
+its own outcome. Votes that arrive meanwhile start the next batch, so
+batches are pipelined rather than serialised.
+
+Unlike the write-behind queue (utils.vote_queue), the request only
+returns once its vote is committed, with the same answer the direct path
+would have given.
+"""
+import threading
+from utils.metrics import VOTE_BATCH_SIZE
+
+
+class _Batch:
+    def __init__(self):
+        self.votes = []
+        self.outcomes = None
+        self.error = None
+        self.full = threading.Event()  # max size reached, the leader may stop waiting
+        self.done = threading.Event()  # outcomes (or error) are available
+
+
+class VoteBatcher:
+    def __init__(self, cast_batch, window=0.002, max_batch=64):
+        self.cast_batch = cast_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._open = None  # batch still accepting votes
+
+    def cast(self, user_id, candidate_id):
+        """Cast one vote as part of a group commit and return its outcome dict
+        (same shape as Vote.try_cast_vote). Re-raises the batch's database error.
+        """
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            index = len(batch.votes)
+            batch.votes.append((user_id, candidate_id))
+            if len(batch.votes) >= self.max_batch:
+                self._open = None
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+            self._commit(batch)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.outcomes[index]
+
+    def _commit(self, batch):
+        try:
+            batch.outcomes = self.cast_batch(batch.votes)
+            VOTE_BATCH_SIZE.observe(len(batch.votes))
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+
+
+def _create_batcher():
+    from config import Config
+    from models.vote_model import Vote
+    return VoteBatcher(
+        Vote.cast_votes_batch,
+        window=Config.VOTE_BATCH_WINDOW_MS / 1000.0,
+        max_batch=Config.VOTE_BATCH_MAX
+    )
+
+
+vote_batcher = _create_batcher()
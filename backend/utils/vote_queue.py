@@ -0,0 +1,381 @@
+"""
+Write-behind vote ingestion (VOTE_INGEST_MODE=queue)
+
+Accepted votes are appended to a per-process, append-only log and the
+request is acknowledged once the record has been fsynced. Appends that
+arrive while an fsync is running are written and synced together, so one
+fsync covers a whole burst. A background flusher inserts durable records
+with Vote.cast_votes_batch (multi-row, one commit), which still enforces
+one vote per user per day in the database, and keeps the outcome so
+/api/voters/my-vote can report pending / cast / rejected.
+
+Each log is created and locked under a temporary name before it is renamed
+into place, so recovery never picks up a live one. Logs are named uniquely per
+process start, so a restarted process with the same hostname and pid
+never reopens a dead one's log. A background thread replays logs left by
+processes that died, from their checkpoint, at start-up and periodically
+afterwards. Replaying is safe because votes that were already inserted
+come back as duplicates.
+
+A batch rejected by the database (anything but a transient connection
+error) is inserted again record by record, so one bad record cannot block
+the queue. Records that still fail are appended to dead-letter.jsonl and
+reported as FAILED.
+"""
+import fcntl
+import glob
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+PENDING = 'pending'
+FAILED = 'failed'
+
+_RECORD_FIELDS = ('seq', 'user_id', 'candidate_id', 'vote_date', 'ts')
+
+
+class VoteQueueError(Exception):
+    """Raised when a vote could not be made durable"""
+
+
+class VoteQueue:
+    def __init__(self, directory, cast_batch, batch_size=500, flush_interval=0.05,
+                 ack_timeout=5.0, segment_bytes=16 * 1024 * 1024, max_outcomes=100000,
+                 transient_errors=(), recover_interval=60.0):
+        self.directory = directory
+        self.cast_batch = cast_batch
+        self.transient_errors = tuple(transient_errors)  # retried as a whole, never dead-lettered
+        self.recover_interval = recover_interval
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.ack_timeout = ack_timeout
+        self.segment_bytes = segment_bytes
+        self.max_outcomes = max_outcomes
+        self._pid = None
+        self._lock = threading.Condition()
+
+    # Lifecycle
+
+    def start(self):
+        """Open this process's log and start the writer, flusher and recovery threads.
+        Call it at worker start so orphaned logs are replayed before (and without) any new vote.
+        """
+        self._ensure_started()
+
+    def _ensure_started(self):
+        """Open this process's log and start its threads (first use, and again after a fork)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            name = f"votes-{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.log"
+            self._path = os.path.join(self.directory, name)
+            # Created and locked under a name recovery does not match, then renamed (the lock
+            # stays on the inode): no other process can find the log before it is locked
+            self._file = open(self._path + '.new', 'xb', buffering=0)
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            os.rename(self._path + '.new', self._path)
+            self._seq = 0            # last sequence number handed out
+            self._durable_seq = 0    # last sequence number fsynced
+            self._flushed_seq = 0    # last sequence number inserted into votes (or dead-lettered)
+            self._to_write = []      # records waiting for the writer
+            self._writing = []       # records being written (may already be on disk)
+            self._to_flush = []      # durable records waiting for the flusher
+            self._pending = {}       # (user_id, vote_date) -> record
+            self._outcomes = OrderedDict()  # (user_id, vote_date) -> outcome dict
+            self._pid = os.getpid()
+            threading.Thread(target=self._writer, name='vote-log-writer', daemon=True).start()
+            threading.Thread(target=self._flusher, name='vote-log-flusher', daemon=True).start()
+            threading.Thread(target=self._recoverer, name='vote-log-recovery', daemon=True).start()
+
+    # Request side
+
+    def submit(self, user_id, candidate_id, vote_date):
+        """Append a vote for vote_date (the database's CURRENT_DATE, as the one-vote-per-day
+        check uses) and wait until it is durable. Returns the pending status dict.
+        Raises VoteQueueError if the log could not be written in time.
+        """
+        self._ensure_started()
+        vote_date = vote_date.isoformat()
+        key = (user_id, vote_date)
+        with self._lock:
+            if key in self._pending:
+                return {'status': PENDING, 'duplicate': True}
+            self._seq += 1
+            record = {'seq': self._seq, 'user_id': user_id, 'candidate_id': candidate_id,
+                      'vote_date': vote_date, 'ts': time.time(), 'state': 'queued'}
+            self._to_write.append(record)
+            self._pending[key] = record
+            self._lock.notify_all()
+
+            deadline = time.monotonic() + self.ack_timeout
+            while record['state'] != 'durable':
+                if record['state'] == 'failed':
+                    raise VoteQueueError(f"Vote log write failed: {record['error']}")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    if record['state'] == 'queued':
+                        # Not handed to the writer yet: withdraw it, so "try again" is the truth
+                        self._to_write.remove(record)
+                        self._pending.pop(key, None)
+                        raise VoteQueueError('Timed out waiting for the vote log')
+                    # Being written, possibly already on disk: it will be cast, so report it as pending
+                    break
+                self._lock.wait(remaining)
+        return {'status': PENDING, 'duplicate': False}
+
+    def status(self, user_id, vote_date):
+        """PENDING while queued, the cast outcome after the flush, or None if unknown to this process"""
+        if self._pid != os.getpid():
+            return None
+        key = (user_id, vote_date.isoformat())
+        with self._lock:
+            record = self._pending.get(key)
+            if record is not None:
+                return {'status': PENDING, 'candidate_id': record['candidate_id']}
+            return self._outcomes.get(key)
+
+    def stats(self):
+        if self._pid != os.getpid():
+            return None
+        with self._lock:
+            return {
+                'queued': len(self._pending),
+                'unsynced': len(self._to_write) + len(self._writing),
+                'unflushed': len(self._to_flush),
+                'durable_seq': self._durable_seq,
+                'flushed_seq': self._flushed_seq,
+            }
+
+    # Background threads
+
+    def _writer(self):
+        """Write and fsync everything appended since the last sync (group fsync)"""
+        while True:
+            with self._lock:
+                while not self._to_write:
+                    self._lock.wait()
+                batch, self._to_write = self._to_write, []
+                self._writing = batch
+                for record in batch:
+                    record['state'] = 'writing'
+            offset = self._file.tell()
+            try:
+                data = b''.join(json.dumps({f: r[f] for f in _RECORD_FIELDS}, separators=(',', ':')).encode() + b'\n'
+                                for r in batch)
+                view = memoryview(data)
+                while view:
+                    view = view[self._file.write(view):]
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                self._write_failed(batch, offset, e)
+                continue
+            with self._lock:
+                self._writing = []
+                self._durable_seq = batch[-1]['seq']
+                for record in batch:
+                    record['state'] = 'durable'
+                self._to_flush.extend(batch)
+                self._lock.notify_all()
+
+    def _write_failed(self, batch, offset, error):
+        """Fail the batch if the log can be cut back to before it, otherwise retry it"""
+        try:
+            os.ftruncate(self._file.fileno(), offset)
+            self._file.seek(offset)
+            truncated = True
+        except OSError:
+            truncated = False
+        with self._lock:
+            self._writing = []
+            if truncated:
+                # Nothing of the batch is left in the log: the votes were not taken
+                for record in batch:
+                    record['state'] = 'failed'
+                    record['error'] = error
+                    key = (record['user_id'], record['vote_date'])
+                    if self._pending.get(key) is record:
+                        del self._pending[key]
+            else:
+                # Part of it may be on disk and would be replayed: keep the votes and retry
+                self._to_write[:0] = batch
+            self._lock.notify_all()
+        if not truncated:
+            time.sleep(1)
+
+    def _rows(self, records):
+        return [(r['user_id'], r['candidate_id'], r['vote_date']) for r in records]
+
+    def _flusher(self):
+        """Insert durable records into votes in multi-row batches"""
+        backoff = self.flush_interval
+        while True:
+            with self._lock:
+                while not self._to_flush:
+                    self._lock.wait()
+                # Let a burst accumulate briefly unless a full batch is already waiting
+                if len(self._to_flush) < self.batch_size:
+                    self._lock.wait(self.flush_interval)
+                batch = self._to_flush[:self.batch_size]
+            try:
+                try:
+                    self._complete(batch, self.cast_batch(self._rows(batch)))
+                except self.transient_errors:
+                    raise
+                except Exception as e:
+                    print(f"⚠️  Vote flush rejected ({len(batch)} votes), inserting them one by one: {e}")
+                    for record in batch:
+                        self._complete([record], [self._cast_one(record)])
+            except Exception as e:
+                print(f"⚠️  Vote flush failed (votes stay queued): {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+                continue
+            backoff = self.flush_interval
+
+    def _cast_one(self, record, log_path=None):
+        """Outcome of inserting a single record; a record the database rejects is dead-lettered"""
+        try:
+            return self.cast_batch(self._rows([record]))[0]
+        except self.transient_errors:
+            raise
+        except Exception as e:
+            self._dead_letter(record, e, log_path or self._path)
+            return {'status': FAILED, 'vote_id': None}
+
+    def _dead_letter(self, record, error, log_path):
+        entry = {f: record[f] for f in _RECORD_FIELDS if f in record}
+        entry.update(error=str(error).strip(), log=os.path.basename(log_path), failed_at=time.time())
+        print(f"❌ Vote of user {record['user_id']} for {record['vote_date']} dead-lettered: {entry['error']}")
+        with open(os.path.join(self.directory, 'dead-letter.jsonl'), 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    def _complete(self, batch, outcomes):
+        """Record the outcomes of the records at the head of the flush queue"""
+        with self._lock:
+            del self._to_flush[:len(batch)]
+            for record, outcome in zip(batch, outcomes):
+                key = (record['user_id'], record['vote_date'])
+                self._pending.pop(key, None)
+                self._outcomes[key] = dict(outcome, candidate_id=record['candidate_id'])
+                self._outcomes.move_to_end(key)
+            while len(self._outcomes) > self.max_outcomes:
+                self._outcomes.popitem(last=False)
+            self._flushed_seq = batch[-1]['seq']
+            rotate = self._idle() and self._file.tell() >= self.segment_bytes
+        self._write_checkpoint()
+        if rotate:
+            self._rotate()
+
+    # Checkpoints, rotation and recovery
+
+    def _checkpoint_path(self, log_path):
+        return log_path + '.checkpoint'
+
+    def _write_checkpoint(self, log_path=None, seq=None):
+        # Not fsynced: after a crash, replaying a few extra records only yields duplicates
+        with open(self._checkpoint_path(log_path or self._path), 'w') as f:
+            f.write(str(self._flushed_seq if seq is None else seq))
+
+    def _idle(self):
+        return not (self._to_write or self._writing or self._to_flush)
+
+    def _rotate(self):
+        """Empty the log once everything in it has been inserted"""
+        with self._lock:
+            if not self._idle():
+                return
+            self._file.truncate(0)
+            self._file.seek(0)
+
+    def _recoverer(self):
+        """Replay orphaned logs at start-up, then periodically (workers that die later)"""
+        while True:
+            self._recover_orphans()
+            time.sleep(self.recover_interval)
+
+    def _recover_orphans(self):
+        """Replay logs of processes that exited before flushing everything"""
+        # Logs of processes that died before renaming them hold no votes yet (the age check
+        # leaves alone one that is being created right now)
+        for path in glob.glob(os.path.join(self.directory, 'votes-*.log.new')):
+            try:
+                if time.time() - os.stat(path).st_mtime < self.recover_interval:
+                    continue
+                with open(path, 'rb') as f:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    os.remove(path)
+            except OSError:
+                pass  # still being created, or removed by another process
+        for path in glob.glob(os.path.join(self.directory, 'votes-*.log')):
+            if path == self._path:
+                continue
+            try:
+                with open(path, 'rb+') as f:
+                    try:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        continue  # owned by a live process
+                    if os.fstat(f.fileno()).st_nlink == 0:
+                        continue  # replayed and removed by another process meanwhile
+                    replayed = self._replay(f, path)
+                    # Removed while still locked, so no other process replays it again
+                    if os.path.exists(self._checkpoint_path(path)):
+                        os.remove(self._checkpoint_path(path))
+                    os.remove(path)
+                if replayed:
+                    print(f"♻️  Replayed {replayed} queued votes from {os.path.basename(path)}")
+            except Exception as e:
+                print(f"⚠️  Could not replay {path} (retrying later): {e}")
+
+    def _replay(self, f, path):
+        try:
+            with open(self._checkpoint_path(path)) as cp:
+                checkpoint = int(cp.read().strip() or 0)
+        except (OSError, ValueError):
+            checkpoint = 0
+        records = []
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn write at the tail
+            if record.get('seq', 0) > checkpoint:
+                records.append(record)
+        for i in range(0, len(records), self.batch_size):
+            batch = records[i:i + self.batch_size]
+            try:
+                self.cast_batch(self._rows(batch))
+            except self.transient_errors:
+                raise
+            except Exception:
+                for record in batch:
+                    self._cast_one(record, log_path=path)
+            # Progress survives a transient failure later in the log
+            self._write_checkpoint(path, batch[-1]['seq'])
+        return len(records)
+
+
+def _create_queue():
+    import psycopg2
+    from config import Config
+    from models import PoolTimeout
+    from models.vote_model import Vote
+    backend_dir = os.path.dirname(os.path.dirname(__file__))
+    return VoteQueue(
+        Config.VOTE_QUEUE_DIR or os.path.join(backend_dir, 'vote_queue'),
+        Vote.cast_votes_batch,
+        batch_size=Config.VOTE_QUEUE_BATCH_SIZE,
+        flush_interval=Config.VOTE_QUEUE_FLUSH_MS / 1000.0,
+        ack_timeout=Config.VOTE_QUEUE_ACK_TIMEOUT,
+        transient_errors=(psycopg2.OperationalError, psycopg2.InterfaceError, PoolTimeout)
+    )
+
+
+vote_queue = _create_queue()
@@ -0,0 +1,15 @@
+-- Extend results table with one frozen results snapshot per voting day
+-- Written once after voting closes (8 PM IST) and served for all post-close reads
+-- Run this after voting_system.sql
+
+ALTER TABLE results ADD COLUMN IF NOT EXISTS result_date DATE;
+ALTER TABLE results ADD COLUMN IF NOT EXISTS snapshot JSONB;
+
+-- One row per day (the legacy default row keeps result_date NULL)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_results_result_date ON results(result_date);
+
+-- Display updated table structure
+SELECT column_name, data_type
+FROM information_schema.columns
+WHERE table_name = 'results'
+ORDER BY ordinal_position;
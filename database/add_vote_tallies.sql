@@ -0,0 +1,29 @@
+-- Add vote_tallies table: per-candidate, per-day vote counts maintained on every vote
+-- Results are read from this table instead of counting raw votes on each request
+-- Run this after add_daily_voting.sql
+
+-- Step 1: Create the aggregate table
+CREATE TABLE IF NOT EXISTS vote_tallies (
+    candidate_id INTEGER NOT NULL,
+    vote_date DATE NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (candidate_id, vote_date),
+    FOREIGN KEY (candidate_id) REFERENCES candidates(id) ON DELETE CASCADE
+);
+
+-- Step 2: Backfill from existing votes (also used to reconcile: see backend/rebuild_tallies.py)
+BEGIN;
+LOCK TABLE vote_tallies IN EXCLUSIVE MODE;
+DELETE FROM vote_tallies;
+INSERT INTO vote_tallies (candidate_id, vote_date, count)
+SELECT candidate_id, vote_date, COUNT(*)
+FROM votes
+GROUP BY candidate_id, vote_date;
+COMMIT;
+
+-- Verify the changes
+SELECT vote_date, SUM(count) AS total_votes
+FROM vote_tallies
+GROUP BY vote_date
+ORDER BY vote_date DESC
+LIMIT 7;
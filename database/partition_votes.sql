@@ -0,0 +1,129 @@
+-- Range-partition the votes table by month of vote_date
+-- Every query on votes filters on vote_date (today's vote, today's counts), so the
+-- planner only touches the current month's partition instead of the whole history.
+-- Old months can be detached (kept as plain archive tables) or dropped; their
+-- per-day counts stay in vote_tallies and results.
+-- Run this after add_vote_tallies.sql. Safe to re-run: an already partitioned table is left alone.
+-- Partition maintenance: the app creates future months itself (utils/partition_maintenance.py);
+-- backend/manage_partitions.py detaches old ones (run daily, e.g. from cron)
+
+-- Step 1: Partition helpers
+
+-- Partition holding vote_date d, e.g. votes_2025_01
+CREATE OR REPLACE FUNCTION vote_partition_name(d DATE) RETURNS TEXT AS $$
+    SELECT 'votes_' || to_char(d, 'YYYY_MM');
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Create the missing monthly partitions covering from_date .. to_date; returns how many were created
+CREATE OR REPLACE FUNCTION create_vote_partitions(from_date DATE, to_date DATE) RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_date)::date;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= to_date LOOP
+        IF to_regclass(vote_partition_name(month_start)) IS NULL THEN
+            BEGIN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF votes FOR VALUES FROM (%L) TO (%L)',
+                    vote_partition_name(month_start), month_start, (month_start + INTERVAL '1 month')::date
+                );
+                created := created + 1;
+            EXCEPTION WHEN duplicate_table THEN
+                NULL;  -- created concurrently by another process
+            END;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detach every partition that ends on or before before_date. Detached months are renamed to
+-- <name>_archive (kept for reference, no longer scanned) or dropped when drop_tables is true.
+CREATE OR REPLACE FUNCTION detach_vote_partitions(before_date DATE, drop_tables BOOLEAN DEFAULT FALSE)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    part RECORD;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'votes'::regclass
+          AND c.relname ~ '^votes_[0-9]{4}_[0-9]{2}$'
+          AND (to_date(substr(c.relname, 7), 'YYYY_MM') + INTERVAL '1 month')::date <= before_date
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE votes DETACH PARTITION %I', part.relname);
+        IF drop_tables THEN
+            EXECUTE format('DROP TABLE %I', part.relname);
+        ELSE
+            EXECUTE format('ALTER TABLE %I RENAME TO %I', part.relname, part.relname || '_archive');
+        END IF;
+        RETURN NEXT part.relname;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Step 2: Rebuild votes as a partitioned table (one transaction; votes are blocked meanwhile)
+BEGIN;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'votes'::regclass) THEN
+        RAISE NOTICE 'votes is already partitioned';
+        RETURN;
+    END IF;
+
+    LOCK TABLE votes IN ACCESS EXCLUSIVE MODE;
+    ALTER TABLE votes RENAME TO votes_unpartitioned;
+    ALTER SEQUENCE votes_id_seq OWNED BY NONE;
+
+    -- Free the index/constraint names for the new table
+    EXECUTE (
+        SELECT string_agg(format('ALTER INDEX %I RENAME TO %I', c.relname, left(c.relname, 50) || '_unpartitioned'), '; ')
+        FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = 'votes_unpartitioned'::regclass
+    );
+
+    -- The unique constraint includes vote_date, as partitioned tables require
+    CREATE TABLE votes (
+        id INTEGER NOT NULL DEFAULT nextval('votes_id_seq'),
+        user_id INTEGER NOT NULL,
+        candidate_id INTEGER NOT NULL,
+        vote_date DATE NOT NULL DEFAULT CURRENT_DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id, vote_date),
+        CONSTRAINT votes_user_date_unique UNIQUE (user_id, vote_date),
+        CONSTRAINT votes_user_id_fkey FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+        CONSTRAINT votes_candidate_id_fkey FOREIGN KEY (candidate_id) REFERENCES candidates(id) ON DELETE CASCADE
+    ) PARTITION BY RANGE (vote_date);
+
+    -- A candidate's votes: today's (revoke) and all of them (ON DELETE CASCADE from candidates)
+    CREATE INDEX idx_votes_candidate_date ON votes(candidate_id, vote_date);
+
+    PERFORM create_vote_partitions(
+        LEAST(CURRENT_DATE, (SELECT MIN(vote_date) FROM votes_unpartitioned)),
+        (CURRENT_DATE + INTERVAL '3 months')::date
+    );
+
+    INSERT INTO votes (id, user_id, candidate_id, vote_date, created_at)
+    SELECT id, user_id, candidate_id, COALESCE(vote_date, created_at::date, CURRENT_DATE), created_at
+    FROM votes_unpartitioned;
+
+    DROP TABLE votes_unpartitioned;
+    ALTER SEQUENCE votes_id_seq OWNED BY votes.id;
+
+    RAISE NOTICE 'votes is now partitioned by month';
+END $$;
+
+COMMIT;
+
+ANALYZE votes;
+
+-- Verify the changes
+SELECT c.relname AS partition, pg_get_expr(c.relpartbound, c.oid) AS bounds
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'votes'::regclass
+ORDER BY c.relname;
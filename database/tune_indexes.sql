@@ -0,0 +1,46 @@
+-- Replace generic single-column indexes with indexes shaped like the application's queries
+-- Run this after partition_votes.sql (also fine on an unpartitioned votes table).
+-- Regression check: python backend/check_query_plans.py
+
+-- Step 1: Drop indexes that no query needs (each one is extra work on every insert)
+
+-- Duplicates of the (user_id, vote_date) and email unique constraints
+DROP INDEX IF EXISTS idx_votes_user_date;
+DROP INDEX IF EXISTS idx_users_email;
+-- Replaced by idx_votes_candidate_date below
+DROP INDEX IF EXISTS idx_votes_date;
+DROP INDEX IF EXISTS idx_votes_candidate;
+-- Earlier version of this file: (vote_date, candidate_id) cannot serve candidate_id alone
+DROP INDEX IF EXISTS idx_votes_date_candidate;
+-- Boolean / low-selectivity columns: replaced by partial indexes below
+DROP INDEX IF EXISTS idx_candidates_active;
+DROP INDEX IF EXISTS idx_users_role;
+-- No query looks users up by picture URL
+DROP INDEX IF EXISTS idx_users_profile_pic;
+
+-- Step 2: Indexes matching the query shapes
+
+-- Today's votes for one candidate (revoke), and all of a candidate's votes: the
+-- ON DELETE CASCADE from candidates runs DELETE FROM votes WHERE candidate_id = ...
+-- on every partition. Per-date recounts (rebuild_tallies) read one month's partition.
+CREATE INDEX IF NOT EXISTS idx_votes_candidate_date ON votes(candidate_id, vote_date);
+
+-- Today's counts by candidate (live stream snapshot, results history): index-only scan
+CREATE INDEX IF NOT EXISTS idx_vote_tallies_date ON vote_tallies(vote_date) INCLUDE (candidate_id, count);
+
+-- Active candidates: "WHERE is_active = true ORDER BY name", active ids and the active count
+CREATE INDEX IF NOT EXISTS idx_candidates_active_name ON candidates(name) INCLUDE (id) WHERE is_active = true;
+
+-- Admin lookups (create_admin.py)
+CREATE INDEX IF NOT EXISTS idx_users_admins ON users(id) WHERE role = 'admin';
+
+ANALYZE votes;
+ANALYZE vote_tallies;
+ANALYZE candidates;
+ANALYZE users;
+
+-- Verify the changes
+SELECT tablename, indexname, indexdef
+FROM pg_indexes
+WHERE schemaname = 'public' AND tablename IN ('users', 'candidates', 'votes', 'vote_tallies', 'results')
+ORDER BY tablename, indexname;
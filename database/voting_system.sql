@@ -2,6 +2,7 @@
 -- PostgreSQL / MySQL compatible
 
 -- Drop existing tables if they exist
+DROP TABLE IF EXISTS vote_tallies CASCADE;
 DROP TABLE IF EXISTS votes CASCADE;
 DROP TABLE IF EXISTS candidates CASCADE;
 DROP TABLE IF EXISTS users CASCADE;
@@ -43,6 +44,15 @@ CREATE TABLE votes (
     UNIQUE (user_id, vote_date)  -- One vote per user per day
 );
 
+-- Per-candidate, per-day vote counts (maintained by the vote insert path)
+CREATE TABLE vote_tallies (
+    candidate_id INTEGER NOT NULL,
+    vote_date DATE NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (candidate_id, vote_date),
+    FOREIGN KEY (candidate_id) REFERENCES candidates(id) ON DELETE CASCADE
+);
+
 -- Results table (for finalized results)
 CREATE TABLE results (
     id SERIAL PRIMARY KEY,
@@ -50,6 +60,8 @@ CREATE TABLE results (
     winner_id INTEGER,
     finalized_at TIMESTAMP,
     finalized_by INTEGER,
+    result_date DATE,  -- voting day this snapshot belongs to
+    snapshot JSONB,  -- frozen results payload served after voting closes
     FOREIGN KEY (winner_id) REFERENCES candidates(id) ON DELETE SET NULL,
     FOREIGN KEY (finalized_by) REFERENCES users(id) ON DELETE SET NULL
 );
@@ -59,12 +71,12 @@ INSERT INTO results (is_finalized, winner_id, finalized_at, finalized_by)
 VALUES (FALSE, NULL, NULL, NULL);
 
 -- Create indexes for better performance
-CREATE INDEX idx_votes_user_date ON votes(user_id, vote_date);
-CREATE INDEX idx_votes_candidate ON votes(candidate_id);
-CREATE INDEX idx_votes_date ON votes(vote_date);
-CREATE INDEX idx_candidates_active ON candidates(is_active);
-CREATE INDEX idx_users_email ON users(email);
-CREATE INDEX idx_users_role ON users(role);
+-- (unique constraints already index users.email and votes(user_id, vote_date); see tune_indexes.sql)
+CREATE INDEX idx_votes_candidate_date ON votes(candidate_id, vote_date);
+CREATE INDEX idx_vote_tallies_date ON vote_tallies(vote_date) INCLUDE (candidate_id, count);
+CREATE INDEX idx_candidates_active_name ON candidates(name) INCLUDE (id) WHERE is_active = true;
+CREATE INDEX idx_users_admins ON users(id) WHERE role = 'admin';
+CREATE UNIQUE INDEX idx_results_result_date ON results(result_date);
 
 -- Note: Admin user will be created automatically by init_db.py
 -- Or manually create using: python create_admin.py
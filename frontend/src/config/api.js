@@ -3,8 +3,12 @@ const API_URL = import.meta.env.VITE_API_URL || 'https://online-voting-3plz.onre
 
 export const API_BASE_URL = API_URL;
 
+// Image sizes produced by the backend (longest edge in px)
+const IMAGE_SIZES = { avatar: 96, card: 320, full: 800 };
+
 // Helper function to get full image URL
-export const getImageUrl = (path) => {
+// size: optional 'avatar' | 'card' | 'full' to request a smaller rendition
+export const getImageUrl = (path, size) => {
   if (!path) return null;
   
   // If path already starts with http, check if it's an old Railway URL
@@ -15,9 +19,19 @@ export const getImageUrl = (path) => {
       const pathPart = path.substring(path.indexOf('/uploads'));
       return `${API_BASE_URL}${pathPart}`;
     }
+    // Cloudinary: resize on their CDN
+    if (size && IMAGE_SIZES[size] && path.includes('/image/upload/')) {
+      const edge = IMAGE_SIZES[size];
+      return path.replace('/image/upload/', `/image/upload/c_limit,w_${edge},h_${edge},f_auto,q_auto/`);
+    }
     return path;
   }
   
+  // Content-addressed local uploads pick their variant with ?size=
+  if (size && IMAGE_SIZES[size] && /^\/uploads\/profiles\/[0-9a-f]{32}$/.test(path)) {
+    return `${API_BASE_URL}${path}?size=${size}`;
+  }
+  
   // Otherwise, prepend the backend URL
   return `${API_BASE_URL}${path}`;
 };
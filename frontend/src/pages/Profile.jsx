@@ -5,6 +5,21 @@ import { getImageUrl } from '../config/api';
 
 const DEFAULT_AVATAR = '/default-avatar.svg';
 
+// Profile pictures are uploaded in the background; poll until the upload settles
+const waitForUpload = async (uploadId, token, { interval = 1000, attempts = 60 } = {}) => {
+  for (let i = 0; i < attempts; i++) {
+    const res = await fetch(`/api/auth/profile/picture/${uploadId}`, {
+      headers: { Authorization: `Bearer ${token}` }
+    });
+    const data = await res.json();
+    if (!res.ok) throw new Error(data?.error?.message || 'Upload failed');
+    if (data.status === 'done') return data;
+    if (data.status === 'failed') throw new Error(data.error || 'Upload failed');
+    await new Promise(resolve => setTimeout(resolve, interval));
+  }
+  throw new Error('Upload is taking longer than expected; please check back later');
+};
+
 // Add custom CSS for date picker styling
 if (typeof document !== 'undefined') {
   const style = document.createElement('style');
@@ -227,19 +242,45 @@ export default function Profile() {
     // Initial fetch
     fetchCandidateData();
     
-    // Auto-refresh vote count every 10 seconds if user is a candidate
-    const intervalId = setInterval(() => {
-      if (candidateStatus?.is_candidate) {
-        fetch('/api/candidates/votes', { headers: { Authorization: `Bearer ${token}` } })
-          .then(r => (r.ok ? r.json() : Promise.reject(r)))
-          .then(voteData => setVoteCount(voteData.vote_count || 0))
-          .catch(() => {});
-      }
-    }, 10000); // Refresh every 10 seconds
+    // Live vote count: pushed over Server-Sent Events when the server streams (async workers),
+    // otherwise auto-refresh every 10 seconds if user is a candidate
+    const candidateId = candidateStatus?.candidate?.id;
+    let eventSource = null;
+    let intervalId = null;
+    const startPolling = () => {
+      intervalId = setInterval(() => {
+        if (candidateStatus?.is_candidate) {
+          fetch('/api/candidates/votes', { headers: { Authorization: `Bearer ${token}` } })
+            .then(r => (r.ok ? r.json() : Promise.reject(r)))
+            .then(voteData => setVoteCount(voteData.vote_count || 0))
+            .catch(() => {});
+        }
+      }, 10000); // Refresh every 10 seconds
+    };
+    if (candidateStatus?.is_candidate && candidateId && window.EventSource) {
+      eventSource = new EventSource('/api/candidates/stream');
+      eventSource.addEventListener('snapshot', (e) => {
+        const tallies = JSON.parse(e.data).tallies || {};
+        setVoteCount(tallies[candidateId] || 0);
+      });
+      eventSource.addEventListener('tally', (e) => {
+        const tally = JSON.parse(e.data);
+        if (tally.candidate_id === candidateId) setVoteCount(tally.vote_count || 0);
+      });
+      // CLOSED: the server refused the stream (e.g. 404 when disabled); otherwise the browser reconnects
+      eventSource.onerror = () => {
+        if (eventSource.readyState === EventSource.CLOSED && !intervalId) startPolling();
+      };
+    } else {
+      startPolling();
+    }
     
-    // Cleanup interval on unmount
-    return () => clearInterval(intervalId);
-  }, [candidateStatus?.is_candidate]);
+    // Cleanup stream/interval on unmount
+    return () => {
+      if (eventSource) eventSource.close();
+      if (intervalId) clearInterval(intervalId);
+    };
+  }, [candidateStatus?.is_candidate, candidateStatus?.candidate?.id]);
 
   const onPickFile = (e) => {
     const f = e.target.files?.[0];
@@ -261,7 +302,8 @@ export default function Profile() {
       });
       const data = await res.json();
       if (!res.ok) throw new Error(data?.error?.message || 'Upload failed');
-      setUser(u => ({ ...(u || {}), profile_pic: data.profile_pic }));
+      const upload = data.status === 'pending' ? await waitForUpload(data.upload_id, token) : data;
+      setUser(u => ({ ...(u || {}), profile_pic: upload.profile_pic }));
       setPreview(null);
       if (fileRef.current) fileRef.current.value = '';
       alert('Profile picture updated');
@@ -337,6 +379,14 @@ export default function Profile() {
       
       setShowApplyForm(false);
       
+      if (data.profile_pic_upload?.status === 'pending') {
+        try {
+          await waitForUpload(data.profile_pic_upload.upload_id, token);
+        } catch (uploadErr) {
+          alert(`Profile picture could not be uploaded: ${uploadErr.message}`);
+        }
+      }
+      
       // Refresh candidate status
       const statusRes = await fetch('/api/candidates/status', { headers: { Authorization: `Bearer ${token}` } });
       const statusData = await statusRes.json();
@@ -421,7 +471,7 @@ export default function Profile() {
     return 'Select your date of birth';
   };
 
-  const avatarSrc = preview || getImageUrl(user?.profile_pic || candidateStatus?.candidate?.profile_pic) || DEFAULT_AVATAR;
+  const avatarSrc = preview || getImageUrl(user?.profile_pic || candidateStatus?.candidate?.profile_pic, 'card') || DEFAULT_AVATAR;
 
   const styles = {
     pageContainer: {
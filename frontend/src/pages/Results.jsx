@@ -218,6 +218,58 @@ export default function Results() {
       });
   }, [navigate]);
 
+  // While voting is open, apply live vote counts pushed over Server-Sent Events.
+  // When the server does not stream (sync workers) or the browser cannot, refresh every 10 seconds instead.
+  useEffect(() => {
+    if (loading || isFinalized) return;
+
+    let eventSource = null;
+    let intervalId = null;
+    const startPolling = () => {
+      intervalId = setInterval(() => {
+        const token = localStorage.getItem('accessToken');
+        fetch('/api/candidates/results', { headers: { Authorization: `Bearer ${token}` } })
+          .then(r => (r.ok ? r.json() : Promise.reject(r)))
+          .then(data => {
+            setResults(data.results || []);
+            setIsFinalized(data.is_finalized || false);
+          })
+          .catch(() => {});
+      }, 10000);
+    };
+
+    if (window.EventSource) {
+      eventSource = new EventSource('/api/candidates/stream');
+      eventSource.addEventListener('tally', (e) => {
+        const tally = JSON.parse(e.data);
+        setResults(prev => {
+          if (!prev.some(c => c.id === tally.candidate_id)) return prev;
+          return prev
+            .map(c => (c.id === tally.candidate_id ? { ...c, vote_count: tally.vote_count || 0 } : c))
+            .sort((a, b) => b.vote_count - a.vote_count || a.name.localeCompare(b.name));
+        });
+      });
+      // CLOSED: the server refused the stream (e.g. 404 when disabled); otherwise the browser reconnects
+      eventSource.onerror = () => {
+        if (eventSource.readyState === EventSource.CLOSED && !intervalId) startPolling();
+      };
+    } else {
+      startPolling();
+    }
+
+    return () => {
+      if (eventSource) eventSource.close();
+      if (intervalId) clearInterval(intervalId);
+    };
+  }, [loading, isFinalized]);
+
+  // Keep the total in sync with live updates
+  useEffect(() => {
+    if (!isFinalized) {
+      setTotalVotes(results.reduce((sum, c) => sum + (c.vote_count || 0), 0));
+    }
+  }, [results, isFinalized]);
+
   const getPercentage = (votes) => {
     if (totalVotes === 0) return 0;
     return ((votes / totalVotes) * 100).toFixed(1);
@@ -351,7 +403,7 @@ export default function Results() {
                             <div style={styles.resultPhoto}>
                               {candidate.profile_pic ? (
                                 <img 
-                                  src={getImageUrl(candidate.profile_pic)} 
+                                  src={getImageUrl(candidate.profile_pic, 'avatar')} 
                                   alt={candidate.name}
                                   style={styles.photoImg}
                                   onError={(e) => {
@@ -87,10 +87,10 @@ export default function Vote() {
       const data = await response.json();
 
       if (!response.ok) {
-        throw new Error(data.error || 'Failed to cast vote');
+        throw new Error(data.error?.message || data.error || 'Failed to cast vote');
       }
 
-      alert('✅ Vote cast successfully!');
+      alert(response.status === 202 ? '✅ Vote received!' : '✅ Vote cast successfully!');
       setHasVoted(true);
       setTimeout(() => navigate('/results'), 1500);
     } catch (err) {
@@ -166,7 +166,7 @@ export default function Vote() {
                   <div style={styles.candidatePhoto}>
                     {candidate.profile_pic ? (
                       <img 
-                        src={getImageUrl(candidate.profile_pic)} 
+                        src={getImageUrl(candidate.profile_pic, 'card')} 
                         alt={candidate.name}
                         style={styles.photoImg}
                         onError={(e) => {